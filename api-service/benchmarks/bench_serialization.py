@@ -0,0 +1,74 @@
+# Сравнение стоимости сериализации ответа list_posts:
+#   pydantic — прежний путь: PostListItem на каждый пост, повторная валидация
+#              через response_model и кодирование stdlib json;
+#   fast     — protobuf -> dict -> orjson (serialization.FastJSONResponse).
+#
+# Запуск из каталога api-service:
+#   python benchmarks/bench_serialization.py [--posts 1000] [--repeat 20]
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fastapi.encoders import jsonable_encoder
+import post_pb2
+from posts import PostListItem, PostList
+from serialization import FastJSONResponse, post_list_to_dict
+
+def make_response(n: int) -> post_pb2.ListPostsResponse:
+    posts = [
+        post_pb2.Post(
+            id=str(i),
+            title=f"Post title {i}",
+            description="Lorem ipsum dolor sit amet, " * 4,
+            creator_id=i % 100,
+            created_at="2025-03-03T12:00:00",
+            updated_at="2025-03-03T12:00:00",
+            is_private=False,
+            tags=["python", "grpc", "fastapi"],
+        )
+        for i in range(n)
+    ]
+    return post_pb2.ListPostsResponse(posts=posts, total=n)
+
+def pydantic_path(resp) -> bytes:
+    posts = [
+        PostListItem(
+            id=p.id,
+            title=p.title,
+            description=p.description,
+            creator_id=p.creator_id,
+            created_at=p.created_at,
+            updated_at=p.updated_at,
+            is_private=p.is_private,
+            tags=p.tags
+        ) for p in resp.posts
+    ]
+    body = PostList(posts=posts, total=resp.total)
+    # Так FastAPI обрабатывает возвращённую модель при заданном response_model.
+    # author есть в ответе только при expand=author
+    validated = PostList.model_validate(body.model_dump())
+    encoded = jsonable_encoder(validated, exclude={"posts": {"__all__": {"author"}}})
+    return json.dumps(encoded, ensure_ascii=False, separators=(",", ":")).encode()
+
+def fast_path(resp) -> bytes:
+    return FastJSONResponse(post_list_to_dict(resp.posts, resp.total)).body
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    resp = make_response(args.posts)
+    assert json.loads(pydantic_path(resp)) == json.loads(fast_path(resp))
+
+    for name, fn in (("pydantic", pydantic_path), ("fast", fast_path)):
+        best = min(timeit.repeat(lambda: fn(resp), number=1, repeat=args.repeat))
+        print(f"{name:>9}: {best * 1000:8.2f} ms per page, {best / args.posts * 1e6:6.2f} us per post")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import os
+import shutil
+from prometheus_client import multiprocess
+
+# Каталог для метрик Prometheus в многопроцессном режиме очищается при старте
+# мастер-процесса, а метрики завершившихся воркеров помечаются как «мёртвые».
+
+def on_starting(server):
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
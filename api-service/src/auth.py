@@ -0,0 +1,124 @@
+import os
+import time
+from collections import OrderedDict
+import httpx
+import jwt
+from fastapi import HTTPException, status
+from http_client import USER_SERVICE_URL, get_http_client
+from singleflight import SingleFlight
+from metrics import track_stage, track_upstream, record_upstream_error
+
+# Настройки подписи JWT должны совпадать с user-service
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your_secret_key")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+# Проверять подпись токена локально, не обращаясь к user-service
+JWT_LOCAL_VERIFY = os.getenv("JWT_LOCAL_VERIFY", "true").lower() in ("1", "true", "yes")
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", 300))
+
+# Ограниченный по размеру (LRU) кэш «токен -> данные пользователя».
+# Запись живёт не дольше TTL и не дольше срока действия токена (exp).
+class TokenCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, token: str):
+        entry = self._data.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        user_data, expires_at = entry
+        if expires_at <= time.time():
+            del self._data[token]
+            self.misses += 1
+            return None
+        self._data.move_to_end(token)
+        self.hits += 1
+        return user_data
+
+    def set(self, token: str, user_data: dict, exp=None):
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= time.time() or self.maxsize <= 0:
+            return
+        self._data[token] = (user_data, expires_at)
+        self._data.move_to_end(token)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+# Одновременные проверки одного и того же токена делят один запрос к user-сервису
+profile_requests = SingleFlight()
+
+def invalid_token_exception() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+# Запрос профиля в user-сервисе: используется для токенов без идентификатора
+# пользователя в claims и при отключённой локальной проверке.
+async def fetch_profile(token: str) -> dict:
+    return await profile_requests.do(token, lambda: _fetch_profile(token))
+
+async def _fetch_profile(token: str) -> dict:
+    client = get_http_client("user-service")
+    try:
+        with track_upstream("user-service"):
+            response = await client.get(
+                f"{USER_SERVICE_URL}/profile",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        if not isinstance(e, httpx.HTTPStatusError):
+            record_upstream_error("user-service", type(e).__name__)
+        raise invalid_token_exception()
+    return response.json()
+
+# Функция проверки JWT. Подпись и срок действия проверяются локально,
+# результат кэшируется до истечения токена, поэтому повторные запросы
+# с тем же токеном не ходят ни в user-сервис, ни в его БД.
+async def validate_jwt_token(token: str) -> dict:
+    with track_stage("auth"):
+        return await _validate_jwt_token(token)
+
+async def _validate_jwt_token(token: str) -> dict:
+    user_data = token_cache.get(token)
+    if user_data is not None:
+        return user_data
+    if JWT_LOCAL_VERIFY:
+        try:
+            claims = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        except jwt.PyJWTError:
+            raise invalid_token_exception()
+        if claims.get("uid") is not None:
+            user_data = {"id": claims["uid"], "login": claims.get("sub")}
+        else:
+            user_data = await fetch_profile(token)
+    else:
+        user_data = await fetch_profile(token)
+        try:
+            # Подпись уже проверил user-сервис, здесь нужен только exp
+            claims = jwt.decode(token, options={"verify_signature": False})
+        except jwt.PyJWTError:
+            claims = {}
+    token_cache.set(token, user_data, claims.get("exp"))
+    return user_data
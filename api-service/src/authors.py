@@ -0,0 +1,40 @@
+import asyncio
+import httpx
+from fastapi import HTTPException, status
+from http_client import USER_SERVICE_URL, get_http_client
+from metrics import track_upstream, record_upstream_error
+
+# Ограничение совпадает с MAX_BATCH_SIZE в user-service
+USER_BATCH_SIZE = 100
+
+# Загрузчик авторов в стиле DataLoader, живёт один запрос: уникальные id собираются
+# и запрашиваются у user-service одним GET /users:batch на каждые USER_BATCH_SIZE id.
+# Уже загруженные (и ненайденные) id повторно не запрашиваются.
+class AuthorLoader:
+    def __init__(self, token: str):
+        self.token = token
+        self._loaded = {}
+
+    async def load_many(self, ids) -> dict:
+        missing = sorted({user_id for user_id in ids if user_id not in self._loaded})
+        chunks = [missing[i:i + USER_BATCH_SIZE] for i in range(0, len(missing), USER_BATCH_SIZE)]
+        for chunk, users in zip(chunks, await asyncio.gather(*(self._fetch(chunk) for chunk in chunks))):
+            for user_id in chunk:
+                self._loaded[user_id] = users.get(user_id)
+        return {user_id: self._loaded[user_id] for user_id in ids}
+
+    async def _fetch(self, ids) -> dict:
+        client = get_http_client("user-service")
+        try:
+            with track_upstream("user-service"):
+                response = await client.get(
+                    f"{USER_SERVICE_URL}/users:batch",
+                    params={"ids": ",".join(str(user_id) for user_id in ids)},
+                    headers={"Authorization": f"Bearer {self.token}"}
+                )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            if not isinstance(e, httpx.HTTPStatusError):
+                record_upstream_error("user-service", type(e).__name__)
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="User service unavailable")
+        return {user["id"]: user for user in response.json()["users"]}
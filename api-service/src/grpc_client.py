@@ -0,0 +1,58 @@
+import itertools
+import os
+import grpc
+import post_pb2_grpc
+
+POST_SERVICE_ADDR = os.getenv("POST_SERVICE_ADDR", "post-service:50051")
+# Количество gRPC-каналов (HTTP/2-соединений) к post-сервису на один воркер
+GRPC_CHANNEL_POOL_SIZE = int(os.getenv("GRPC_CHANNEL_POOL_SIZE", 2))
+# Дедлайн одного вызова post-сервиса, в секундах
+GRPC_TIMEOUT = float(os.getenv("GRPC_TIMEOUT", 5.0))
+# Дедлайн потоковой выгрузки (StreamPosts) целиком, в секундах
+GRPC_STREAM_TIMEOUT = float(os.getenv("GRPC_STREAM_TIMEOUT", 600.0))
+GRPC_KEEPALIVE_TIME_MS = int(os.getenv("GRPC_KEEPALIVE_TIME_MS", 30000))
+GRPC_KEEPALIVE_TIMEOUT_MS = int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", 10000))
+
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", GRPC_KEEPALIVE_TIME_MS),
+    ("grpc.keepalive_timeout_ms", GRPC_KEEPALIVE_TIMEOUT_MS),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    # Каждый канал держит собственное соединение, иначе gRPC объединит их в одно
+    ("grpc.use_local_subchannel_pool", 1),
+]
+
+# Небольшой пул асинхронных (grpc.aio) каналов, создаваемых один раз на воркер.
+# Стабы раздаются по кругу, вызовы не блокируют event loop.
+class ChannelPool:
+    def __init__(self, target: str, size: int, options=None):
+        self.target = target
+        self.size = max(1, size)
+        self.options = options or []
+        self._channels = []
+        self._stubs = []
+        self._cycle = None
+
+    def start(self):
+        if self._channels:
+            return
+        for _ in range(self.size):
+            channel = grpc.aio.insecure_channel(self.target, options=self.options)
+            self._channels.append(channel)
+            self._stubs.append(post_pb2_grpc.PostServiceStub(channel))
+        self._cycle = itertools.cycle(self._stubs)
+
+    def get_stub(self) -> post_pb2_grpc.PostServiceStub:
+        if not self._channels:
+            self.start()
+        return next(self._cycle)
+
+    async def close(self):
+        channels = self._channels
+        self._channels = []
+        self._stubs = []
+        self._cycle = None
+        for channel in channels:
+            await channel.close()
+
+post_service_channels = ChannelPool(POST_SERVICE_ADDR, GRPC_CHANNEL_POOL_SIZE, CHANNEL_OPTIONS)
@@ -0,0 +1,30 @@
+import hashlib
+
+# Сильный ETag поста: меняется при любом обновлении (updated_at)
+def post_etag(post_id: str, updated_at: str) -> str:
+    digest = hashlib.sha1(f"{post_id}:{updated_at}".encode()).hexdigest()
+    return f'"{digest}"'
+
+# ETag страницы списка: зависит от параметров страницы, общего количества
+# и версий всех постов на странице
+def list_etag(posts, total: int, *params) -> str:
+    h = hashlib.sha1(repr(params).encode())
+    h.update(f"total:{total}".encode())
+    for p in posts:
+        h.update(f"|{p.id}:{p.updated_at}".encode())
+    return f'"{h.hexdigest()}"'
+
+# Проверка If-None-Match (RFC 7232, 3.2): используется слабое сравнение,
+# поддерживаются списки значений и "*"
+def etag_matches(if_none_match, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+# Приватные посты не должны попадать в общие кэши; публичные можно хранить,
+# но каждый раз перепроверять (по ETag) у API-сервиса
+def cache_control(is_private: bool) -> str:
+    return "private, no-cache" if is_private else "public, no-cache"
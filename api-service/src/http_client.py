@@ -0,0 +1,69 @@
+import os
+import httpx
+
+# Адреса upstream-сервисов, к которым API-сервис ходит по HTTP.
+USER_SERVICE_URL = os.getenv("USER_SERVICE_URL", "http://user-service")
+
+UPSTREAMS = {
+    "user-service": USER_SERVICE_URL,
+}
+
+HTTP2_ENABLED = os.getenv("HTTP_CLIENT_HTTP2", "false").lower() in ("1", "true", "yes")
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+# Настройки пула и таймаутов для конкретного upstream-а.
+# Любую настройку можно переопределить переменной окружения с префиксом
+# по имени сервиса, например USER_SERVICE_MAX_CONNECTIONS.
+def upstream_settings(name: str) -> dict:
+    prefix = name.upper().replace("-", "_")
+    return {
+        "max_connections": _env_int(f"{prefix}_MAX_CONNECTIONS", 100),
+        "max_keepalive_connections": _env_int(f"{prefix}_MAX_KEEPALIVE_CONNECTIONS", 20),
+        "keepalive_expiry": _env_float(f"{prefix}_KEEPALIVE_EXPIRY", 30.0),
+        "connect_timeout": _env_float(f"{prefix}_CONNECT_TIMEOUT", 2.0),
+        "read_timeout": _env_float(f"{prefix}_READ_TIMEOUT", 10.0),
+        "write_timeout": _env_float(f"{prefix}_WRITE_TIMEOUT", 10.0),
+        "pool_timeout": _env_float(f"{prefix}_POOL_TIMEOUT", 5.0),
+    }
+
+_clients = {}
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    settings = upstream_settings(name)
+    limits = httpx.Limits(
+        max_connections=settings["max_connections"],
+        max_keepalive_connections=settings["max_keepalive_connections"],
+        keepalive_expiry=settings["keepalive_expiry"],
+    )
+    timeout = httpx.Timeout(
+        connect=settings["connect_timeout"],
+        read=settings["read_timeout"],
+        write=settings["write_timeout"],
+        pool=settings["pool_timeout"],
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=HTTP2_ENABLED)
+
+# Общий долгоживущий клиент для upstream-а: соединения переиспользуются (keep-alive)
+# между запросами. Обычно создаётся в lifespan приложения, но если его ещё нет
+# (например, в тестах без lifespan) — создаётся лениво.
+def get_http_client(name: str = "user-service") -> httpx.AsyncClient:
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client(name)
+        _clients[name] = client
+    return client
+
+def start_http_clients():
+    for name in UPSTREAMS:
+        get_http_client(name)
+
+async def close_http_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -1,12 +1,88 @@
-from fastapi import FastAPI, Request, Response
+import os
 import httpx
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from http_client import USER_SERVICE_URL, get_http_client, start_http_clients, close_http_clients
+from grpc_client import post_service_channels
+from metrics import MetricsMiddleware, metrics_response, track_stage, track_upstream, record_upstream_error
+from read_your_writes import ReadYourWritesMiddleware
 from posts import router as posts_router
 
-app = FastAPI(title="API Proxy Service")
+# Потоковое проксирование: тела запроса и ответа не буферизуются целиком в памяти
+PROXY_STREAMING = os.getenv("PROXY_STREAMING", "true").lower() in ("1", "true", "yes")
+
+# Hop-by-hop заголовки (RFC 7230, раздел 6.1) относятся к конкретному соединению
+# и не должны пересылаться прокси.
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+# Общие HTTP-клиенты и gRPC-каналы с пулом соединений живут столько же, сколько приложение
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_http_clients()
+    post_service_channels.start()
+    yield
+    await post_service_channels.close()
+    await close_http_clients()
+
+app = FastAPI(title="API Proxy Service", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
 
 app.include_router(posts_router, prefix="/posts")
 
-USER_SERVICE_URL = "http://user-service"
+# Метрики в формате Prometheus; маршрут объявлен до catch-all прокси
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+# Убираем hop-by-hop заголовки и заголовки, перечисленные в Connection.
+# Работаем со списком пар, чтобы не потерять повторяющиеся заголовки (например, Set-Cookie).
+def filter_headers(items, exclude=()) -> list:
+    items = list(items)
+    skip = HOP_BY_HOP_HEADERS | set(exclude)
+    for key, value in items:
+        if key.lower() == "connection":
+            skip |= {token.strip().lower() for token in value.split(",")}
+    return [(key, value) for key, value in items if key.lower() not in skip]
+
+# Тело запроса пробрасывается потоком только если оно есть,
+# иначе httpx отправил бы пустой chunked-запрос (например, для GET).
+def request_body_stream(request: Request):
+    if "content-length" in request.headers or "transfer-encoding" in request.headers:
+        return request.stream()
+    return None
+
+# Отдаём байты upstream-а как есть (без декомпрессии), по мере чтения клиентом:
+# StreamingResponse ждёт отправки каждого чанка, поэтому медленный клиент
+# притормаживает и чтение из upstream (backpressure).
+async def stream_upstream(upstream):
+    try:
+        async for chunk in upstream.aiter_raw():
+            yield chunk
+    finally:
+        await upstream.aclose()
+
+# Ошибки транспорта и 5xx от user-сервиса учитываются в метрике ошибок upstream-а
+async def call_upstream(coro):
+    try:
+        response = await coro
+    except httpx.HTTPError as e:
+        record_upstream_error("user-service", type(e).__name__)
+        raise
+    if response.status_code >= 500:
+        record_upstream_error("user-service", f"http_{response.status_code}")
+    return response
 
 @app.api_route(
     "/{path:path}",
@@ -14,11 +90,25 @@ USER_SERVICE_URL = "http://user-service"
     include_in_schema=False
 )
 async def proxy(request: Request, path: str):
-    async with httpx.AsyncClient() as client:
-        url = f"{USER_SERVICE_URL}/{path}"
-        method = request.method
-        headers = dict(request.headers)
-        headers.pop("host", None)
+    client = get_http_client("user-service")
+    url = f"{USER_SERVICE_URL}/{path}"
+    method = request.method
+    headers = filter_headers(request.headers.items(), exclude=("host",))
+    if not PROXY_STREAMING:
         body = await request.body()
-        response = await client.request(method, url, headers=headers, content=body)
-    return Response(content=response.content, status_code=response.status_code, headers=response.headers)
+        with track_stage("http_proxy"), track_upstream("user-service"):
+            response = await call_upstream(client.request(method, url, headers=headers, content=body))
+        return Response(
+            content=response.content,
+            status_code=response.status_code,
+            headers=dict(filter_headers(response.headers.items())),
+        )
+    upstream_request = client.build_request(method, url, headers=headers, content=request_body_stream(request))
+    with track_stage("http_proxy"), track_upstream("user-service"):
+        upstream = await call_upstream(client.send(upstream_request, stream=True))
+    response = StreamingResponse(stream_upstream(upstream), status_code=upstream.status_code)
+    response.raw_headers = [
+        (key.encode("latin-1"), value.encode("latin-1"))
+        for key, value in filter_headers(upstream.headers.multi_items())
+    ]
+    return response
@@ -0,0 +1,130 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Метрики в формате Prometheus. При запуске под gunicorn с несколькими воркерами
+# нужно задать PROMETHEUS_MULTIPROC_DIR: каждый воркер пишет значения в файлы
+# этого каталога, а /metrics агрегирует их по всем воркерам (см. gunicorn.conf.py).
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "api_request_stage_duration_seconds",
+    "Время отдельных этапов обработки запроса (auth, grpc, http_proxy, encode)",
+    ["route", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "api_requests_in_flight",
+    "Количество запросов, обрабатываемых в данный момент",
+    multiprocess_mode="livesum",
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "api_upstream_requests_in_flight",
+    "Количество незавершённых запросов к upstream-сервисам",
+    ["upstream"],
+    multiprocess_mode="livesum",
+)
+UPSTREAM_ERRORS = Counter(
+    "api_upstream_errors_total",
+    "Ошибки при обращении к upstream-сервисам",
+    ["upstream", "kind"],
+)
+
+# ASGI scope текущего запроса: из него этапы узнают шаблон маршрута
+_current_scope = ContextVar("metrics_scope", default=None)
+
+# Метка маршрута — шаблон пути (например, /posts/{post_id}), а не сам путь,
+# чтобы число временных рядов не зависело от идентификаторов в URL.
+def route_label(scope) -> str:
+    if scope is None:
+        return "unknown"
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    if regex is None or regex.match(path):
+        return route.path
+    # Маршрут из роутера, подключённого с префиксом: в scope лежит маршрут
+    # без префикса, поэтому восстанавливаем префикс по фактическому пути
+    for i in range(1, len(path)):
+        if regex.match(path[i:]):
+            return path[:i] + route.path
+    return route.path
+
+# Замер длительности этапа обработки в рамках текущего запроса
+@contextmanager
+def track_stage(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(route_label(_current_scope.get()), stage).observe(time.perf_counter() - start)
+
+# Учёт незавершённых запросов к upstream-у и ошибок обращения к нему
+@contextmanager
+def track_upstream(upstream: str):
+    UPSTREAM_IN_FLIGHT.labels(upstream).inc()
+    try:
+        yield
+    finally:
+        UPSTREAM_IN_FLIGHT.labels(upstream).dec()
+
+def record_upstream_error(upstream: str, kind: str):
+    UPSTREAM_ERRORS.labels(upstream, kind).inc()
+
+# Чистый ASGI middleware (без BaseHTTPMiddleware), чтобы не мешать потоковым ответам
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = _current_scope.set(scope)
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            REQUEST_LATENCY.labels(scope["method"], route_label(scope), str(status_code)).observe(
+                time.perf_counter() - start
+            )
+            _current_scope.reset(token)
+
+def metrics_response() -> Response:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -22,31 +22,62 @@ _runtime_version.ValidateProtobufRuntimeVersion(
 _sym_db = _symbol_database.Default()
 
 
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\npost.proto\x12\x05posts\"\x94\x01\n\x04Post\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12\x12\n\ncreator_id\x18\x04 \x01(\x05\x12\x12\n\ncreated_at\x18\x05 \x01(\t\x12\x12\n\nupdated_at\x18\x06 \x01(\t\x12\x12\n\nis_private\x18\x07 \x01(\x08\x12\x0c\n\x04tags\x18\x08 \x03(\t\".\n\x11\x43reatePostRequest\x12\x19\n\x04post\x18\x01 \x01(\x0b\x32\x0b.posts.Post\"0\n\x11\x44\x65letePostRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x05\".\n\x11UpdatePostRequest\x12\x19\n\x04post\x18\x01 \x01(\x0b\x32\x0b.posts.Post\"-\n\x0eGetPostRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x05\"?\n\x10ListPostsRequest\x12\x0c\n\x04page\x18\x01 \x01(\x05\x12\x0c\n\x04size\x18\x02 \x01(\x05\x12\x0f\n\x07user_id\x18\x03 \x01(\x05\"8\n\x0cPostResponse\x12\x19\n\x04post\x18\x01 \x01(\x0b\x32\x0b.posts.Post\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"M\n\x11ListPostsResponse\x12\x1a\n\x05posts\x18\x01 \x03(\x0b\x32\x0b.posts.Post\x12\r\n\x05total\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t2\xbb\x02\n\x0bPostService\x12;\n\nCreatePost\x12\x18.posts.CreatePostRequest\x1a\x13.posts.PostResponse\x12;\n\nDeletePost\x12\x18.posts.DeletePostRequest\x1a\x13.posts.PostResponse\x12;\n\nUpdatePost\x12\x18.posts.UpdatePostRequest\x1a\x13.posts.PostResponse\x12\x35\n\x07GetPost\x12\x15.posts.GetPostRequest\x1a\x13.posts.PostResponse\x12>\n\tListPosts\x12\x17.posts.ListPostsRequest\x1a\x18.posts.ListPostsResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\npost.proto\x12\x05posts\x1a google/protobuf/field_mask.proto\"\x94\x01\n\x04Post\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12\x12\n\ncreator_id\x18\x04 \x01(\x05\x12\x12\n\ncreated_at\x18\x05 \x01(\t\x12\x12\n\nupdated_at\x18\x06 \x01(\t\x12\x12\n\nis_private\x18\x07 \x01(\x08\x12\x0c\n\x04tags\x18\x08 \x03(\t\".\n\x11\x43reatePostRequest\x12\x19\n\x04post\x18\x01 \x01(\x0b\x32\x0b.posts.Post\"0\n\x11\x44\x65letePostRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x05\"_\n\x11UpdatePostRequest\x12\x19\n\x04post\x18\x01 \x01(\x0b\x32\x0b.posts.Post\x12/\n\x0bupdate_mask\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"-\n\x0eGetPostRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x05\"\xb7\x01\n\x10ListPostsRequest\x12\x0c\n\x04page\x18\x01 \x01(\x05\x12\x0c\n\x04size\x18\x02 \x01(\x05\x12\x0f\n\x07user_id\x18\x03 \x01(\x05\x12\x13\n\x06\x63ursor\x18\x04 \x01(\tH\x00\x88\x01\x01\x12\x0c\n\x04tags\x18\x05 \x03(\t\x12\"\n\ttag_match\x18\x06 \x01(\x0e\x32\x0f.posts.TagMatch\x12$\n\ncount_mode\x18\x07 \x01(\x0e\x32\x10.posts.CountModeB\t\n\x07_cursor\"8\n\x0cPostResponse\x12\x19\n\x04post\x18\x01 \x01(\x0b\x32\x0b.posts.Post\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"\x7f\n\x12StreamPostsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\x12\x17\n\ncreator_id\x18\x02 \x01(\x05H\x00\x88\x01\x01\x12\x0c\n\x04tags\x18\x03 \x03(\t\x12\"\n\ttag_match\x18\x04 \x01(\x0e\x32\x0f.posts.TagMatchB\r\n\x0b_creator_id\"\'\n\tPostChunk\x12\x1a\n\x05posts\x18\x01 \x03(\x0b\x32\x0b.posts.Post\"0\n\x12ImportPostsRequest\x12\x1a\n\x05posts\x18\x01 \x03(\x0b\x32\x0b.posts.Post\"/\n\x0fImportPostError\x12\r\n\x05index\x18\x01 \x01(\x05\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"n\n\x13ImportPostsResponse\x12\x10\n\x08imported\x18\x01 \x01(\x05\x12\x0e\n\x06\x66\x61iled\x18\x02 \x01(\x05\x12&\n\x06\x65rrors\x18\x03 \x03(\x0b\x32\x16.posts.ImportPostError\x12\r\n\x05\x65rror\x18\x04 \x01(\t\"j\n\x12SearchPostsRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x05\x12\x0c\n\x04size\x18\x03 \x01(\x05\x12\x0e\n\x06\x63ursor\x18\x04 \x01(\t\x12\x16\n\x0emax_candidates\x18\x05 \x01(\x05\"l\n\tSearchHit\x12\x19\n\x04post\x18\x01 \x01(\x0b\x32\x0b.posts.Post\x12\x0c\n\x04rank\x18\x02 \x01(\x02\x12\x17\n\x0ftitle_highlight\x18\x03 \x01(\t\x12\x1d\n\x15\x64\x65scription_highlight\x18\x04 \x01(\t\"l\n\x13SearchPostsResponse\x12\x1e\n\x04hits\x18\x01 \x03(\x0b\x32\x10.posts.SearchHit\x12\x13\n\x0bnext_cursor\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\x12\x11\n\ttruncated\x18\x04 \x01(\x08\"\x9a\x01\n\x11ListPostsResponse\x12\x1a\n\x05posts\x18\x01 \x03(\x0b\x32\x0b.posts.Post\x12\r\n\x05total\x18\x02 \x01(\x05\x12\r\n\x05\x65rror\x18\x03 \x01(\t\x12\x13\n\x0bnext_cursor\x18\x04 \x01(\t\x12$\n\ncount_kind\x18\x05 \x01(\x0e\x32\x10.posts.CountMode\x12\x10\n\x08has_next\x18\x06 \x01(\x08\"X\n\x13PostVersionResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\x12\n\nupdated_at\x18\x02 \x01(\t\x12\x12\n\nis_private\x18\x03 \x01(\x08\x12\r\n\x05\x65rror\x18\x04 \x01(\t\"4\n\x14\x42\x61tchGetPostsRequest\x12\x0b\n\x03ids\x18\x01 \x03(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x05\"5\n\x17\x42\x61tchCreatePostsRequest\x12\x1a\n\x05posts\x18\x01 \x03(\x0b\x32\x0b.posts.Post\"G\n\x0f\x42\x61tchPostResult\x12\n\n\x02id\x18\x01 \x01(\t\x12\x19\n\x04post\x18\x02 \x01(\x0b\x32\x0b.posts.Post\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"L\n\x12\x42\x61tchPostsResponse\x12\'\n\x07results\x18\x01 \x03(\x0b\x32\x16.posts.BatchPostResult\x12\r\n\x05\x65rror\x18\x02 \x01(\t*S\n\tCountMode\x12\x0f\n\x0b\x43OUNT_EXACT\x10\x00\x12\x13\n\x0f\x43OUNT_ESTIMATED\x10\x01\x12\x10\n\x0c\x43OUNT_CACHED\x10\x02\x12\x0e\n\nCOUNT_NONE\x10\x03*0\n\x08TagMatch\x12\x11\n\rTAG_MATCH_ANY\x10\x00\x12\x11\n\rTAG_MATCH_ALL\x10\x01\x32\xe4\x05\n\x0bPostService\x12;\n\nCreatePost\x12\x18.posts.CreatePostRequest\x1a\x13.posts.PostResponse\x12;\n\nDeletePost\x12\x18.posts.DeletePostRequest\x1a\x13.posts.PostResponse\x12;\n\nUpdatePost\x12\x18.posts.UpdatePostRequest\x1a\x13.posts.PostResponse\x12\x35\n\x07GetPost\x12\x15.posts.GetPostRequest\x1a\x13.posts.PostResponse\x12>\n\tListPosts\x12\x17.posts.ListPostsRequest\x1a\x18.posts.ListPostsResponse\x12\x43\n\x0eGetPostVersion\x12\x15.posts.GetPostRequest\x1a\x1a.posts.PostVersionResponse\x12G\n\rBatchGetPosts\x12\x1b.posts.BatchGetPostsRequest\x1a\x19.posts.BatchPostsResponse\x12M\n\x10\x42\x61tchCreatePosts\x12\x1e.posts.BatchCreatePostsRequest\x1a\x19.posts.BatchPostsResponse\x12<\n\x0bStreamPosts\x12\x19.posts.StreamPostsRequest\x1a\x10.posts.PostChunk0\x01\x12\x46\n\x0bImportPosts\x12\x19.posts.ImportPostsRequest\x1a\x1a.posts.ImportPostsResponse(\x01\x12\x44\n\x0bSearchPosts\x12\x19.posts.SearchPostsRequest\x1a\x1a.posts.SearchPostsResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'post_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_POST']._serialized_start=22
-  _globals['_POST']._serialized_end=170
-  _globals['_CREATEPOSTREQUEST']._serialized_start=172
-  _globals['_CREATEPOSTREQUEST']._serialized_end=218
-  _globals['_DELETEPOSTREQUEST']._serialized_start=220
-  _globals['_DELETEPOSTREQUEST']._serialized_end=268
-  _globals['_UPDATEPOSTREQUEST']._serialized_start=270
-  _globals['_UPDATEPOSTREQUEST']._serialized_end=316
-  _globals['_GETPOSTREQUEST']._serialized_start=318
-  _globals['_GETPOSTREQUEST']._serialized_end=363
-  _globals['_LISTPOSTSREQUEST']._serialized_start=365
-  _globals['_LISTPOSTSREQUEST']._serialized_end=428
-  _globals['_POSTRESPONSE']._serialized_start=430
-  _globals['_POSTRESPONSE']._serialized_end=486
-  _globals['_LISTPOSTSRESPONSE']._serialized_start=488
-  _globals['_LISTPOSTSRESPONSE']._serialized_end=565
-  _globals['_POSTSERVICE']._serialized_start=568
-  _globals['_POSTSERVICE']._serialized_end=883
+  _globals['_COUNTMODE']._serialized_start=1908
+  _globals['_COUNTMODE']._serialized_end=1991
+  _globals['_TAGMATCH']._serialized_start=1993
+  _globals['_TAGMATCH']._serialized_end=2041
+  _globals['_POST']._serialized_start=56
+  _globals['_POST']._serialized_end=204
+  _globals['_CREATEPOSTREQUEST']._serialized_start=206
+  _globals['_CREATEPOSTREQUEST']._serialized_end=252
+  _globals['_DELETEPOSTREQUEST']._serialized_start=254
+  _globals['_DELETEPOSTREQUEST']._serialized_end=302
+  _globals['_UPDATEPOSTREQUEST']._serialized_start=304
+  _globals['_UPDATEPOSTREQUEST']._serialized_end=399
+  _globals['_GETPOSTREQUEST']._serialized_start=401
+  _globals['_GETPOSTREQUEST']._serialized_end=446
+  _globals['_LISTPOSTSREQUEST']._serialized_start=449
+  _globals['_LISTPOSTSREQUEST']._serialized_end=632
+  _globals['_POSTRESPONSE']._serialized_start=634
+  _globals['_POSTRESPONSE']._serialized_end=690
+  _globals['_STREAMPOSTSREQUEST']._serialized_start=692
+  _globals['_STREAMPOSTSREQUEST']._serialized_end=819
+  _globals['_POSTCHUNK']._serialized_start=821
+  _globals['_POSTCHUNK']._serialized_end=860
+  _globals['_IMPORTPOSTSREQUEST']._serialized_start=862
+  _globals['_IMPORTPOSTSREQUEST']._serialized_end=910
+  _globals['_IMPORTPOSTERROR']._serialized_start=912
+  _globals['_IMPORTPOSTERROR']._serialized_end=959
+  _globals['_IMPORTPOSTSRESPONSE']._serialized_start=961
+  _globals['_IMPORTPOSTSRESPONSE']._serialized_end=1071
+  _globals['_SEARCHPOSTSREQUEST']._serialized_start=1073
+  _globals['_SEARCHPOSTSREQUEST']._serialized_end=1179
+  _globals['_SEARCHHIT']._serialized_start=1181
+  _globals['_SEARCHHIT']._serialized_end=1289
+  _globals['_SEARCHPOSTSRESPONSE']._serialized_start=1291
+  _globals['_SEARCHPOSTSRESPONSE']._serialized_end=1399
+  _globals['_LISTPOSTSRESPONSE']._serialized_start=1402
+  _globals['_LISTPOSTSRESPONSE']._serialized_end=1556
+  _globals['_POSTVERSIONRESPONSE']._serialized_start=1558
+  _globals['_POSTVERSIONRESPONSE']._serialized_end=1646
+  _globals['_BATCHGETPOSTSREQUEST']._serialized_start=1648
+  _globals['_BATCHGETPOSTSREQUEST']._serialized_end=1700
+  _globals['_BATCHCREATEPOSTSREQUEST']._serialized_start=1702
+  _globals['_BATCHCREATEPOSTSREQUEST']._serialized_end=1755
+  _globals['_BATCHPOSTRESULT']._serialized_start=1757
+  _globals['_BATCHPOSTRESULT']._serialized_end=1828
+  _globals['_BATCHPOSTSRESPONSE']._serialized_start=1830
+  _globals['_BATCHPOSTSRESPONSE']._serialized_end=1906
+  _globals['_POSTSERVICE']._serialized_start=2044
+  _globals['_POSTSERVICE']._serialized_end=2784
 # @@protoc_insertion_point(module_scope)
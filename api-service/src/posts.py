@@ -1,11 +1,19 @@
-from fastapi import APIRouter, HTTPException, status, Security
+from fastapi import APIRouter, HTTPException, status, Security, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel, Field
 from typing import List, Optional
-import httpx
 import grpc
 import post_pb2
-import post_pb2_grpc
+from google.protobuf.field_mask_pb2 import FieldMask
+from auth import validate_jwt_token
+from authors import AuthorLoader
+from grpc_client import GRPC_TIMEOUT, GRPC_STREAM_TIMEOUT, post_service_channels
+from singleflight import SingleFlight
+from read_your_writes import last_write_metadata, remember_write
+from http_cache import post_etag, list_etag, etag_matches, cache_control
+from metrics import track_stage, track_upstream, record_upstream_error
+from serialization import FastJSONResponse, post_to_dict, posts_to_ndjson, post_list_to_dict, search_hits_to_dict, batch_results_to_dict
 
 router = APIRouter(tags=["Posts"])
 
@@ -14,6 +22,9 @@ router = APIRouter(tags=["Posts"])
 # чтобы Swagger знал, куда отправлять запрос за токеном.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="http://localhost:8001/login")
 
+# Одновременные GetPost одного поста (горячий пост) делят один вызов post‑сервиса
+get_post_requests = SingleFlight()
+
 class PostCreate(BaseModel):
     title: str = Field(..., description="Заголовок поста")
     description: Optional[str] = Field("", description="Описание поста")
@@ -26,6 +37,12 @@ class PostUpdate(BaseModel):
     is_private: Optional[bool] = Field(None, description="Флаг приватности")
     tags: Optional[List[str]] = Field(None, description="Список тегов")
 
+class AuthorOut(BaseModel):
+    id: int
+    login: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
 class PostOut(BaseModel):
     id: str
     title: str
@@ -36,29 +53,114 @@ class PostOut(BaseModel):
     is_private: bool
     tags: List[str]
 
+# Пост в списке: при expand=author дополнен профилем автора
+class PostListItem(PostOut):
+    author: Optional[AuthorOut] = Field(None, description="Автор; только при expand=author")
+
 class PostList(BaseModel):
-    posts: List[PostOut]
-    total: int
-
-# Функция проверки JWT: отправляем запрос к user‑сервису для валидации токена.
-async def validate_jwt_token(token: str) -> dict:
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                "http://user-service/profile",
-                headers={"Authorization": f"Bearer {token}"}
-            )
-            response.raise_for_status()
-        except httpx.HTTPError:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    return response.json()
+    posts: List[PostListItem]
+    total: Optional[int] = Field(None, description="Число постов; null, если подсчёт не запрашивался")
+    total_kind: str = Field("exact", description="Способ подсчёта total: exact, estimated, cached или none")
+    has_next: bool = False
+    next_cursor: Optional[str] = None
+
+class SearchHitOut(BaseModel):
+    post: PostOut
+    rank: float
+    title_highlight: str = Field(..., description="Заголовок с совпадениями в <mark>")
+    description_highlight: str = Field(..., description="Фрагменты описания с совпадениями в <mark>")
+
+class SearchOut(BaseModel):
+    hits: List[SearchHitOut]
+    next_cursor: Optional[str] = None
+    truncated: bool = Field(
+        False, description="Совпадений больше, чем max_candidates: более старые совпадения в выдачу не попали"
+    )
+
+# Способы подсчёта total в GET /posts (CountMode в post.proto)
+COUNT_MODES = {
+    "exact": post_pb2.COUNT_EXACT,
+    "estimated": post_pb2.COUNT_ESTIMATED,
+    "cached": post_pb2.COUNT_CACHED,
+    "none": post_pb2.COUNT_NONE,
+}
+COUNT_KINDS = {value: name for name, value in COUNT_MODES.items()}
+
+# Ограничения совпадают с MAX_BATCH_SIZE, MAX_PAGE_SIZE и MAX_SEARCH_CANDIDATES в post‑сервисе
+MAX_BATCH_SIZE = 100
+MAX_PAGE_SIZE = 100
+MAX_SEARCH_CANDIDATES = 10000
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., max_length=MAX_BATCH_SIZE, description="Идентификаторы постов")
+
+class BatchCreateRequest(BaseModel):
+    posts: List[PostCreate] = Field(..., max_length=MAX_BATCH_SIZE, description="Создаваемые посты")
+
+class BatchItemOut(BaseModel):
+    id: Optional[str] = None
+    post: Optional[PostOut] = None
+    error: Optional[str] = None
+
+class BatchOut(BaseModel):
+    results: List[BatchItemOut]
 
 # Функция для получения gRPC‑клиента к post‑сервису.
+# Каналы (grpc.aio) создаются один раз при старте и переиспользуются.
 def get_post_service_stub():
-    channel = grpc.insecure_channel("post-service:50051")
-    return post_pb2_grpc.PostServiceStub(channel)
+    return post_service_channels.get_stub()
+
+# Ошибки транспорта превращаются в 503/504, а не в необработанное исключение
+def raise_for_rpc_error(e: grpc.aio.AioRpcError):
+    record_upstream_error("post-service", e.code().name)
+    if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Post service timeout")
+    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Post service unavailable")
+
+# Вызов post‑сервиса с дедлайном и меткой последней записи автора (read-your-writes)
+async def call_post_service(method, request):
+    try:
+        with track_stage("grpc"), track_upstream("post-service"):
+            return await method(request, timeout=GRPC_TIMEOUT, metadata=last_write_metadata())
+    except grpc.aio.AioRpcError as e:
+        raise_for_rpc_error(e)
+
+# GetPost, общий для всех одновременных запросов одного поста (горячий пост).
+# Вызов идёт от имени первого запросившего, поэтому доступ к общему результату
+# проверяется для каждого ожидающего отдельно. Если первому приватный пост
+# не доступен, остальные запрашивают его сами: пост может принадлежать им.
+# Автор сразу после записи читает сам: общий результат мог прийти с отстающей реплики.
+async def get_post_shared(stub, req):
+    if last_write_metadata():
+        return await call_post_service(stub.GetPost, req)
+
+    async def fetch():
+        return req.user_id, await call_post_service(stub.GetPost, req)
+
+    owner_id, resp = await get_post_requests.do(req.id, fetch)
+    if owner_id == req.user_id:
+        return resp
+    if resp.error == "Unauthorized":
+        return await call_post_service(stub.GetPost, req)
+    if not resp.error and resp.post.is_private and resp.post.creator_id != req.user_id:
+        return post_pb2.PostResponse(error="Unauthorized")
+    return resp
+
+# Параметры ?tags=a,b&match=any|all -> поля tags / tag_match gRPC-запроса
+def parse_tags(tags: Optional[str], match: str):
+    tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
+    tag_match = post_pb2.TAG_MATCH_ALL if match == "all" else post_pb2.TAG_MATCH_ANY
+    return tag_list, tag_match
+
+# Ответ 304 Not Modified: без тела, но с актуальными ETag и Cache-Control
+def not_modified(etag: str, is_private: bool) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control(is_private)},
+    )
 
 # Эндпоинты защищены схемой OAuth2: параметр token берётся через Security(oauth2_scheme).
+# Ответы собираются напрямую из protobuf (FastJSONResponse), response_model нужен для схемы OpenAPI.
 @router.post("", response_model=PostOut, status_code=status.HTTP_201_CREATED)
 async def create_post(
     post: PostCreate,
@@ -76,67 +178,196 @@ async def create_post(
         tags=post.tags
     )
     req = post_pb2.CreatePostRequest(post=grpc_post)
-    resp = stub.CreatePost(req)
+    resp = await call_post_service(stub.CreatePost, req)
     if resp.error:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=resp.error)
-    return PostOut(
-        id=resp.post.id,
-        title=resp.post.title,
-        description=resp.post.description,
-        creator_id=resp.post.creator_id,
-        created_at=resp.post.created_at,
-        updated_at=resp.post.updated_at,
-        is_private=resp.post.is_private,
-        tags=resp.post.tags
-    )
+    return remember_write(FastJSONResponse(post_to_dict(resp.post), status_code=status.HTTP_201_CREATED))
 
 @router.get("", response_model=PostList)
 async def list_posts(
-    page: int = 1,
-    size: int = 10,
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(
+        None, description="Курсор keyset-пагинации; пустое значение — первая страница, page игнорируется"
+    ),
+    tags: Optional[str] = Query(None, description="Теги через запятую"),
+    match: str = Query("any", pattern="^(any|all)$", description="any — хотя бы один из тегов, all — все теги"),
+    count: str = Query(
+        "exact", pattern="^(exact|estimated|cached|none)$",
+        description="Подсчёт total: exact — точный, estimated — оценка планировщика, "
+                    "cached — по счётчикам, none — без подсчёта (только has_next)"
+    ),
+    expand: Optional[str] = Query(
+        None, pattern="^author$", description="author — добавить к постам публичные профили авторов"
+    ),
+    if_none_match: Optional[str] = Header(None),
     token: str = Security(oauth2_scheme)
 ):
     user_data = await validate_jwt_token(token)
     stub = get_post_service_stub()
-    req = post_pb2.ListPostsRequest(page=page, size=size, user_id=user_data["id"])
-    resp = stub.ListPosts(req)
+    tag_list, tag_match = parse_tags(tags, match)
+    req = post_pb2.ListPostsRequest(
+        page=page, size=size, user_id=user_data["id"], tags=tag_list, tag_match=tag_match,
+        count_mode=COUNT_MODES[count]
+    )
+    if cursor is not None:
+        req.cursor = cursor
+    resp = await call_post_service(stub.ListPosts, req)
     if resp.error:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=resp.error)
-    posts = [
-        PostOut(
-            id=p.id,
-            title=p.title,
-            description=p.description,
-            creator_id=p.creator_id,
-            created_at=p.created_at,
-            updated_at=p.updated_at,
-            is_private=p.is_private,
-            tags=p.tags
-        ) for p in resp.posts
+    # Авторы всей страницы — одним запросом в user-service
+    authors = None
+    if expand == "author":
+        authors = await AuthorLoader(token).load_many([p.creator_id for p in resp.posts])
+    # Список содержит приватные посты пользователя, поэтому кэшируется только у клиента.
+    # Профили авторов входят в ETag: смена имени автора меняет ответ.
+    etag = list_etag(
+        resp.posts, resp.total, page, size, cursor, ",".join(tag_list), match, count, resp.has_next, user_data["id"],
+        authors
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, is_private=True)
+    headers = {"ETag": etag, "Cache-Control": cache_control(True)}
+    body = post_list_to_dict(
+        resp.posts, resp.total, resp.next_cursor, COUNT_KINDS[resp.count_kind], resp.has_next
+    )
+    if authors is not None:
+        for item in body["posts"]:
+            item["author"] = authors[item["creator_id"]]
+    return FastJSONResponse(body, headers=headers)
+
+# Полнотекстовый поиск по заголовку и описанию (синтаксис websearch: "фраза", -слово, or).
+# Результаты по убыванию релевантности, пагинация только курсором.
+# С max_candidates ранжируются только самые свежие совпадения (быстро и для частых слов);
+# truncated сообщает, что выдача неполная.
+@router.get("/search", response_model=SearchOut)
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=256, description="Поисковый запрос"),
+    size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+    max_candidates: int = Query(
+        0, ge=0, le=MAX_SEARCH_CANDIDATES,
+        description="Ранжировать только столько самых свежих совпадений (0 — все)"
+    ),
+    token: str = Security(oauth2_scheme)
+):
+    user_data = await validate_jwt_token(token)
+    stub = get_post_service_stub()
+    req = post_pb2.SearchPostsRequest(
+        query=q, user_id=user_data["id"], size=size, cursor=cursor or "", max_candidates=max_candidates
+    )
+    resp = await call_post_service(stub.SearchPosts, req)
+    if resp.error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=resp.error)
+    return FastJSONResponse(search_hits_to_dict(resp.hits, resp.next_cursor, resp.truncated))
+
+# Пакетное получение постов: один вызов post‑сервиса и один запрос к БД вместо N.
+# Ошибки отдельных элементов (нет поста, нет доступа) возвращаются в results.
+@router.post(":batchGet", response_model=BatchOut)
+async def batch_get_posts(
+    batch: BatchGetRequest,
+    token: str = Security(oauth2_scheme)
+):
+    user_data = await validate_jwt_token(token)
+    stub = get_post_service_stub()
+    req = post_pb2.BatchGetPostsRequest(ids=batch.ids, user_id=user_data["id"])
+    resp = await call_post_service(stub.BatchGetPosts, req)
+    if resp.error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=resp.error)
+    return FastJSONResponse(batch_results_to_dict(resp.results))
+
+# Пакетное создание постов одним многострочным INSERT в post‑сервисе
+@router.post(":batchCreate", response_model=BatchOut)
+async def batch_create_posts(
+    batch: BatchCreateRequest,
+    token: str = Security(oauth2_scheme)
+):
+    user_data = await validate_jwt_token(token)
+    stub = get_post_service_stub()
+    grpc_posts = [
+        post_pb2.Post(
+            title=post.title,
+            description=post.description,
+            creator_id=user_data["id"],
+            is_private=post.is_private,
+            tags=post.tags
+        ) for post in batch.posts
     ]
-    return PostList(posts=posts, total=resp.total)
+    req = post_pb2.BatchCreatePostsRequest(posts=grpc_posts)
+    resp = await call_post_service(stub.BatchCreatePosts, req)
+    if resp.error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=resp.error)
+    return remember_write(FastJSONResponse(batch_results_to_dict(resp.results)))
+
+# Тело NDJSON отдаётся по мере чтения gRPC-потока, по одному HTTP-чанку на порцию постов.
+# StreamingResponse ждёт отправки каждого чанка, поэтому медленный HTTP-клиент перестаёт
+# забирать сообщения из потока, окно HTTP/2 заполняется и post-сервис приостанавливает
+# чтение курсора БД.
+async def stream_ndjson(first, chunks, call):
+    try:
+        if first is not None:
+            yield posts_to_ndjson(first.posts)
+        async for chunk in chunks:
+            yield posts_to_ndjson(chunk.posts)
+    except grpc.aio.AioRpcError as e:
+        # Заголовки уже отправлены: остаётся только оборвать ответ
+        record_upstream_error("post-service", e.code().name)
+        raise
+    finally:
+        call.cancel()
+
+# Выгрузка всех видимых пользователю постов (или постов одного автора) потоком NDJSON
+@router.get(":export", response_class=StreamingResponse)
+async def export_posts(
+    creator_id: Optional[int] = Query(None, description="Выгрузить только посты этого автора"),
+    tags: Optional[str] = Query(None, description="Теги через запятую"),
+    match: str = Query("any", pattern="^(any|all)$", description="any — хотя бы один из тегов, all — все теги"),
+    token: str = Security(oauth2_scheme)
+):
+    user_data = await validate_jwt_token(token)
+    stub = get_post_service_stub()
+    tag_list, tag_match = parse_tags(tags, match)
+    req = post_pb2.StreamPostsRequest(user_id=user_data["id"], tags=tag_list, tag_match=tag_match)
+    if creator_id is not None:
+        req.creator_id = creator_id
+    call = stub.StreamPosts(req, timeout=GRPC_STREAM_TIMEOUT, metadata=last_write_metadata())
+    chunks = call.__aiter__()
+    # Первую порцию читаем до ответа, чтобы недоступность post-сервиса
+    # превратилась в 503/504, а не в оборванный ответ 200
+    try:
+        with track_stage("grpc"):
+            first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except grpc.aio.AioRpcError as e:
+        raise_for_rpc_error(e)
+    return StreamingResponse(stream_ndjson(first, chunks, call), media_type="application/x-ndjson")
 
 @router.get("/{post_id}", response_model=PostOut)
 async def get_post(
     post_id: str,
+    if_none_match: Optional[str] = Header(None),
     token: str = Security(oauth2_scheme)
 ):
     user_data = await validate_jwt_token(token)
     stub = get_post_service_stub()
     req = post_pb2.GetPostRequest(id=post_id, user_id=user_data["id"])
-    resp = stub.GetPost(req)
+    if if_none_match:
+        # Для условного запроса сначала узнаём только версию поста:
+        # если она не изменилась, полный пост не загружается вовсе
+        version = await call_post_service(stub.GetPostVersion, req)
+        if not version.error:
+            etag = post_etag(version.id, version.updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, version.is_private)
+    resp = await get_post_shared(stub, req)
     if resp.error:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=resp.error)
-    return PostOut(
-        id=resp.post.id,
-        title=resp.post.title,
-        description=resp.post.description,
-        creator_id=resp.post.creator_id,
-        created_at=resp.post.created_at,
-        updated_at=resp.post.updated_at,
-        is_private=resp.post.is_private,
-        tags=resp.post.tags
-    )
+    headers = {
+        "ETag": post_etag(resp.post.id, resp.post.updated_at),
+        "Cache-Control": cache_control(resp.post.is_private),
+    }
+    return FastJSONResponse(post_to_dict(resp.post), headers=headers)
 
 @router.put("/{post_id}", response_model=PostOut)
 async def update_post(
@@ -146,30 +377,24 @@ async def update_post(
 ):
     user_data = await validate_jwt_token(token)
     stub = get_post_service_stub()
+    # Обновляются только поля, присутствующие в теле запроса; явный null очищает поле
+    fields = sorted(post.model_fields_set)
+    if not fields:
+        # Пустая маска post‑сервис трактует по‑старому (is_private перезаписывается)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update")
     grpc_post = post_pb2.Post(
         id=post_id,
         title=post.title or "",
         description=post.description or "",
         creator_id=user_data["id"],
-        created_at="",
-        updated_at="",
-        is_private=post.is_private if post.is_private is not None else False,
+        is_private=bool(post.is_private),
         tags=post.tags or []
     )
-    req = post_pb2.UpdatePostRequest(post=grpc_post)
-    resp = stub.UpdatePost(req)
+    req = post_pb2.UpdatePostRequest(post=grpc_post, update_mask=FieldMask(paths=fields))
+    resp = await call_post_service(stub.UpdatePost, req)
     if resp.error:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=resp.error)
-    return PostOut(
-        id=resp.post.id,
-        title=resp.post.title,
-        description=resp.post.description,
-        creator_id=resp.post.creator_id,
-        created_at=resp.post.created_at,
-        updated_at=resp.post.updated_at,
-        is_private=resp.post.is_private,
-        tags=resp.post.tags
-    )
+    return remember_write(FastJSONResponse(post_to_dict(resp.post)))
 
 @router.delete("/{post_id}", response_model=PostOut)
 async def delete_post(
@@ -179,16 +404,7 @@ async def delete_post(
     user_data = await validate_jwt_token(token)
     stub = get_post_service_stub()
     req = post_pb2.DeletePostRequest(id=post_id, user_id=user_data["id"])
-    resp = stub.DeletePost(req)
+    resp = await call_post_service(stub.DeletePost, req)
     if resp.error:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=resp.error)
-    return PostOut(
-        id=resp.post.id,
-        title=resp.post.title,
-        description=resp.post.description,
-        creator_id=resp.post.creator_id,
-        created_at=resp.post.created_at,
-        updated_at=resp.post.updated_at,
-        is_private=resp.post.is_private,
-        tags=resp.post.tags
-    )
+    return remember_write(FastJSONResponse(post_to_dict(resp.post)))
@@ -0,0 +1,55 @@
+import math
+import os
+import time
+from contextvars import ContextVar
+from http.cookies import CookieError, SimpleCookie
+
+# Read-your-writes без состояния в процессах: после записи время последней записи автора
+# (unix-время) сохраняется у клиента в cookie, а с каждым вызовом post‑сервиса передаётся
+# в метаданных. Пока окно не истекло, post‑сервис читает из основной БД, а не из реплик,
+# на каком бы экземпляре API и post‑сервиса ни обрабатывался следующий запрос.
+# Окно должно совпадать с READ_YOUR_WRITES_WINDOW post‑сервиса.
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", 5))
+LAST_WRITE_COOKIE = "last_write_at"
+LAST_WRITE_METADATA = "x-last-write-at"
+
+_last_write_at = ContextVar("last_write_at", default=None)
+
+def parse_last_write(cookie_header: str):
+    try:
+        morsel = SimpleCookie(cookie_header).get(LAST_WRITE_COOKIE)
+        return float(morsel.value) if morsel else None
+    except (CookieError, ValueError):
+        return None
+
+# Метка из cookie запроса доступна вызовам post‑сервиса через last_write_metadata()
+class ReadYourWritesMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cookie_header = "; ".join(
+            value.decode("latin-1") for key, value in scope["headers"] if key == b"cookie"
+        )
+        token = _last_write_at.set(parse_last_write(cookie_header) if cookie_header else None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _last_write_at.reset(token)
+
+# Вызывается после успешной записи: cookie живёт ровно окно read-your-writes
+def remember_write(response):
+    now = time.time()
+    _last_write_at.set(now)
+    response.set_cookie(
+        LAST_WRITE_COOKIE, f"{now:.6f}",
+        max_age=max(1, math.ceil(READ_YOUR_WRITES_WINDOW)), httponly=True, samesite="lax"
+    )
+    return response
+
+def last_write_metadata():
+    value = _last_write_at.get()
+    return ((LAST_WRITE_METADATA, f"{value:.6f}"),) if value is not None else None
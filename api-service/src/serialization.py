@@ -0,0 +1,65 @@
+import orjson
+from fastapi import Response
+from metrics import track_stage
+
+# Быстрый путь сериализации: protobuf Post -> dict -> JSON-байты через orjson,
+# минуя построение PostOut, повторную валидацию response_model и stdlib json.
+# Схема в OpenAPI по-прежнему описывается через response_model эндпоинта.
+def post_to_dict(p) -> dict:
+    return {
+        "id": p.id,
+        "title": p.title,
+        "description": p.description,
+        "creator_id": p.creator_id,
+        "created_at": p.created_at,
+        "updated_at": p.updated_at,
+        "is_private": p.is_private,
+        "tags": list(p.tags),
+    }
+
+def post_list_to_dict(posts, total: int, next_cursor: str = "", total_kind: str = "exact", has_next: bool = False) -> dict:
+    return {
+        "posts": [post_to_dict(p) for p in posts],
+        "total": None if total_kind == "none" else total,
+        "total_kind": total_kind,
+        "has_next": has_next,
+        "next_cursor": next_cursor or None,
+    }
+
+def search_hits_to_dict(hits, next_cursor: str = "", truncated: bool = False) -> dict:
+    return {
+        "hits": [
+            {
+                "post": post_to_dict(h.post),
+                "rank": h.rank,
+                "title_highlight": h.title_highlight,
+                "description_highlight": h.description_highlight,
+            }
+            for h in hits
+        ],
+        "next_cursor": next_cursor or None,
+        "truncated": truncated,
+    }
+
+# NDJSON (application/x-ndjson): одна строка JSON на пост
+def posts_to_ndjson(posts) -> bytes:
+    return b"".join(orjson.dumps(post_to_dict(p)) + b"\n" for p in posts)
+
+def batch_results_to_dict(results) -> dict:
+    return {
+        "results": [
+            {
+                "id": r.id or None,
+                "post": None if r.error else post_to_dict(r.post),
+                "error": r.error or None,
+            }
+            for r in results
+        ]
+    }
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        with track_stage("encode"):
+            return orjson.dumps(content)
@@ -0,0 +1,34 @@
+import asyncio
+
+# Объединение одинаковых одновременных вызовов (single-flight).
+# Пока первый вызов с данным ключом выполняется, остальные вызовы с тем же
+# ключом ждут его результат (или исключение), а не идут в upstream повторно.
+# После завершения ключ освобождается — результат здесь не кэшируется.
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _forget(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # Помечаем исключение как полученное, даже если ждать было некому
+            future.exception()
+
+    async def do(self, key, fn):
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+        else:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        # shield: отмена одного ожидающего (например, клиент отключился)
+        # не отменяет общий вызов для остальных
+        return await asyncio.shield(future)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,119 @@
+import asyncio
+import time
+import pytest
+import jwt
+import httpx
+from fastapi import HTTPException, status
+from unittest.mock import AsyncMock, MagicMock
+
+from src import auth
+from src.auth import TokenCache, validate_jwt_token
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    auth.token_cache.clear()
+    yield
+    auth.token_cache.clear()
+
+def make_token(claims, secret=auth.JWT_SECRET_KEY):
+    return jwt.encode(claims, secret, algorithm=auth.JWT_ALGORITHM)
+
+def dummy_client(monkeypatch, get):
+    dummy_async_client = MagicMock()
+    dummy_async_client.get = AsyncMock(side_effect=get)
+    monkeypatch.setattr("src.auth.get_http_client", lambda name="user-service": dummy_async_client)
+    return dummy_async_client
+
+@pytest.mark.asyncio
+async def test_validate_jwt_token_success(monkeypatch):
+    monkeypatch.setattr("src.auth.JWT_LOCAL_VERIFY", False)
+    dummy_response = MagicMock()
+    dummy_response.raise_for_status = MagicMock()
+    dummy_response.json = MagicMock(return_value={"id": 123})
+    
+    async def dummy_get(*args, **kwargs):
+        return dummy_response
+    
+    dummy_client(monkeypatch, dummy_get)
+    
+    token = "dummy_token"
+    result = await validate_jwt_token(token)
+    assert result == {"id": 123}
+
+@pytest.mark.asyncio
+async def test_validate_jwt_token_failure(monkeypatch):
+    monkeypatch.setattr("src.auth.JWT_LOCAL_VERIFY", False)
+    async def dummy_get(*args, **kwargs):
+        raise httpx.HTTPError("Invalid token")
+    
+    dummy_client(monkeypatch, dummy_get)
+    
+    token = "invalid_token"
+    with pytest.raises(HTTPException) as exc_info:
+        await validate_jwt_token(token)
+    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+@pytest.mark.asyncio
+async def test_validate_jwt_token_local(monkeypatch):
+    """Токен с uid проверяется локально, без запроса в user-сервис."""
+    client = dummy_client(monkeypatch, AsyncMock())
+    token = make_token({"sub": "user1", "uid": 7, "exp": int(time.time()) + 60})
+
+    result = await validate_jwt_token(token)
+    assert result == {"id": 7, "login": "user1"}
+    client.get.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_validate_jwt_token_local_bad_signature(monkeypatch):
+    client = dummy_client(monkeypatch, AsyncMock())
+    token = make_token({"sub": "user1", "uid": 7}, secret="another_secret")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await validate_jwt_token(token)
+    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+    client.get.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_validate_jwt_token_cached(monkeypatch):
+    """Токен без uid проверяется через user-сервис один раз, дальше — из кэша."""
+    dummy_response = MagicMock()
+    dummy_response.json = MagicMock(return_value={"id": 123})
+    client = dummy_client(monkeypatch, AsyncMock(return_value=dummy_response))
+    token = make_token({"sub": "user1", "exp": int(time.time()) + 60})
+
+    assert await validate_jwt_token(token) == {"id": 123}
+    assert await validate_jwt_token(token) == {"id": 123}
+    assert client.get.call_count == 1
+    assert auth.token_cache.stats()["hits"] == 1
+    assert auth.token_cache.stats()["misses"] == 1
+
+def test_token_cache_respects_exp_and_size():
+    cache = TokenCache(maxsize=2, ttl=60)
+    cache.set("expired", {"id": 1}, exp=time.time() - 1)
+    assert cache.get("expired") is None
+
+    cache.set("a", {"id": 1})
+    cache.set("b", {"id": 2})
+    assert cache.get("a") == {"id": 1}
+    cache.set("c", {"id": 3})
+    # "b" использовался давнее всех и был вытеснен
+    assert cache.get("b") is None
+    assert cache.get("a") == {"id": 1}
+    assert cache.get("c") == {"id": 3}
+
+@pytest.mark.asyncio
+async def test_concurrent_validations_share_profile_request(monkeypatch):
+    """N параллельных проверок одного токена дают один запрос к user-сервису."""
+    dummy_response = MagicMock()
+    dummy_response.json = MagicMock(return_value={"id": 123})
+
+    async def slow_get(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return dummy_response
+
+    client = dummy_client(monkeypatch, slow_get)
+    token = make_token({"sub": "user1", "exp": int(time.time()) + 60})
+
+    results = await asyncio.gather(*(validate_jwt_token(token) for _ in range(5)))
+    assert all(result == {"id": 123} for result in results)
+    assert client.get.call_count == 1
@@ -0,0 +1,53 @@
+import httpx
+import pytest
+from fastapi import HTTPException, status
+from unittest.mock import AsyncMock, MagicMock
+
+from src.authors import AuthorLoader
+
+def dummy_client(monkeypatch, users):
+    async def dummy_get(url, params=None, headers=None):
+        response = MagicMock()
+        response.raise_for_status = MagicMock()
+        ids = [int(value) for value in params["ids"].split(",")]
+        response.json = MagicMock(return_value={"users": [users[i] for i in ids if i in users]})
+        return response
+
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=dummy_get)
+    monkeypatch.setattr("src.authors.get_http_client", lambda name="user-service": client)
+    return client
+
+@pytest.mark.asyncio
+async def test_load_many_batches_and_memoizes(monkeypatch):
+    """Уникальные id уходят одним запросом, повторная загрузка берётся из памяти загрузчика."""
+    users = {1: {"id": 1, "login": "alice"}, 2: {"id": 2, "login": "bob"}}
+    client = dummy_client(monkeypatch, users)
+    loader = AuthorLoader("token")
+
+    authors = await loader.load_many([2, 1, 2, 3])
+    assert authors == {2: users[2], 1: users[1], 3: None}
+    assert client.get.await_count == 1
+    assert client.get.call_args.kwargs["params"] == {"ids": "1,2,3"}
+    assert client.get.call_args.kwargs["headers"] == {"Authorization": "Bearer token"}
+
+    await loader.load_many([1, 3])
+    assert client.get.await_count == 1
+
+@pytest.mark.asyncio
+async def test_load_many_splits_large_batches(monkeypatch):
+    """Больше USER_BATCH_SIZE id делятся на несколько запросов."""
+    users = {i: {"id": i, "login": f"user{i}"} for i in range(250)}
+    client = dummy_client(monkeypatch, users)
+    authors = await AuthorLoader("token").load_many(list(range(250)))
+    assert len(authors) == 250 and all(authors[i]["id"] == i for i in range(250))
+    assert client.get.await_count == 3
+
+@pytest.mark.asyncio
+async def test_load_many_user_service_unavailable(monkeypatch):
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=httpx.ConnectError("down"))
+    monkeypatch.setattr("src.authors.get_http_client", lambda name="user-service": client)
+    with pytest.raises(HTTPException) as exc_info:
+        await AuthorLoader("token").load_many([1])
+    assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
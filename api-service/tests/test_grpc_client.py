@@ -0,0 +1,15 @@
+import pytest
+
+from src.grpc_client import ChannelPool
+
+@pytest.mark.asyncio
+async def test_channel_pool_round_robin():
+    """Каналы создаются один раз, стабы раздаются по кругу."""
+    pool = ChannelPool("localhost:1", size=2)
+    stubs = [pool.get_stub() for _ in range(4)]
+    assert len(pool._channels) == 2
+    assert stubs[0] is stubs[2]
+    assert stubs[1] is stubs[3]
+    assert stubs[0] is not stubs[1]
+    await pool.close()
+    assert pool._channels == []
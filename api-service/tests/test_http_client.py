@@ -0,0 +1,35 @@
+import pytest
+import httpx
+
+from src import http_client
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    http_client._clients.clear()
+    yield
+    http_client._clients.clear()
+
+def test_get_http_client_reuses_instance():
+    """Один и тот же клиент переиспользуется между вызовами."""
+    first = http_client.get_http_client("user-service")
+    second = http_client.get_http_client("user-service")
+    assert first is second
+    assert isinstance(first, httpx.AsyncClient)
+
+def test_upstream_settings_from_env(monkeypatch):
+    """Лимиты пула и таймауты берутся из переменных окружения upstream-а."""
+    monkeypatch.setenv("USER_SERVICE_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("USER_SERVICE_READ_TIMEOUT", "1.5")
+    settings = http_client.upstream_settings("user-service")
+    assert settings["max_connections"] == 7
+    assert settings["read_timeout"] == 1.5
+    client = http_client._build_client("user-service")
+    assert client.timeout.read == 1.5
+
+@pytest.mark.asyncio
+async def test_closed_client_is_recreated():
+    """После закрытия (shutdown) клиент создаётся заново."""
+    client = http_client.get_http_client("user-service")
+    await http_client.close_http_clients()
+    assert client.is_closed
+    assert http_client.get_http_client("user-service") is not client
@@ -1,13 +1,15 @@
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
+import httpx
 from src.main import app
 
 client = TestClient(app)
 
+@patch("src.main.PROXY_STREAMING", False)
 @patch("httpx.AsyncClient.request")
 def test_proxy_get(mock_request):
-    """Проверяем, что GET-запрос проксируется корректно."""
+    """Проверяем, что GET-запрос проксируется корректно (режим с буферизацией)."""
     # Настраиваем mock-объект (имитируем ответ от user-service)
     mock_response = MagicMock()
     mock_response.content = b"Hello from user-service"
@@ -28,9 +30,10 @@ def test_proxy_get(mock_request):
     assert args[0] == "GET"
     assert "http://user-service/test" in args[1]
 
+@patch("src.main.PROXY_STREAMING", False)
 @patch("httpx.AsyncClient.request")
 def test_proxy_post(mock_request):
-    """Проверяем, что POST-запрос проксируется корректно."""
+    """Проверяем, что POST-запрос проксируется корректно (режим с буферизацией)."""
     mock_response = MagicMock()
     mock_response.content = b"Created"
     mock_response.status_code = 201
@@ -51,3 +54,59 @@ def test_proxy_post(mock_request):
     assert "http://user-service/create" in args[1]
     # При желании можно проверить передаваемое тело (kwargs["content"])
     assert b'"hello":"world"' in kwargs["content"]
+
+class ChunkedStream(httpx.AsyncByteStream):
+    """Имитация потокового тела ответа upstream-а."""
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+@patch("httpx.AsyncClient.send")
+def test_proxy_streaming_get(mock_send):
+    """В потоковом режиме ответ upstream-а отдаётся как есть, без hop-by-hop заголовков."""
+    captured = {}
+
+    async def fake_send(request, stream=False):
+        captured["request"] = request
+        captured["stream"] = stream
+        return httpx.Response(
+            200,
+            headers={"X-Upstream": "1", "Connection": "keep-alive", "Keep-Alive": "timeout=5"},
+            stream=ChunkedStream([b"Hello ", b"from ", b"user-service"]),
+        )
+
+    mock_send.side_effect = fake_send
+
+    response = client.get("/test", headers={"Connection": "close", "X-Custom": "value"})
+
+    assert response.status_code == 200
+    assert response.text == "Hello from user-service"
+    assert response.headers["x-upstream"] == "1"
+    assert "keep-alive" not in response.headers
+    assert captured["stream"] is True
+    request = captured["request"]
+    assert request.method == "GET"
+    assert str(request.url) == "http://user-service/test"
+    assert request.headers["x-custom"] == "value"
+    assert request.headers.get("connection") != "close"
+
+@patch("httpx.AsyncClient.send")
+def test_proxy_streaming_post_body(mock_send):
+    """Тело POST-запроса пробрасывается в upstream потоком."""
+    captured = {}
+
+    async def fake_send(request, stream=False):
+        captured["body"] = await request.aread()
+        return httpx.Response(201, stream=ChunkedStream([b"Created"]))
+
+    mock_send.side_effect = fake_send
+
+    payload = b"x" * (256 * 1024)
+    response = client.post("/create", content=payload, headers={"Content-Type": "application/octet-stream"})
+
+    assert response.status_code == 201
+    assert response.text == "Created"
+    assert captured["body"] == payload
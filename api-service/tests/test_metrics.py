@@ -0,0 +1,59 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+from types import SimpleNamespace
+from prometheus_client import REGISTRY
+
+# Модуль метрик импортируется так же, как его импортирует приложение (из src в sys.path),
+# иначе метрики были бы зарегистрированы повторно
+from metrics import MetricsMiddleware
+from src.main import app as main_app
+from src.posts import router
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+app.include_router(router, prefix="/posts")
+client = TestClient(app)
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def dummy_get_post(request, **kwargs):
+    return SimpleNamespace(error="", post=SimpleNamespace(
+        id=request.id,
+        title="Test Post",
+        description="",
+        creator_id=request.user_id,
+        created_at="2023-01-01T00:00:00",
+        updated_at="2023-01-01T00:00:00",
+        is_private=False,
+        tags=[],
+    ))
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_stage_metrics_by_route(mock_get_stub, mock_validate_token):
+    """Этапы запроса учитываются с шаблоном маршрута, а не с конкретным путём."""
+    mock_validate_token.return_value = {"id": 123}
+    dummy_stub = MagicMock()
+    dummy_stub.GetPost = AsyncMock(side_effect=dummy_get_post)
+    mock_get_stub.return_value = dummy_stub
+
+    route = "/posts/{post_id}"
+    before_grpc = sample("api_request_stage_duration_seconds_count", route=route, stage="grpc")
+    before_encode = sample("api_request_stage_duration_seconds_count", route=route, stage="encode")
+    before_request = sample("api_request_duration_seconds_count", method="GET", route=route, status="200")
+
+    response = client.get("/posts/42", headers={"Authorization": "Bearer dummy_token"})
+    assert response.status_code == 200
+
+    assert sample("api_request_stage_duration_seconds_count", route=route, stage="grpc") == before_grpc + 1
+    assert sample("api_request_stage_duration_seconds_count", route=route, stage="encode") == before_encode + 1
+    assert sample("api_request_duration_seconds_count", method="GET", route=route, status="200") == before_request + 1
+    assert sample("api_requests_in_flight") == 0
+
+def test_metrics_endpoint():
+    response = TestClient(main_app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "api_requests_in_flight" in response.text
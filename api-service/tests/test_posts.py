@@ -1,14 +1,17 @@
+import asyncio
 import pytest
-from fastapi import HTTPException, status, FastAPI
+from fastapi import status, FastAPI
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, MagicMock, patch
 from types import SimpleNamespace
-import httpx
+import json
+import grpc
+import post_pb2
 
 from src.posts import (
     router,
-    validate_jwt_token,
     get_post_service_stub,
+    get_post_shared,
     PostCreate,
     PostUpdate,
 )
@@ -17,42 +20,7 @@ app = FastAPI()
 app.include_router(router, prefix="/posts")
 client = TestClient(app)
 
-@pytest.mark.asyncio
-async def test_validate_jwt_token_success(monkeypatch):
-    dummy_response = MagicMock()
-    dummy_response.raise_for_status = MagicMock()
-    dummy_response.json = MagicMock(return_value={"id": 123})
-    
-    async def dummy_get(*args, **kwargs):
-        return dummy_response
-    
-    dummy_async_client = MagicMock()
-    dummy_async_client.__aenter__.return_value = dummy_async_client
-    dummy_async_client.get = AsyncMock(side_effect=dummy_get)
-    
-    monkeypatch.setattr("src.posts.httpx.AsyncClient", lambda: dummy_async_client)
-    
-    token = "dummy_token"
-    result = await validate_jwt_token(token)
-    assert result == {"id": 123}
-
-@pytest.mark.asyncio
-async def test_validate_jwt_token_failure(monkeypatch):
-    async def dummy_get(*args, **kwargs):
-        raise httpx.HTTPError("Invalid token")
-    
-    dummy_async_client = MagicMock()
-    dummy_async_client.__aenter__.return_value = dummy_async_client
-    dummy_async_client.get = AsyncMock(side_effect=dummy_get)
-    
-    monkeypatch.setattr("src.posts.httpx.AsyncClient", lambda: dummy_async_client)
-    
-    token = "invalid_token"
-    with pytest.raises(HTTPException) as exc_info:
-        await validate_jwt_token(token)
-    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
-
-def dummy_create_post(request):
+def dummy_create_post(request, **kwargs):
     dummy_post = SimpleNamespace(
          id="1",
          title=request.post.title,
@@ -71,7 +39,7 @@ def test_create_post_success(mock_get_stub, mock_validate_token):
     mock_validate_token.return_value = {"id": 123}
     
     dummy_stub = MagicMock()
-    dummy_stub.CreatePost = MagicMock(side_effect=dummy_create_post)
+    dummy_stub.CreatePost = AsyncMock(side_effect=dummy_create_post)
     mock_get_stub.return_value = dummy_stub
     
     post_data = {
@@ -87,7 +55,7 @@ def test_create_post_success(mock_get_stub, mock_validate_token):
     assert data["title"] == "Test Post"
     assert data["creator_id"] == 123
 
-def dummy_list_posts(request):
+def dummy_list_posts(request, **kwargs):
     dummy_post = SimpleNamespace(
          id="1",
          title="Test Post",
@@ -98,7 +66,7 @@ def dummy_list_posts(request):
          is_private=False,
          tags=["test", "post"],
     )
-    return SimpleNamespace(error="", posts=[dummy_post], total=1)
+    return SimpleNamespace(error="", posts=[dummy_post], total=1, next_cursor="", count_kind=0, has_next=False)
 
 @patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
 @patch("src.posts.get_post_service_stub")
@@ -106,7 +74,7 @@ def test_list_posts_success(mock_get_stub, mock_validate_token):
     mock_validate_token.return_value = {"id": 123}
     
     dummy_stub = MagicMock()
-    dummy_stub.ListPosts = MagicMock(side_effect=dummy_list_posts)
+    dummy_stub.ListPosts = AsyncMock(side_effect=dummy_list_posts)
     mock_get_stub.return_value = dummy_stub
     
     headers = {"Authorization": "Bearer dummy_token"}
@@ -117,7 +85,22 @@ def test_list_posts_success(mock_get_stub, mock_validate_token):
     assert len(data["posts"]) == 1
     assert data["posts"][0]["title"] == "Test Post"
 
-def dummy_get_post(request):
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_list_posts_validates_page_size(mock_get_stub, mock_validate_token):
+    """Размер страницы и номер страницы проверяются до вызова post‑сервиса."""
+    mock_validate_token.return_value = {"id": 123}
+    dummy_stub = MagicMock()
+    dummy_stub.ListPosts = AsyncMock(side_effect=dummy_list_posts)
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    for query in ("size=0", "size=-1", "size=101", "page=0", "size=0&cursor="):
+        response = client.get(f"/posts?{query}", headers=headers)
+        assert response.status_code == 422, query
+    dummy_stub.ListPosts.assert_not_called()
+
+def dummy_get_post(request, **kwargs):
     dummy_post = SimpleNamespace(
          id=request.id,
          title="Test Post",
@@ -136,7 +119,7 @@ def test_get_post_success(mock_get_stub, mock_validate_token):
     mock_validate_token.return_value = {"id": 123}
     
     dummy_stub = MagicMock()
-    dummy_stub.GetPost = MagicMock(side_effect=dummy_get_post)
+    dummy_stub.GetPost = AsyncMock(side_effect=dummy_get_post)
     mock_get_stub.return_value = dummy_stub
     
     headers = {"Authorization": "Bearer dummy_token"}
@@ -146,7 +129,7 @@ def test_get_post_success(mock_get_stub, mock_validate_token):
     assert data["id"] == "1"
     assert data["title"] == "Test Post"
 
-def dummy_update_post(request):
+def dummy_update_post(request, **kwargs):
     dummy_post = SimpleNamespace(
          id=request.post.id,
          title=request.post.title if request.post.title else "Old Title",
@@ -165,7 +148,7 @@ def test_update_post_success(mock_get_stub, mock_validate_token):
     mock_validate_token.return_value = {"id": 123}
     
     dummy_stub = MagicMock()
-    dummy_stub.UpdatePost = MagicMock(side_effect=dummy_update_post)
+    dummy_stub.UpdatePost = AsyncMock(side_effect=dummy_update_post)
     mock_get_stub.return_value = dummy_stub
     
     update_data = {
@@ -181,7 +164,7 @@ def test_update_post_success(mock_get_stub, mock_validate_token):
     assert data["title"] == "Updated Title"
     assert data["is_private"] is True
 
-def dummy_delete_post(request):
+def dummy_delete_post(request, **kwargs):
     dummy_post = SimpleNamespace(
          id=request.id,
          title="Deleted Post",
@@ -200,7 +183,7 @@ def test_delete_post_success(mock_get_stub, mock_validate_token):
     mock_validate_token.return_value = {"id": 123}
     
     dummy_stub = MagicMock()
-    dummy_stub.DeletePost = MagicMock(side_effect=dummy_delete_post)
+    dummy_stub.DeletePost = AsyncMock(side_effect=dummy_delete_post)
     mock_get_stub.return_value = dummy_stub
     
     headers = {"Authorization": "Bearer dummy_token"}
@@ -208,3 +191,449 @@ def test_delete_post_success(mock_get_stub, mock_validate_token):
     assert response.status_code == 200
     data = response.json()
     assert data["title"] == "Deleted Post"
+
+@pytest.mark.parametrize("code, expected_status", [
+    (grpc.StatusCode.DEADLINE_EXCEEDED, status.HTTP_504_GATEWAY_TIMEOUT),
+    (grpc.StatusCode.UNAVAILABLE, status.HTTP_503_SERVICE_UNAVAILABLE),
+])
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_get_post_rpc_error(mock_get_stub, mock_validate_token, code, expected_status):
+    mock_validate_token.return_value = {"id": 123}
+
+    dummy_stub = MagicMock()
+    dummy_stub.GetPost = AsyncMock(side_effect=grpc.aio.AioRpcError(
+        code, grpc.aio.Metadata(), grpc.aio.Metadata(), details="boom"
+    ))
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.get("/posts/1", headers=headers)
+    assert response.status_code == expected_status
+
+def private_post_stub(owner_id: int):
+    # GetPost как в post-сервисе: приватный пост виден только автору
+    async def get_post(request, **kwargs):
+        await asyncio.sleep(0.01)
+        if request.user_id != owner_id:
+            return post_pb2.PostResponse(error="Unauthorized")
+        post = dummy_get_post(request).post
+        return post_pb2.PostResponse(post=post_pb2.Post(**{**vars(post), "is_private": True}))
+
+    stub = MagicMock()
+    stub.GetPost = AsyncMock(side_effect=get_post)
+    return stub
+
+@pytest.mark.asyncio
+async def test_get_post_coalesced_across_users():
+    """Одновременные запросы одного поста разными пользователями дают один вызов GetPost."""
+    async def get_post(request, **kwargs):
+        await asyncio.sleep(0.01)
+        return dummy_get_post(request)
+
+    stub = MagicMock()
+    stub.GetPost = AsyncMock(side_effect=get_post)
+    requests = [post_pb2.GetPostRequest(id="1", user_id=user_id) for user_id in range(10)]
+    results = await asyncio.gather(*(get_post_shared(stub, req) for req in requests))
+    assert stub.GetPost.call_count == 1
+    assert all(resp.post.id == "1" for resp in results)
+
+@pytest.mark.asyncio
+async def test_get_post_coalesced_private_post():
+    """Доступ к общему результату проверяется для каждого: чужой приватный пост не отдаётся."""
+    # Первым пришёл автор: остальные получают Unauthorized без повторного вызова
+    stub = private_post_stub(owner_id=7)
+    results = await asyncio.gather(
+        *(get_post_shared(stub, post_pb2.GetPostRequest(id="1", user_id=user_id)) for user_id in (7, 8, 9))
+    )
+    assert [resp.error for resp in results] == ["", "Unauthorized", "Unauthorized"]
+    assert stub.GetPost.call_count == 1
+
+    # Первый получил Unauthorized: автор запрашивает пост сам
+    stub = private_post_stub(owner_id=7)
+    results = await asyncio.gather(
+        *(get_post_shared(stub, post_pb2.GetPostRequest(id="1", user_id=user_id)) for user_id in (8, 7, 9))
+    )
+    assert [resp.error for resp in results] == ["Unauthorized", "", "Unauthorized"]
+    assert results[1].post.creator_id == 7
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_get_post_etag(mock_get_stub, mock_validate_token):
+    """Ответ содержит ETag; повторный запрос с If-None-Match даёт 304 без загрузки поста."""
+    mock_validate_token.return_value = {"id": 123}
+
+    dummy_stub = MagicMock()
+    dummy_stub.GetPost = AsyncMock(side_effect=dummy_get_post)
+    dummy_stub.GetPostVersion = AsyncMock(return_value=SimpleNamespace(
+        error="", id="1", updated_at="2023-01-01T00:00:00", is_private=False
+    ))
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.get("/posts/1", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "public, no-cache"
+    dummy_stub.GetPostVersion.assert_not_called()
+
+    response = client.get("/posts/1", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert dummy_stub.GetPost.call_count == 1
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_get_post_etag_changed(mock_get_stub, mock_validate_token):
+    """Если пост изменился, возвращается полный ответ с новым ETag."""
+    mock_validate_token.return_value = {"id": 123}
+
+    dummy_stub = MagicMock()
+    dummy_stub.GetPost = AsyncMock(side_effect=dummy_get_post)
+    dummy_stub.GetPostVersion = AsyncMock(return_value=SimpleNamespace(
+        error="", id="1", updated_at="2023-01-01T00:00:00", is_private=False
+    ))
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token", "If-None-Match": '"stale"'}
+    response = client.get("/posts/1", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["etag"] != '"stale"'
+    assert response.json()["id"] == "1"
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_list_posts_etag(mock_get_stub, mock_validate_token):
+    mock_validate_token.return_value = {"id": 123}
+
+    dummy_stub = MagicMock()
+    dummy_stub.ListPosts = AsyncMock(side_effect=dummy_list_posts)
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.get("/posts", headers=headers)
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    response = client.get("/posts", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+def dummy_batch_get_posts(request, **kwargs):
+    results = []
+    for post_id in request.ids:
+        if post_id == "404":
+            results.append(SimpleNamespace(id=post_id, post=None, error="Post not found"))
+            continue
+        results.append(SimpleNamespace(id=post_id, error="", post=SimpleNamespace(
+            id=post_id,
+            title=f"Post {post_id}",
+            description="",
+            creator_id=request.user_id,
+            created_at="2023-01-01T00:00:00",
+            updated_at="2023-01-01T00:00:00",
+            is_private=False,
+            tags=[],
+        )))
+    return SimpleNamespace(error="", results=results)
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_batch_get_posts(mock_get_stub, mock_validate_token):
+    """Ошибка одного элемента не ломает весь пакет."""
+    mock_validate_token.return_value = {"id": 123}
+
+    dummy_stub = MagicMock()
+    dummy_stub.BatchGetPosts = AsyncMock(side_effect=dummy_batch_get_posts)
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.post("/posts:batchGet", json={"ids": ["1", "404", "2"]}, headers=headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["id"] for r in results] == ["1", "404", "2"]
+    assert results[0]["post"]["title"] == "Post 1"
+    assert results[1] == {"id": "404", "post": None, "error": "Post not found"}
+    dummy_stub.BatchGetPosts.assert_called_once()
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_batch_get_posts_too_large(mock_get_stub, mock_validate_token):
+    mock_validate_token.return_value = {"id": 123}
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.post("/posts:batchGet", json={"ids": [str(i) for i in range(101)]}, headers=headers)
+    assert response.status_code == 422
+    mock_get_stub.assert_not_called()
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_batch_create_posts(mock_get_stub, mock_validate_token):
+    mock_validate_token.return_value = {"id": 123}
+
+    def dummy_batch_create(request, **kwargs):
+        results = []
+        for i, p in enumerate(request.posts):
+            results.append(SimpleNamespace(id=str(i + 1), error="", post=SimpleNamespace(
+                id=str(i + 1),
+                title=p.title,
+                description=p.description,
+                creator_id=p.creator_id,
+                created_at="2023-01-01T00:00:00",
+                updated_at="2023-01-01T00:00:00",
+                is_private=p.is_private,
+                tags=p.tags,
+            )))
+        return SimpleNamespace(error="", results=results)
+
+    dummy_stub = MagicMock()
+    dummy_stub.BatchCreatePosts = AsyncMock(side_effect=dummy_batch_create)
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    payload = {"posts": [{"title": "First"}, {"title": "Second", "tags": ["a"]}]}
+    response = client.post("/posts:batchCreate", json=payload, headers=headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["post"]["title"] for r in results] == ["First", "Second"]
+    assert all(r["post"]["creator_id"] == 123 for r in results)
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_list_posts_cursor(mock_get_stub, mock_validate_token):
+    """Курсор передаётся в post-сервис, next_cursor возвращается клиенту."""
+    mock_validate_token.return_value = {"id": 123}
+    requests = []
+
+    def dummy_list(request, **kwargs):
+        requests.append(request)
+        resp = dummy_list_posts(request)
+        resp.next_cursor = "next-page"
+        return resp
+
+    dummy_stub = MagicMock()
+    dummy_stub.ListPosts = AsyncMock(side_effect=dummy_list)
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.get("/posts?cursor=", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] == "next-page"
+    assert requests[0].HasField("cursor")
+    assert requests[0].cursor == ""
+
+    response = client.get("/posts?cursor=next-page", headers=headers)
+    assert requests[1].cursor == "next-page"
+
+    # Без параметра cursor используется прежняя пагинация по page
+    response = client.get("/posts?page=2", headers=headers)
+    assert not requests[2].HasField("cursor")
+    assert requests[2].page == 2
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_list_posts_tags_filter(mock_get_stub, mock_validate_token):
+    """Теги и режим совпадения передаются в post-сервис."""
+    mock_validate_token.return_value = {"id": 123}
+    requests = []
+
+    def dummy_list(request, **kwargs):
+        requests.append(request)
+        return dummy_list_posts(request)
+
+    dummy_stub = MagicMock()
+    dummy_stub.ListPosts = AsyncMock(side_effect=dummy_list)
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.get("/posts?tags=python, grpc,&match=all", headers=headers)
+    assert response.status_code == 200
+    assert list(requests[0].tags) == ["python", "grpc"]
+    assert requests[0].tag_match == post_pb2.TAG_MATCH_ALL
+
+    response = client.get("/posts?tags=python", headers=headers)
+    assert requests[1].tag_match == post_pb2.TAG_MATCH_ANY
+
+    response = client.get("/posts?tags=python&match=some", headers=headers)
+    assert response.status_code == 422
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_list_posts_count_mode(mock_get_stub, mock_validate_token):
+    """Способ подсчёта передаётся в post-сервис, ответ сообщает, как посчитан total."""
+    mock_validate_token.return_value = {"id": 123}
+    requests = []
+
+    def dummy_list(request, **kwargs):
+        requests.append(request)
+        resp = dummy_list_posts(request)
+        resp.count_kind = request.count_mode
+        resp.total = 0 if request.count_mode == post_pb2.COUNT_NONE else 42
+        resp.has_next = True
+        return resp
+
+    dummy_stub = MagicMock()
+    dummy_stub.ListPosts = AsyncMock(side_effect=dummy_list)
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.get("/posts", headers=headers)
+    assert requests[0].count_mode == post_pb2.COUNT_EXACT
+    assert response.json()["total_kind"] == "exact"
+
+    response = client.get("/posts?count=estimated", headers=headers)
+    assert requests[1].count_mode == post_pb2.COUNT_ESTIMATED
+    data = response.json()
+    assert data["total"] == 42
+    assert data["total_kind"] == "estimated"
+
+    response = client.get("/posts?count=none", headers=headers)
+    data = response.json()
+    assert data["total"] is None
+    assert data["total_kind"] == "none"
+    assert data["has_next"] is True
+
+    response = client.get("/posts?count=approximate", headers=headers)
+    assert response.status_code == 422
+
+class FakeStreamCall:
+    """Заглушка потокового вызова grpc.aio: асинхронный итератор с cancel()."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.cancelled = False
+
+    async def __aiter__(self):
+        if self.error:
+            raise self.error
+        for chunk in self.chunks:
+            yield chunk
+
+    def cancel(self):
+        self.cancelled = True
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_export_posts_ndjson(mock_get_stub, mock_validate_token):
+    """Выгрузка отдаётся построчно в NDJSON, фильтры передаются в StreamPosts."""
+    mock_validate_token.return_value = {"id": 123}
+    posts = [
+        post_pb2.Post(id=str(i), title=f"Post {i}", creator_id=7, created_at="c", updated_at="u")
+        for i in range(3)
+    ]
+    call = FakeStreamCall([post_pb2.PostChunk(posts=posts[:2]), post_pb2.PostChunk(posts=posts[2:])])
+    dummy_stub = MagicMock()
+    dummy_stub.StreamPosts = MagicMock(return_value=call)
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.get("/posts:export?creator_id=7&tags=a", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ["0", "1", "2"]
+    request = dummy_stub.StreamPosts.call_args.args[0]
+    assert request.user_id == 123
+    assert request.creator_id == 7
+    assert list(request.tags) == ["a"]
+    assert call.cancelled
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_export_posts_unavailable(mock_get_stub, mock_validate_token):
+    """Ошибка до первого сообщения превращается в 503, а не в пустой ответ 200."""
+    mock_validate_token.return_value = {"id": 123}
+    error = grpc.aio.AioRpcError(
+        grpc.StatusCode.UNAVAILABLE, grpc.aio.Metadata(), grpc.aio.Metadata(), details="boom"
+    )
+    dummy_stub = MagicMock()
+    dummy_stub.StreamPosts = MagicMock(return_value=FakeStreamCall([], error=error))
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.get("/posts:export", headers=headers)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_update_post_field_mask(mock_get_stub, mock_validate_token):
+    """В маску попадают только переданные поля; is_private без явного значения не трогается."""
+    mock_validate_token.return_value = {"id": 123}
+    dummy_stub = MagicMock()
+    dummy_stub.UpdatePost = AsyncMock(side_effect=dummy_update_post)
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.put("/posts/1", json={"title": "New", "description": None}, headers=headers)
+    assert response.status_code == 200
+    request = dummy_stub.UpdatePost.call_args.args[0]
+    assert list(request.update_mask.paths) == ["description", "title"]
+    assert request.post.description == ""
+
+    response = client.put("/posts/1", json={}, headers=headers)
+    assert response.status_code == 400
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_search_posts(mock_get_stub, mock_validate_token):
+    """Поиск возвращает посты с подсветкой и курсором; маршрут не перехватывается /{post_id}."""
+    mock_validate_token.return_value = {"id": 123}
+    hit = post_pb2.SearchHit(
+        post=post_pb2.Post(id="1", title="Про gRPC", creator_id=123, tags=[]),
+        rank=0.5,
+        title_highlight="Про <mark>gRPC</mark>",
+        description_highlight="",
+    )
+    dummy_stub = MagicMock()
+    dummy_stub.SearchPosts = AsyncMock(return_value=post_pb2.SearchPostsResponse(
+        hits=[hit], next_cursor="abc", truncated=True
+    ))
+    mock_get_stub.return_value = dummy_stub
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.get("/posts/search?q=grpc&size=5&cursor=xyz&max_candidates=500", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["next_cursor"] == "abc"
+    assert data["truncated"] is True
+    assert data["hits"][0]["post"]["id"] == "1"
+    assert data["hits"][0]["title_highlight"] == "Про <mark>gRPC</mark>"
+    request = dummy_stub.SearchPosts.call_args.args[0]
+    assert (request.query, request.size, request.cursor, request.user_id) == ("grpc", 5, "xyz", 123)
+    assert request.max_candidates == 500
+
+    dummy_stub.SearchPosts = AsyncMock(return_value=post_pb2.SearchPostsResponse(error="Invalid cursor"))
+    response = client.get("/posts/search?q=grpc&cursor=bad", headers=headers)
+    assert response.status_code == 400
+
+    response = client.get("/posts/search", headers=headers)
+    assert response.status_code == 422
+    response = client.get("/posts/search?q=grpc&max_candidates=10001", headers=headers)
+    assert response.status_code == 422
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+@patch("src.posts.AuthorLoader")
+def test_list_posts_expand_author(mock_loader, mock_get_stub, mock_validate_token):
+    """expand=author добавляет профили авторов одним пакетным запросом на страницу."""
+    mock_validate_token.return_value = {"id": 123}
+    dummy_stub = MagicMock()
+    dummy_stub.ListPosts = AsyncMock(side_effect=dummy_list_posts)
+    mock_get_stub.return_value = dummy_stub
+    author = {"id": 123, "login": "alice", "first_name": "Alice", "last_name": None}
+    mock_loader.return_value.load_many = AsyncMock(return_value={123: author})
+
+    headers = {"Authorization": "Bearer dummy_token"}
+    response = client.get("/posts", headers=headers)
+    assert response.status_code == 200
+    assert "author" not in response.json()["posts"][0]
+    mock_loader.assert_not_called()
+
+    response = client.get("/posts?expand=author", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["posts"][0]["author"] == author
+    mock_loader.assert_called_once_with("dummy_token")
+    mock_loader.return_value.load_many.assert_awaited_once_with([123])
+
+    response = client.get("/posts?expand=comments", headers=headers)
+    assert response.status_code == 422
@@ -0,0 +1,68 @@
+import pytest
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+import post_pb2
+
+# Модуль импортируется так же, как его импортирует posts (из src в sys.path),
+# иначе у теста и приложения были бы разные контекстные переменные
+from read_your_writes import ReadYourWritesMiddleware, parse_last_write, _last_write_at
+from src.posts import router, get_post_shared
+
+app = FastAPI()
+app.add_middleware(ReadYourWritesMiddleware)
+app.include_router(router, prefix="/posts")
+
+def make_post(post_id="1", creator_id=123):
+    return post_pb2.Post(
+        id=post_id, title="Test Post", creator_id=creator_id,
+        created_at="2023-01-01T00:00:00", updated_at="2023-01-01T00:00:00"
+    )
+
+def test_parse_last_write():
+    assert parse_last_write("a=1; last_write_at=1700000000.5") == 1700000000.5
+    assert parse_last_write("last_write_at=x") is None
+    assert parse_last_write("a=1") is None
+
+@patch("src.posts.validate_jwt_token", new_callable=AsyncMock)
+@patch("src.posts.get_post_service_stub")
+def test_write_marker_travels_with_requests(mock_get_stub, mock_validate_token):
+    """После записи клиент получает cookie, и следующие чтения передают её в метаданных вызова."""
+    mock_validate_token.return_value = {"id": 123}
+    dummy_stub = MagicMock()
+    dummy_stub.CreatePost = AsyncMock(return_value=post_pb2.PostResponse(post=make_post()))
+    dummy_stub.GetPost = AsyncMock(return_value=post_pb2.PostResponse(post=make_post()))
+    mock_get_stub.return_value = dummy_stub
+    headers = {"Authorization": "Bearer dummy_token"}
+
+    # Без cookie метки нет
+    client = TestClient(app)
+    assert client.get("/posts/1", headers=headers).status_code == 200
+    assert dummy_stub.GetPost.call_args.kwargs["metadata"] is None
+
+    before = time.time()
+    response = client.post("/posts", json={"title": "Test Post"}, headers=headers)
+    assert response.status_code == 201
+    assert "Max-Age=5" in response.headers["set-cookie"]
+    marker = float(response.cookies["last_write_at"])
+    assert before <= marker <= time.time()
+
+    # Другой экземпляр API получает метку от клиента и передаёт её post-сервису
+    assert client.get("/posts/1", headers=headers).status_code == 200
+    assert dummy_stub.GetPost.call_args.kwargs["metadata"] == (("x-last-write-at", f"{marker:.6f}"),)
+
+@pytest.mark.asyncio
+@patch("src.posts.get_post_requests")
+async def test_get_post_shared_skipped_after_write(mock_requests):
+    """Автор сразу после записи не получает общий (возможно, с реплики) результат."""
+    stub = SimpleNamespace(GetPost=AsyncMock(return_value=post_pb2.PostResponse(post=make_post())))
+    req = post_pb2.GetPostRequest(id="1", user_id=123)
+    token = _last_write_at.set(time.time())
+    try:
+        resp = await get_post_shared(stub, req)
+    finally:
+        _last_write_at.reset(token)
+    assert resp.post.id == "1"
+    mock_requests.do.assert_not_called()
@@ -0,0 +1,31 @@
+import orjson
+
+import post_pb2
+from src.posts import PostOut, PostList
+from src.serialization import FastJSONResponse, post_to_dict, post_list_to_dict
+
+def make_post(i=1):
+    return post_pb2.Post(
+        id=str(i),
+        title="Test Post",
+        description="A test post",
+        creator_id=123,
+        created_at="2023-01-01T00:00:00",
+        updated_at="2023-01-01T00:00:00",
+        is_private=True,
+        tags=["test", "post"],
+    )
+
+def test_post_to_dict_matches_schema():
+    """Быстрый путь выдаёт то же, что и сериализация через PostOut."""
+    post = make_post()
+    expected = PostOut(**post_to_dict(post)).model_dump()
+    assert post_to_dict(post) == expected
+
+def test_fast_json_response_list():
+    posts = [make_post(i) for i in range(3)]
+    response = FastJSONResponse(post_list_to_dict(posts, total=3))
+    assert response.media_type == "application/json"
+    data = orjson.loads(response.body)
+    assert PostList(**data).total == 3
+    assert [p["id"] for p in data["posts"]] == ["0", "1", "2"]
@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+
+from src.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_result():
+    """Одновременные вызовы с одним ключом выполняют функцию один раз."""
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    results = await asyncio.gather(*(flight.do("token", fetch) for _ in range(10)))
+    assert calls == 1
+    assert all(result == {"id": 1} for result in results)
+    assert flight.shared == 9
+    assert flight.in_flight() == 0
+
+    # После завершения ключ освобождён: следующий вызов идёт заново
+    await flight.do("token", fetch)
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream error")
+
+    results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.calls == 1
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return 42
+
+    first = asyncio.ensure_future(flight.do("key", fetch))
+    second = asyncio.ensure_future(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 42
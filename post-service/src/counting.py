@@ -0,0 +1,63 @@
+import json
+import os
+import time
+import post_pb2
+from models import Post as PostModel, PostCounter
+from sqlalchemy import func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+# Сколько секунд процесс кэширует общее число публичных постов (режим COUNT_CACHED)
+PUBLIC_COUNT_TTL = float(os.getenv("PUBLIC_COUNT_TTL", 5))
+
+# EXPLAIN без ANALYZE: запрос не выполняется, планировщик лишь оценивает число строк
+# по статистике таблицы. Только читает, поэтому может уйти на реплику.
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+    is_select = True
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+async def estimated_count(db, conditions) -> int:
+    plan = (await db.execute(Explain(select(PostModel.id).where(*conditions)))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def exact_count(db, conditions) -> int:
+    return await db.scalar(select(func.count()).select_from(PostModel).where(*conditions))
+
+_public_count = {"value": 0, "expires": 0.0}
+
+async def public_count(db) -> int:
+    now = time.monotonic()
+    if _public_count["expires"] <= now:
+        # sum(bigint) в Postgres возвращает numeric
+        _public_count["value"] = int(await db.scalar(
+            select(func.coalesce(func.sum(PostCounter.count), 0)).where(PostCounter.is_private == False)
+        ))
+        _public_count["expires"] = now + PUBLIC_COUNT_TTL
+    return _public_count["value"]
+
+# Посты, видимые пользователю без фильтров: все публичные плюс его приватные
+async def cached_count(db, user_id) -> int:
+    private = await db.scalar(
+        select(PostCounter.count).where(PostCounter.creator_id == user_id, PostCounter.is_private == True)
+    )
+    return await public_count(db) + (private or 0)
+
+# Возвращает (total, способ подсчёта). Счётчики не знают о фильтре по тегам,
+# поэтому для отфильтрованного списка COUNT_CACHED заменяется оценкой планировщика.
+async def count_posts(db, mode, conditions, user_id, filtered=False):
+    if mode == post_pb2.COUNT_NONE:
+        return 0, post_pb2.COUNT_NONE
+    if mode == post_pb2.COUNT_CACHED and not filtered:
+        return await cached_count(db, user_id), post_pb2.COUNT_CACHED
+    if mode in (post_pb2.COUNT_ESTIMATED, post_pb2.COUNT_CACHED):
+        return await estimated_count(db, conditions), post_pb2.COUNT_ESTIMATED
+    return await exact_count(db, conditions), post_pb2.COUNT_EXACT
@@ -1,10 +1,99 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import random
+import time
+from uuid import uuid4
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, declarative_base
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/post_service_db")
+# Реплики только для чтения, через запятую; если не заданы — всё идёт в основную БД
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Число соединений с БД ограничивается пулом (pool_size + max_overflow)
+# независимо от числа одновременно обрабатываемых RPC
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Пересоздавать соединения старше N секунд (-1 — не пересоздавать)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Проверять соединение перед выдачей из пула (переживает рестарты БД и балансировщиков)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Размер кэшей подготовленных выражений на соединение: prepared_statement_cache_size
+# адаптера SQLAlchemy и statement_cache_size самого asyncpg. 0 — отключить оба; тогда же
+# выражения получают уникальные имена, иначе за pgbouncer (режим transaction) они
+# конфликтовали бы с выражениями других клиентов на том же серверном соединении.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+# Сколько секунд после записи автор читает из основной БД, а не из реплик (read-your-writes)
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", 5))
+
+# Асинхронный драйвер asyncpg: DATABASE_URL остаётся в привычном виде postgresql://...
+def to_async_url(url: str):
+    parsed = make_url(url)
+    if parsed.drivername == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    if parsed.drivername == "postgresql+asyncpg":
+        parsed = parsed.update_query_dict({"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)})
+    return parsed
+
+# DSN для прямого подключения asyncpg (LISTEN/NOTIFY) в обход пула SQLAlchemy
+def to_asyncpg_dsn(url: str) -> str:
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+def connect_args():
+    args = {"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    if DB_STATEMENT_CACHE_SIZE == 0:
+        args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    return args
+
+def make_engine(url: str):
+    return create_async_engine(
+        to_async_url(url),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args(),
+    )
+
+engine = make_engine(DATABASE_URL)
+replica_engines = [make_engine(url) for url in DATABASE_REPLICA_URLS]
+# Одиночные изменяющие команды (UPDATE/DELETE ... RETURNING) атомарны сами по себе:
+# в режиме autocommit они обходятся без BEGIN/COMMIT, то есть за один обмен с БД.
+# Пул соединений общий с engine.
+autocommit_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+# Сессия с маршрутизацией: SELECT в сессиях, открытых через read_session(),
+# уходят на случайную реплику, всё остальное (и любые записи) — в основную БД.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.info.get("use_replica")
+            and replica_engines
+            and not self._flushing
+            and (clause is None or getattr(clause, "is_select", False))
+        ):
+            return random.choice(replica_engines).sync_engine
+        return engine.sync_engine
+
+SessionLocal = async_sessionmaker(
+    autoflush=False, expire_on_commit=False, sync_session_class=RoutingSession
+)
+
+# Read-your-writes: API-сервис передаёт в метаданных вызова время последней записи
+# автора (unix-время, хранится у клиента в cookie), поэтому признак одинаков для всех
+# процессов и экземпляров сервиса. Пока окно не истекло, чтения идут в основную БД,
+# чтобы автор сразу видел свои изменения несмотря на отставание реплик.
+def recently_wrote(last_write_at) -> bool:
+    return last_write_at is not None and time.time() - last_write_at < READ_YOUR_WRITES_WINDOW
+
+def read_session(last_write_at=None):
+    return SessionLocal(info={"use_replica": not recently_wrote(last_write_at)})
+
+async def dispose_engines():
+    await engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
 
 Base = declarative_base()
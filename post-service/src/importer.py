@@ -0,0 +1,120 @@
+import os
+from datetime import datetime, timezone
+import asyncpg
+import post_pb2
+from models import Post as PostModel
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+# Сколько постов копится в буфере перед записью в БД одной командой
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 5000))
+# copy — COPY FROM STDIN (быстрее всего); insert — многострочные INSERT
+IMPORT_METHOD = os.getenv("IMPORT_METHOD", "copy")
+# Сколько ошибок по строкам вернуть в ответе
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+
+COLUMNS = ("title", "description", "creator_id", "created_at", "updated_at", "is_private", "tags")
+
+# Ошибки записи, которые относятся к строкам пачки: ошибки БД и ошибки кодирования
+# значений драйвером asyncpg (TypeError, OverflowError, ...), возникающие до отправки в БД
+WRITE_ERRORS = (SQLAlchemyError, asyncpg.PostgresError, TypeError, ValueError, ArithmeticError)
+# Потеря соединения к строкам не относится (ConnectionDoesNotExistError при этом — PostgresError):
+# повторять пачку по строкам бессмысленно, импорт прерывается
+CONNECTION_ERRORS = (asyncpg.PostgresConnectionError, asyncpg.InterfaceError, OSError)
+# Ошибки, прерывающие импорт целиком; клиент всё равно получает сводку по записанным пачкам
+IMPORT_ERRORS = WRITE_ERRORS + CONNECTION_ERRORS
+
+# Колонки posts — timestamp without time zone: время со смещением (например, ...Z)
+# приводится к UTC без часового пояса, как datetime.utcnow()
+def parse_timestamp(value: str, default: datetime) -> datetime:
+    if not value:
+        return default
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def to_record(p, now: datetime) -> tuple:
+    if not p.title:
+        raise ValueError("Title is required")
+    created_at = parse_timestamp(p.created_at, now)
+    updated_at = parse_timestamp(p.updated_at, created_at)
+    return (p.title, p.description, p.creator_id, created_at, updated_at, p.is_private, list(p.tags))
+
+# Буферизует посты из потока ImportPosts и пишет их пачками по batch_size.
+# Каждая пачка — отдельная транзакция: при обрыве потока уже записанные пачки остаются.
+# Если пачка целиком не записалась, она повторяется по одной строке,
+# чтобы ошибку получили только проблемные строки.
+class PostImporter:
+    def __init__(self, conn, method: str = None, batch_size: int = None):
+        self.conn = conn
+        self.method = method or IMPORT_METHOD
+        self.batch_size = max(1, batch_size or IMPORT_BATCH_SIZE)
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self._index = 0
+        self._buffer = []
+        self._positions = []
+
+    def _fail(self, index: int, error: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append(post_pb2.ImportPostError(index=index, error=error))
+
+    async def add(self, p):
+        index = self._index
+        self._index += 1
+        try:
+            record = to_record(p, datetime.utcnow())
+        except ValueError as e:
+            self._fail(index, str(e))
+            return
+        self._buffer.append(record)
+        self._positions.append(index)
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        records, positions = self._buffer, self._positions
+        self._buffer, self._positions = [], []
+        if not records:
+            return
+        try:
+            await self._write(records)
+            self.imported += len(records)
+            return
+        except CONNECTION_ERRORS:
+            raise
+        except WRITE_ERRORS as e:
+            if len(records) == 1:
+                self._fail(positions[0], str(e))
+                return
+        for record, index in zip(records, positions):
+            try:
+                await self._write([record])
+                self.imported += 1
+            except CONNECTION_ERRORS:
+                raise
+            except WRITE_ERRORS as e:
+                self._fail(index, str(e))
+
+    async def _write(self, records):
+        if self.method == "insert":
+            try:
+                await self.conn.execute(insert(PostModel), [dict(zip(COLUMNS, record)) for record in records])
+                await self.conn.commit()
+            except SQLAlchemyError:
+                await self.conn.rollback()
+                raise
+            return
+        raw = (await self.conn.get_raw_connection()).driver_connection
+        async with raw.transaction():
+            await raw.copy_records_to_table("posts", records=records, columns=COLUMNS)
+
+    def summary(self):
+        errors = sorted(self.errors, key=lambda e: e.index)
+        return post_pb2.ImportPostsResponse(imported=self.imported, failed=self.failed, errors=errors)
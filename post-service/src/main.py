@@ -1,175 +1,477 @@
+import asyncio
+import os
 import grpc
-from concurrent import futures
 from datetime import datetime
 import post_pb2
 import post_pb2_grpc
-from database import SessionLocal, engine, Base
+from database import (
+    DATABASE_URL, SessionLocal, engine, autocommit_engine, read_session, recently_wrote,
+    dispose_engines, to_asyncpg_dsn
+)
+from migrate import run_migrations
 from models import Post as PostModel
+from pagination import encode_cursor, decode_cursor, encode_search_cursor, decode_search_cursor
+from counting import count_posts
+from search import MAX_SEARCH_CANDIDATES, MAX_SEARCH_SIZE, search_posts
+from importer import IMPORT_ERRORS, PostImporter
+from post_cache import PostCache, PostCacheCollector, PostChangeListener
+from prometheus_client import REGISTRY, start_http_server
+from sqlalchemy import Integer, any_, bindparam, delete, insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import SQLAlchemyError
 
-# Создаем таблицы в БД, если они не существуют
-Base.metadata.create_all(bind=engine)
+GRPC_PORT = int(os.getenv("GRPC_PORT", 50051))
+# Максимум одновременно обрабатываемых RPC; сверх лимита клиент получает RESOURCE_EXHAUSTED
+GRPC_MAX_CONCURRENT_RPCS = int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", 1000))
+GRPC_SHUTDOWN_GRACE = float(os.getenv("GRPC_SHUTDOWN_GRACE", 5))
+# Порт HTTP-эндпоинта метрик Prometheus (статистика кэша постов); 0 — не запускать
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9101))
 
+# Максимальный размер пакета в BatchGetPosts / BatchCreatePosts
+MAX_BATCH_SIZE = 100
+# Максимальный размер страницы ListPosts
+MAX_PAGE_SIZE = 100
+# Сколько строк StreamPosts читает из серверного курсора за раз и отправляет одним сообщением
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 500))
+
+# Метаданные вызова со временем последней записи автора (unix-время), см. read_session
+LAST_WRITE_METADATA = "x-last-write-at"
+
+# Колонки поста для RETURNING (без служебного search_vector)
+POST_COLUMNS = [column for column in PostModel.__table__.c if column.name != "search_vector"]
+
+def to_grpc_post(post_obj):
+    return post_pb2.Post(
+        id=str(post_obj.id),
+        title=post_obj.title,
+        description=post_obj.description,
+        creator_id=post_obj.creator_id,
+        created_at=post_obj.created_at.isoformat(),
+        updated_at=post_obj.updated_at.isoformat(),
+        is_private=post_obj.is_private,
+        tags=post_obj.tags or []
+    )
+
+def last_write_at(context):
+    metadata = context.invocation_metadata() if context else None
+    for key, value in metadata or ():
+        if key == LAST_WRITE_METADATA:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+# Фильтр видимости: пост виден, если он не приватный или принадлежит пользователю
+def visible_to(user_id):
+    return (PostModel.is_private == False) | (PostModel.creator_id == user_id)
+
+# Поля поста, которые можно менять через update_mask
+UPDATABLE_FIELDS = ("title", "description", "is_private", "tags")
+
+# Значения для UPDATE по маске полей. Без маски — прежнее поведение:
+# пустые title/description/tags не меняются, is_private перезаписывается всегда.
+def update_values(p, update_mask) -> dict:
+    paths = list(update_mask.paths)
+    if not paths:
+        paths = [name for name in ("title", "description", "tags") if getattr(p, name)] + ["is_private"]
+    values = {}
+    for path in paths:
+        if path not in UPDATABLE_FIELDS:
+            raise ValueError(f"Invalid update mask path: {path}")
+        values[path] = list(p.tags) if path == "tags" else getattr(p, path)
+    if "title" in values and not values["title"]:
+        raise ValueError("Title is required")
+    values["updated_at"] = datetime.utcnow()
+    return values
+
+# Изменение не затронуло ни одной строки: различаем «нет поста» и «чужой пост».
+# Дополнительный запрос выполняется только в этом (редком) случае.
+async def ownership_error(conn, post_id) -> str:
+    exists = await conn.scalar(select(PostModel.id).where(PostModel.id == post_id))
+    return "Unauthorized" if exists else "Post not found"
+
+# Фильтр по тегам через операторы массивов && / @>, которые обслуживает GIN-индекс
+def tags_filter(tags, tag_match):
+    tags = [tag for tag in tags if tag]
+    if not tags:
+        return None
+    if tag_match == post_pb2.TAG_MATCH_ALL:
+        return PostModel.tags.contains(tags)
+    return PostModel.tags.overlap(tags)
+
+# Все обработчики асинхронные (grpc.aio + asyncpg): ожидание БД не занимает поток,
+# и число одновременных запросов ограничено пулом соединений, а не пулом потоков.
 class PostServiceServicer(post_pb2_grpc.PostServiceServicer):
-    def CreatePost(self, request, context):
-        db = SessionLocal()
+    def __init__(self, cache: PostCache = None):
+        self.cache = cache if cache is not None else PostCache()
+
+    # Вставка одной командой INSERT ... RETURNING вместо add/commit/refresh
+    async def CreatePost(self, request, context):
+        p = request.post
+        now = datetime.utcnow()
         try:
-            p = request.post
-            new_post = PostModel(
-                title=p.title,
-                description=p.description,
-                creator_id=p.creator_id,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow(),
-                is_private=p.is_private,
-                tags=p.tags
-            )
-            db.add(new_post)
-            db.commit()
-            db.refresh(new_post)
-            grpc_post = post_pb2.Post(
-                id=str(new_post.id),
-                title=new_post.title,
-                description=new_post.description,
-                creator_id=new_post.creator_id,
-                created_at=new_post.created_at.isoformat(),
-                updated_at=new_post.updated_at.isoformat(),
-                is_private=new_post.is_private,
-                tags=new_post.tags or []
-            )
-            return post_pb2.PostResponse(post=grpc_post)
+            async with autocommit_engine.connect() as conn:
+                row = (await conn.execute(
+                    insert(PostModel)
+                    .values(
+                        title=p.title,
+                        description=p.description,
+                        creator_id=p.creator_id,
+                        created_at=now,
+                        updated_at=now,
+                        is_private=p.is_private,
+                        tags=list(p.tags)
+                    )
+                    .returning(*POST_COLUMNS)
+                )).first()
         except SQLAlchemyError as e:
-            db.rollback()
             return post_pb2.PostResponse(error=str(e))
-        finally:
-            db.close()
+        return post_pb2.PostResponse(post=to_grpc_post(row))
 
-    def DeletePost(self, request, context):
-        db = SessionLocal()
+    # Удаление и обновление — одна команда ... WHERE id = :id AND creator_id = :uid RETURNING,
+    # без предварительного SELECT и refresh: один обмен с БД и минимальное время удержания блокировки.
+    async def DeletePost(self, request, context):
         try:
             post_id = int(request.id)
-            user_id = request.user_id
-            post_obj = db.query(PostModel).filter(PostModel.id == post_id).first()
-            if not post_obj:
-                return post_pb2.PostResponse(error="Post not found")
-            if post_obj.creator_id != user_id:
-                return post_pb2.PostResponse(error="Unauthorized")
-            grpc_post = post_pb2.Post(
-                id=str(post_obj.id),
-                title=post_obj.title,
-                description=post_obj.description,
-                creator_id=post_obj.creator_id,
-                created_at=post_obj.created_at.isoformat(),
-                updated_at=post_obj.updated_at.isoformat(),
-                is_private=post_obj.is_private,
-                tags=post_obj.tags or []
-            )
-            db.delete(post_obj)
-            db.commit()
-            return post_pb2.PostResponse(post=grpc_post)
+        except ValueError:
+            return post_pb2.PostResponse(error="Invalid id")
+        user_id = request.user_id
+        try:
+            async with autocommit_engine.connect() as conn:
+                row = (await conn.execute(
+                    delete(PostModel)
+                    .where(PostModel.id == post_id, PostModel.creator_id == user_id)
+                    .returning(*POST_COLUMNS)
+                )).first()
+                if row is None:
+                    return post_pb2.PostResponse(error=await ownership_error(conn, post_id))
         except SQLAlchemyError as e:
-            db.rollback()
             return post_pb2.PostResponse(error=str(e))
-        finally:
-            db.close()
+        self.cache.invalidate(post_id)
+        return post_pb2.PostResponse(post=to_grpc_post(row))
 
-    def UpdatePost(self, request, context):
-        db = SessionLocal()
+    async def UpdatePost(self, request, context):
+        p = request.post
         try:
-            p = request.post
             post_id = int(p.id)
-            post_obj = db.query(PostModel).filter(PostModel.id == post_id).first()
-            if not post_obj:
-                return post_pb2.PostResponse(error="Post not found")
-            if post_obj.creator_id != p.creator_id:
-                return post_pb2.PostResponse(error="Unauthorized")
-            post_obj.title = p.title or post_obj.title
-            post_obj.description = p.description or post_obj.description
-            post_obj.is_private = p.is_private
-            post_obj.tags = p.tags if p.tags else post_obj.tags
-            post_obj.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(post_obj)
-            grpc_post = post_pb2.Post(
-                id=str(post_obj.id),
-                title=post_obj.title,
-                description=post_obj.description,
-                creator_id=post_obj.creator_id,
-                created_at=post_obj.created_at.isoformat(),
-                updated_at=post_obj.updated_at.isoformat(),
-                is_private=post_obj.is_private,
-                tags=post_obj.tags or []
-            )
-            return post_pb2.PostResponse(post=grpc_post)
+        except ValueError:
+            return post_pb2.PostResponse(error="Invalid id")
+        try:
+            values = update_values(p, request.update_mask)
+        except ValueError as e:
+            return post_pb2.PostResponse(error=str(e))
+        try:
+            async with autocommit_engine.connect() as conn:
+                row = (await conn.execute(
+                    update(PostModel)
+                    .where(PostModel.id == post_id, PostModel.creator_id == p.creator_id)
+                    .values(**values)
+                    .returning(*POST_COLUMNS)
+                )).first()
+                if row is None:
+                    return post_pb2.PostResponse(error=await ownership_error(conn, post_id))
         except SQLAlchemyError as e:
-            db.rollback()
             return post_pb2.PostResponse(error=str(e))
-        finally:
-            db.close()
+        self.cache.invalidate(post_id)
+        return post_pb2.PostResponse(post=to_grpc_post(row))
+
+    # Кэш заполняется только чтениями из основной БД: строка с отстающей реплики
+    # вернула бы в кэш версию, уже сброшенную инвалидацией, и автор увидел бы
+    # её вместо своего изменения. С выключенным кэшем чтения идут на реплики.
+    def cache_fill_session(self, last_write):
+        return SessionLocal() if self.cache.maxsize > 0 else read_session(last_write)
+
+    # В окне read-your-writes автор читает мимо кэша, как и мимо реплик
+    def cached(self, post_id: int, last_write):
+        if recently_wrote(last_write):
+            return None
+        return self.cache.get(post_id)
 
-    def GetPost(self, request, context):
-        db = SessionLocal()
+    # Горячие посты отдаются из кэша процесса; права доступа проверяются при каждом чтении
+    async def GetPost(self, request, context):
         try:
             post_id = int(request.id)
-            user_id = request.user_id
-            post_obj = db.query(PostModel).filter(PostModel.id == post_id).first()
+        except ValueError:
+            return post_pb2.PostResponse(error="Invalid id")
+        last_write = last_write_at(context)
+        entry = self.cached(post_id, last_write)
+        if entry is None:
+            epoch = self.cache.epoch
+            async with self.cache_fill_session(last_write) as db:
+                try:
+                    post_obj = await db.get(PostModel, post_id)
+                except SQLAlchemyError as e:
+                    return post_pb2.PostResponse(error=str(e))
             if not post_obj:
                 return post_pb2.PostResponse(error="Post not found")
-            if post_obj.is_private and post_obj.creator_id != user_id:
-                return post_pb2.PostResponse(error="Unauthorized")
-            grpc_post = post_pb2.Post(
-                id=str(post_obj.id),
-                title=post_obj.title,
-                description=post_obj.description,
-                creator_id=post_obj.creator_id,
-                created_at=post_obj.created_at.isoformat(),
-                updated_at=post_obj.updated_at.isoformat(),
-                is_private=post_obj.is_private,
-                tags=post_obj.tags or []
-            )
-            return post_pb2.PostResponse(post=grpc_post)
-        except SQLAlchemyError as e:
-            return post_pb2.PostResponse(error=str(e))
-        finally:
-            db.close()
+            entry = self.cache.put(post_id, to_grpc_post(post_obj), epoch)
+        if entry.is_private and entry.creator_id != request.user_id:
+            return post_pb2.PostResponse(error="Unauthorized")
+        return post_pb2.PostResponse(post=entry.post())
 
-    def ListPosts(self, request, context):
-        db = SessionLocal()
+    # Лёгкий запрос только версии поста (без заголовка, описания и тегов):
+    # нужен API-сервису для ответов 304 Not Modified по ETag.
+    async def GetPostVersion(self, request, context):
         try:
-            page = request.page
-            size = request.size
-            user_id = request.user_id
-            query = db.query(PostModel)
-            # Фильтруем: показываем посты, если они не приватные или принадлежат пользователю
-            query = query.filter((PostModel.is_private == False) | (PostModel.creator_id == user_id))
-            total = query.count()
-            posts = query.offset((page - 1) * size).limit(size).all()
-            grpc_posts = []
-            for post_obj in posts:
-                grpc_post = post_pb2.Post(
-                    id=str(post_obj.id),
-                    title=post_obj.title,
-                    description=post_obj.description,
-                    creator_id=post_obj.creator_id,
-                    created_at=post_obj.created_at.isoformat(),
-                    updated_at=post_obj.updated_at.isoformat(),
-                    is_private=post_obj.is_private,
-                    tags=post_obj.tags or []
+            entry = self.cached(int(request.id), last_write_at(context))
+        except ValueError:
+            return post_pb2.PostVersionResponse(error="Invalid id")
+        if entry is not None:
+            if entry.is_private and entry.creator_id != request.user_id:
+                return post_pb2.PostVersionResponse(error="Unauthorized")
+            return post_pb2.PostVersionResponse(
+                id=request.id, updated_at=entry.updated_at, is_private=entry.is_private
+            )
+        async with read_session(last_write_at(context)) as db:
+            try:
+                post_id = int(request.id)
+                user_id = request.user_id
+                row = (await db.execute(
+                    select(PostModel.id, PostModel.updated_at, PostModel.is_private, PostModel.creator_id)
+                    .where(PostModel.id == post_id)
+                )).first()
+                if not row:
+                    return post_pb2.PostVersionResponse(error="Post not found")
+                if row.is_private and row.creator_id != user_id:
+                    return post_pb2.PostVersionResponse(error="Unauthorized")
+                return post_pb2.PostVersionResponse(
+                    id=str(row.id),
+                    updated_at=row.updated_at.isoformat(),
+                    is_private=row.is_private
                 )
-                grpc_posts.append(grpc_post)
-            return post_pb2.ListPostsResponse(posts=grpc_posts, total=total)
-        except SQLAlchemyError as e:
-            return post_pb2.ListPostsResponse(error=str(e))
-        finally:
-            db.close()
-
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    post_pb2_grpc.add_PostServiceServicer_to_server(PostServiceServicer(), server)
-    server.add_insecure_port('[::]:50051')
-    server.start()
-    print("Post-service gRPC сервер запущен на порту 50051")
-    server.wait_for_termination()
+            except SQLAlchemyError as e:
+                return post_pb2.PostVersionResponse(error=str(e))
+
+    async def ListPosts(self, request, context):
+        if not 1 <= request.size <= MAX_PAGE_SIZE:
+            return post_pb2.ListPostsResponse(error=f"Page size must be between 1 and {MAX_PAGE_SIZE}")
+        if not request.HasField("cursor") and request.page < 1:
+            return post_pb2.ListPostsResponse(error="Page must be at least 1")
+        async with read_session(last_write_at(context)) as db:
+            try:
+                page = request.page
+                size = request.size
+                user_id = request.user_id
+                conditions = [visible_to(user_id)]
+                tags_condition = tags_filter(request.tags, request.tag_match)
+                if tags_condition is not None:
+                    conditions.append(tags_condition)
+                query = select(PostModel).where(*conditions)
+                total, count_kind = await count_posts(
+                    db, request.count_mode, conditions, user_id, filtered=tags_condition is not None
+                )
+                next_cursor = ""
+                if request.HasField("cursor"):
+                    # Keyset-пагинация: вместо OFFSET продолжаем с позиции курсора,
+                    # поэтому любая страница стоит столько же, сколько первая
+                    query = query.order_by(PostModel.created_at.desc(), PostModel.id.desc())
+                    if request.cursor:
+                        try:
+                            created_at, last_id = decode_cursor(request.cursor)
+                        except ValueError as e:
+                            return post_pb2.ListPostsResponse(error=str(e))
+                        query = query.where(
+                            tuple_(PostModel.created_at, PostModel.id) < tuple_(created_at, last_id)
+                        )
+                else:
+                    query = query.offset((page - 1) * size)
+                # Лишняя строка показывает, есть ли следующая страница, без подсчёта total
+                posts = (await db.scalars(query.limit(size + 1))).all()
+                has_next = len(posts) > size
+                if has_next:
+                    posts = posts[:size]
+                    if request.HasField("cursor"):
+                        next_cursor = encode_cursor(posts[-1])
+                grpc_posts = [to_grpc_post(post_obj) for post_obj in posts]
+                return post_pb2.ListPostsResponse(
+                    posts=grpc_posts,
+                    total=total,
+                    next_cursor=next_cursor,
+                    count_kind=count_kind,
+                    has_next=has_next
+                )
+            except SQLAlchemyError as e:
+                return post_pb2.ListPostsResponse(error=str(e))
+
+    # Потоковая выгрузка через серверный курсор (yield_per): в памяти не больше
+    # одной порции строк, каждая порция уходит одним сообщением PostChunk.
+    # Следующая порция читается из курсора, только когда предыдущая ушла клиенту,
+    # поэтому медленный получатель притормаживает и чтение из БД.
+    async def StreamPosts(self, request, context):
+        conditions = [visible_to(request.user_id)]
+        if request.HasField("creator_id"):
+            conditions.append(PostModel.creator_id == request.creator_id)
+        tags_condition = tags_filter(request.tags, request.tag_match)
+        if tags_condition is not None:
+            conditions.append(tags_condition)
+        query = (
+            select(PostModel)
+            .where(*conditions)
+            .order_by(PostModel.created_at.desc(), PostModel.id.desc())
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async with read_session(last_write_at(context)) as db:
+            try:
+                result = await db.stream_scalars(query)
+                async for partition in result.partitions():
+                    yield post_pb2.PostChunk(posts=[to_grpc_post(post_obj) for post_obj in partition])
+            except SQLAlchemyError as e:
+                await context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+    async def SearchPosts(self, request, context):
+        text = request.query.strip()
+        if not text:
+            return post_pb2.SearchPostsResponse(error="Query is required")
+        size = min(request.size or 10, MAX_SEARCH_SIZE)
+        # Граница выдачи и число кандидатов фиксируются первой страницей и передаются в курсоре
+        after, bound, max_candidates = None, datetime.utcnow(), request.max_candidates
+        if request.cursor:
+            try:
+                after, bound, max_candidates = decode_search_cursor(request.cursor)
+            except ValueError as e:
+                return post_pb2.SearchPostsResponse(error=str(e))
+        if not 0 <= max_candidates <= MAX_SEARCH_CANDIDATES:
+            return post_pb2.SearchPostsResponse(
+                error=f"max_candidates must be between 0 and {MAX_SEARCH_CANDIDATES}"
+            )
+        async with read_session(last_write_at(context)) as db:
+            try:
+                rows, truncated = await search_posts(
+                    db, text, visible_to(request.user_id), size + 1, bound, after, max_candidates
+                )
+            except SQLAlchemyError as e:
+                return post_pb2.SearchPostsResponse(error=str(e))
+        next_cursor = ""
+        if len(rows) > size:
+            rows = rows[:size]
+            next_cursor = encode_search_cursor(rows[-1][1], rows[-1][0].id, bound, max_candidates)
+        hits = [
+            post_pb2.SearchHit(
+                post=to_grpc_post(post_obj),
+                rank=rank,
+                title_highlight=title_highlight,
+                description_highlight=description_highlight
+            )
+            for post_obj, rank, title_highlight, description_highlight in rows
+        ]
+        return post_pb2.SearchPostsResponse(hits=hits, next_cursor=next_cursor, truncated=truncated)
+
+    # Получение нескольких постов одним запросом WHERE id = ANY(:ids).
+    # Для каждого запрошенного id возвращается либо пост, либо ошибка.
+    async def BatchGetPosts(self, request, context):
+        if len(request.ids) > MAX_BATCH_SIZE:
+            return post_pb2.BatchPostsResponse(error=f"Batch size exceeds {MAX_BATCH_SIZE}")
+        async with read_session(last_write_at(context)) as db:
+            try:
+                user_id = request.user_id
+                ids = []
+                for raw_id in request.ids:
+                    try:
+                        ids.append(int(raw_id))
+                    except ValueError:
+                        pass
+                posts = {}
+                if ids:
+                    query = select(PostModel).where(
+                        PostModel.id == any_(bindparam("ids", value=ids, type_=ARRAY(Integer)))
+                    )
+                    posts = {post_obj.id: post_obj for post_obj in (await db.scalars(query)).all()}
+                results = []
+                for raw_id in request.ids:
+                    try:
+                        post_obj = posts.get(int(raw_id))
+                    except ValueError:
+                        results.append(post_pb2.BatchPostResult(id=raw_id, error="Invalid id"))
+                        continue
+                    if not post_obj:
+                        results.append(post_pb2.BatchPostResult(id=raw_id, error="Post not found"))
+                    elif post_obj.is_private and post_obj.creator_id != user_id:
+                        results.append(post_pb2.BatchPostResult(id=raw_id, error="Unauthorized"))
+                    else:
+                        results.append(post_pb2.BatchPostResult(id=raw_id, post=to_grpc_post(post_obj)))
+                return post_pb2.BatchPostsResponse(results=results)
+            except SQLAlchemyError as e:
+                return post_pb2.BatchPostsResponse(error=str(e))
+
+    # Создание нескольких постов одним многострочным INSERT ... RETURNING.
+    # Невалидные элементы получают ошибку и не мешают вставке остальных.
+    async def BatchCreatePosts(self, request, context):
+        if len(request.posts) > MAX_BATCH_SIZE:
+            return post_pb2.BatchPostsResponse(error=f"Batch size exceeds {MAX_BATCH_SIZE}")
+        async with SessionLocal() as db:
+            results = [None] * len(request.posts)
+            rows = []
+            positions = []
+            now = datetime.utcnow()
+            for i, p in enumerate(request.posts):
+                if not p.title:
+                    results[i] = post_pb2.BatchPostResult(error="Title is required")
+                    continue
+                rows.append(dict(
+                    title=p.title,
+                    description=p.description,
+                    creator_id=p.creator_id,
+                    created_at=now,
+                    updated_at=now,
+                    is_private=p.is_private,
+                    tags=list(p.tags)
+                ))
+                positions.append(i)
+            if rows:
+                try:
+                    created = (await db.scalars(
+                        insert(PostModel).returning(PostModel, sort_by_parameter_order=True), rows
+                    )).all()
+                    await db.commit()
+                except SQLAlchemyError as e:
+                    await db.rollback()
+                    created = None
+                    for i in positions:
+                        results[i] = post_pb2.BatchPostResult(error=str(e))
+                if created is not None:
+                    for i, post_obj in zip(positions, created):
+                        results[i] = post_pb2.BatchPostResult(id=str(post_obj.id), post=to_grpc_post(post_obj))
+            return post_pb2.BatchPostsResponse(results=results)
+
+    # Массовый импорт: посты из клиентского потока буферизуются и пишутся
+    # пачками (COPY), а не отдельной транзакцией на каждый пост
+    async def ImportPosts(self, request_iterator, context):
+        importer = None
+        try:
+            async with engine.connect() as conn:
+                importer = PostImporter(conn)
+                async for request in request_iterator:
+                    for p in request.posts:
+                        await importer.add(p)
+                await importer.flush()
+        except IMPORT_ERRORS as e:
+            response = importer.summary() if importer else post_pb2.ImportPostsResponse()
+            response.error = str(e)
+            return response
+        return importer.summary()
+
+async def serve():
+    # Схема БД поддерживается версионными миграциями (см. migrate.py)
+    await run_migrations(engine)
+    servicer = PostServiceServicer()
+    # Изменения постов, сделанные другими репликами, приходят через LISTEN/NOTIFY
+    listener = PostChangeListener(to_asyncpg_dsn(DATABASE_URL), servicer.cache)
+    await listener.start()
+    if METRICS_PORT:
+        REGISTRY.register(PostCacheCollector(servicer.cache))
+        start_http_server(METRICS_PORT)
+    server = grpc.aio.server(maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS)
+    post_pb2_grpc.add_PostServiceServicer_to_server(servicer, server)
+    server.add_insecure_port(f'[::]:{GRPC_PORT}')
+    await server.start()
+    print(f"Post-service gRPC сервер запущен на порту {GRPC_PORT}")
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(GRPC_SHUTDOWN_GRACE)
+        await listener.close()
+        await dispose_engines()
 
 if __name__ == '__main__':
-    serve()
+    asyncio.run(serve())
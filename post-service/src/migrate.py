@@ -0,0 +1,98 @@
+import asyncio
+import os
+import re
+
+# Версионные миграции схемы post-сервиса: SQL-файлы вида NNNN_name.sql
+# в каталоге migrations применяются по порядку, применённые версии
+# записываются в таблицу schema_migrations.
+# Файл, начинающийся со строки "-- migrate: no-transaction", выполняется
+# вне транзакции (нужно, например, для CREATE INDEX CONCURRENTLY).
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+# Ключ advisory-lock: несколько реплик сервиса не применяют миграции одновременно
+MIGRATIONS_LOCK_ID = 4711
+
+def load_migrations():
+    migrations = []
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if not name.endswith(".sql"):
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, name), encoding="utf-8") as f:
+            sql = f.read()
+        version = name.split("_", 1)[0]
+        migrations.append((version, name, sql))
+    return migrations
+
+# Команды вне транзакции выполняются по одной: скрипт из нескольких команд
+# Postgres всё равно выполнил бы в неявной транзакции
+def split_statements(sql: str) -> list:
+    statements = []
+    for chunk in re.split(r";\s*(?:\n|$)", sql):
+        code = "\n".join(line for line in chunk.splitlines() if not line.strip().startswith("--"))
+        if code.strip():
+            statements.append(code.strip())
+    return statements
+
+# Прерванный CREATE INDEX CONCURRENTLY оставляет индекс в состоянии INVALID:
+# планировщик его не использует, а IF NOT EXISTS при повторном запуске его пропустит.
+# Поэтому перед созданием такой индекс удаляется.
+CONCURRENT_INDEX_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE
+)
+INVALID_INDEX_SQL = "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1)"
+
+async def drop_invalid_index(raw, statement: str):
+    match = CONCURRENT_INDEX_RE.match(statement)
+    if match and await raw.fetchval(INVALID_INDEX_SQL, match.group(1)):
+        await raw.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}")
+        print(f"Удалён недостроенный индекс {match.group(1)}")
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR PRIMARY KEY,
+    name VARCHAR NOT NULL,
+    applied_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now()
+)
+"""
+
+# Миграции выполняются через соединение драйвера asyncpg: только оно умеет
+# выполнять скрипт из нескольких команд (простой протокол, без параметров).
+async def run_migrations(engine) -> list:
+    applied = []
+    async with engine.connect() as conn:
+        raw = (await conn.get_raw_connection()).driver_connection
+        await raw.execute("SELECT pg_advisory_lock($1)", MIGRATIONS_LOCK_ID)
+        try:
+            await raw.execute(CREATE_MIGRATIONS_TABLE)
+            done = {row["version"] for row in await raw.fetch("SELECT version FROM schema_migrations")}
+            for version, name, sql in load_migrations():
+                if version in done:
+                    continue
+                record = "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)"
+                if sql.lstrip().startswith(NO_TRANSACTION_MARKER):
+                    # Такие миграции должны быть идемпотентными (IF NOT EXISTS):
+                    # при сбое посередине они будут выполнены повторно
+                    for statement in split_statements(sql):
+                        await drop_invalid_index(raw, statement)
+                        await raw.execute(statement)
+                    await raw.execute(record, version, name)
+                else:
+                    async with raw.transaction():
+                        await raw.execute(sql)
+                        await raw.execute(record, version, name)
+                applied.append(name)
+                print(f"Применена миграция {name}")
+        finally:
+            await raw.execute("SELECT pg_advisory_unlock($1)", MIGRATIONS_LOCK_ID)
+    return applied
+
+async def main():
+    from database import engine
+    try:
+        await run_migrations(engine)
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,13 @@
+-- Исходная схема (раньше создавалась через Base.metadata.create_all)
+CREATE TABLE IF NOT EXISTS posts (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR NOT NULL,
+    description VARCHAR,
+    creator_id INTEGER NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE,
+    updated_at TIMESTAMP WITHOUT TIME ZONE,
+    is_private BOOLEAN,
+    tags VARCHAR[]
+);
+
+CREATE INDEX IF NOT EXISTS ix_posts_id ON posts (id);
@@ -0,0 +1,18 @@
+-- migrate: no-transaction
+-- Индексы строятся CONCURRENTLY, чтобы не блокировать запись в большую таблицу.
+
+-- Проверка владельца (creator_id = :uid) и «авторская» ветка фильтра видимости
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_creator_id_is_private
+    ON posts (creator_id, is_private);
+
+-- «Публичная» ветка фильтра видимости вместе с порядком ленты
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_public_created_at_id
+    ON posts (created_at, id) WHERE is_private = false;
+
+-- Порядок (created_at, id) для курсорной пагинации
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_created_at_id
+    ON posts (created_at, id);
+
+-- Поиск по тегам (операторы @>, &&)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_tags
+    ON posts USING GIN (tags);
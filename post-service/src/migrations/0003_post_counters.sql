@@ -0,0 +1,73 @@
+-- Счётчики постов по автору и приватности для дешёвого total в ListPosts.
+-- Поддерживаются statement-level триггерами с transition-таблицами:
+-- пакетная вставка или COPY обновляет каждую строку счётчика один раз за команду.
+-- is_private = NULL фильтр видимости ленты не считает публичным, поэтому здесь он учитывается как true.
+CREATE TABLE IF NOT EXISTS post_counters (
+    creator_id INTEGER NOT NULL,
+    is_private BOOLEAN NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (creator_id, is_private)
+);
+
+CREATE OR REPLACE FUNCTION post_counters_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO post_counters (creator_id, is_private, count)
+        SELECT creator_id, coalesce(is_private, true), count(*) FROM new_rows GROUP BY 1, 2
+        ON CONFLICT (creator_id, is_private) DO UPDATE SET count = post_counters.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE post_counters c SET count = c.count - d.n
+        FROM (SELECT creator_id, coalesce(is_private, true) AS is_private, count(*) AS n FROM old_rows GROUP BY 1, 2) d
+        WHERE c.creator_id = d.creator_id AND c.is_private = d.is_private;
+    ELSE
+        -- Учитываем только строки, у которых сменился автор или приватность
+        UPDATE post_counters c SET count = c.count - d.n
+        FROM (
+            SELECT o.creator_id, coalesce(o.is_private, true) AS is_private, count(*) AS n
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE o.creator_id <> n.creator_id OR coalesce(o.is_private, true) <> coalesce(n.is_private, true)
+            GROUP BY 1, 2
+        ) d
+        WHERE c.creator_id = d.creator_id AND c.is_private = d.is_private;
+        INSERT INTO post_counters (creator_id, is_private, count)
+        SELECT n.creator_id, coalesce(n.is_private, true), count(*)
+        FROM old_rows o JOIN new_rows n ON n.id = o.id
+        WHERE o.creator_id <> n.creator_id OR coalesce(o.is_private, true) <> coalesce(n.is_private, true)
+        GROUP BY 1, 2
+        ON CONFLICT (creator_id, is_private) DO UPDATE SET count = post_counters.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- TRUNCATE posts не вызывает триггеры на DELETE: обнуляем счётчики отдельно
+CREATE OR REPLACE FUNCTION post_counters_truncate() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM post_counters;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Блокируем запись в posts на время заполнения, чтобы счётчики не разошлись с таблицей
+LOCK TABLE posts IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS posts_counters_insert ON posts;
+DROP TRIGGER IF EXISTS posts_counters_delete ON posts;
+DROP TRIGGER IF EXISTS posts_counters_update ON posts;
+DROP TRIGGER IF EXISTS posts_counters_truncate ON posts;
+
+CREATE TRIGGER posts_counters_insert AFTER INSERT ON posts
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION post_counters_apply();
+CREATE TRIGGER posts_counters_delete AFTER DELETE ON posts
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION post_counters_apply();
+CREATE TRIGGER posts_counters_update AFTER UPDATE ON posts
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION post_counters_apply();
+CREATE TRIGGER posts_counters_truncate AFTER TRUNCATE ON posts
+    FOR EACH STATEMENT EXECUTE FUNCTION post_counters_truncate();
+
+DELETE FROM post_counters;
+INSERT INTO post_counters (creator_id, is_private, count)
+SELECT creator_id, coalesce(is_private, true), count(*) FROM posts GROUP BY 1, 2;
@@ -0,0 +1,4 @@
+-- Триггер на TRUNCATE posts теперь создаётся в 0003_post_counters.sql.
+-- Версия сохранена пустой, чтобы нумерация не прерывалась и журнал schema_migrations
+-- совпадал у баз, где прежняя 0004 уже применена, и у новых баз.
+SELECT 1;
@@ -0,0 +1,29 @@
+-- Уведомления об изменении и удалении постов для сброса кэшей GetPost во всех репликах
+-- (LISTEN post_changed). NOTIFY доставляется слушателям только после коммита.
+-- Массовые изменения шлют одно уведомление '*' (сбросить кэш целиком),
+-- чтобы не переполнять очередь уведомлений.
+CREATE OR REPLACE FUNCTION posts_notify_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('post_changed', '*');
+    ELSIF (SELECT count(*) FROM old_rows) > 1000 THEN
+        PERFORM pg_notify('post_changed', '*');
+    ELSE
+        PERFORM pg_notify('post_changed', id::text) FROM old_rows;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS posts_notify_update ON posts;
+DROP TRIGGER IF EXISTS posts_notify_delete ON posts;
+DROP TRIGGER IF EXISTS posts_notify_truncate ON posts;
+
+CREATE TRIGGER posts_notify_update AFTER UPDATE ON posts
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_notify_change();
+CREATE TRIGGER posts_notify_delete AFTER DELETE ON posts
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_notify_change();
+CREATE TRIGGER posts_notify_truncate AFTER TRUNCATE ON posts
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_notify_change();
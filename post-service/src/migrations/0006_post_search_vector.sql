@@ -0,0 +1,9 @@
+-- Полнотекстовый поиск: tsvector по заголовку (вес A) и описанию (вес B),
+-- поддерживается самим Postgres как генерируемая колонка.
+-- Конфигурация russian: русские слова — russian_stem, латиница — english_stem.
+-- Добавление STORED-колонки переписывает таблицу под эксклюзивной блокировкой.
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+    ) STORED;
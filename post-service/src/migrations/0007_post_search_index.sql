@@ -0,0 +1,3 @@
+-- migrate: no-transaction
+-- GIN-индекс для поиска по search_vector (строится без блокировки записи)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_search_vector ON posts USING gin (search_vector);
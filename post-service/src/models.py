@@ -1,10 +1,20 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import BigInteger, Column, Computed, Integer, String, Boolean, DateTime, Index, text
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.orm import deferred
 from database import Base
 import datetime
 
 class Post(Base):
     __tablename__ = 'posts'
+    # Индексы создаются миграциями (migrations/0002_post_indexes.sql,
+    # 0007_post_search_index.sql), здесь они описаны для полноты метаданных
+    __table_args__ = (
+        Index('ix_posts_creator_id_is_private', 'creator_id', 'is_private'),
+        Index('ix_posts_public_created_at_id', 'created_at', 'id', postgresql_where=text('is_private = false')),
+        Index('ix_posts_created_at_id', 'created_at', 'id'),
+        Index('ix_posts_tags', 'tags', postgresql_using='gin'),
+        Index('ix_posts_search_vector', 'search_vector', postgresql_using='gin'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -14,3 +24,19 @@ class Post(Base):
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     is_private = Column(Boolean, default=False)
     tags = Column(ARRAY(String))
+    # Генерируется Postgres (migrations/0006_post_search_vector.sql); deferred —
+    # чтобы обычные выборки постов не тащили tsvector
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+        persisted=True,
+    )))
+
+# Счётчики постов по автору и приватности; обновляются триггерами
+# (migrations/0003_post_counters.sql), приложение их только читает
+class PostCounter(Base):
+    __tablename__ = 'post_counters'
+
+    creator_id = Column(Integer, primary_key=True)
+    is_private = Column(Boolean, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
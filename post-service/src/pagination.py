@@ -0,0 +1,32 @@
+import base64
+import json
+from datetime import datetime
+
+# Непрозрачный курсор keyset-пагинации: позиция последнего поста страницы
+# в порядке (created_at, id), закодированная в base64url.
+def encode_cursor(post_obj) -> str:
+    raw = json.dumps([post_obj.created_at.isoformat(), post_obj.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, post_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+# Курсор поиска: позиция последнего результата в порядке (rank, id), граница выдачи
+# (created_at первой страницы), чтобы новые посты её не сдвигали, и max_candidates
+# первой страницы, чтобы все страницы ранжировали один и тот же набор
+def encode_search_cursor(rank: float, post_id: int, bound: datetime, max_candidates: int = 0) -> str:
+    raw = json.dumps([rank, post_id, bound.isoformat(), max_candidates], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_search_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, post_id, bound, max_candidates = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (float(rank), int(post_id)), datetime.fromisoformat(bound), int(max_candidates)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
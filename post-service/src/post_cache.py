@@ -0,0 +1,153 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+import asyncpg
+import post_pb2
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Размер LRU-кэша постов в GetPost (0 — кэш выключен)
+POST_CACHE_SIZE = int(os.getenv("POST_CACHE_SIZE", 10000))
+# Страховочный TTL записи: ограничивает устаревание, если уведомление потерялось
+# или кэш заполнился чтением с отстающей реплики
+POST_CACHE_TTL = float(os.getenv("POST_CACHE_TTL", 60))
+# Канал NOTIFY, в который триггер на posts пишет id изменённых и удалённых постов
+POST_CHANGED_CHANNEL = "post_changed"
+
+# Запись кэша: сериализованный Post и поля, нужные для проверки доступа и ETag
+# без разбора сообщения. Версия поста — updated_at.
+class CachedPost:
+    __slots__ = ("data", "creator_id", "is_private", "updated_at", "expires_at")
+
+    def __init__(self, post: post_pb2.Post, expires_at: float):
+        self.data = post.SerializeToString()
+        self.creator_id = post.creator_id
+        self.is_private = post.is_private
+        self.updated_at = post.updated_at
+        self.expires_at = expires_at
+
+    def post(self) -> post_pb2.Post:
+        return post_pb2.Post.FromString(self.data)
+
+# Ограниченный по размеру (LRU) кэш постов по id.
+# epoch увеличивается при каждой инвалидации: результат чтения из БД, начатого
+# до инвалидации, в кэш не попадает (иначе туда могла бы вернуться старая версия).
+class PostCache:
+    def __init__(self, maxsize: int = POST_CACHE_SIZE, ttl: float = POST_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+
+    def get(self, post_id: int):
+        entry = self._data.get(post_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._data[post_id]
+            self.misses += 1
+            return None
+        self._data.move_to_end(post_id)
+        self.hits += 1
+        return entry
+
+    def put(self, post_id: int, post: post_pb2.Post, epoch: int):
+        entry = CachedPost(post, time.monotonic() + self.ttl)
+        if self.maxsize <= 0 or epoch != self.epoch:
+            return entry
+        self._data[post_id] = entry
+        self._data.move_to_end(post_id)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return entry
+
+    def invalidate(self, post_id: int):
+        self.epoch += 1
+        self.invalidations += 1
+        self._data.pop(post_id, None)
+
+    def clear(self):
+        self.epoch += 1
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+# Экспорт статистики кэша в Prometheus (снимается в момент запроса /metrics)
+class PostCacheCollector:
+    def __init__(self, cache: PostCache):
+        self.cache = cache
+
+    def collect(self):
+        stats = self.cache.stats()
+        yield CounterMetricFamily("post_cache_hits", "Попадания в кэш постов", value=stats["hits"])
+        yield CounterMetricFamily("post_cache_misses", "Промахи кэша постов", value=stats["misses"])
+        yield CounterMetricFamily(
+            "post_cache_invalidations", "Инвалидации записей кэша постов", value=stats["invalidations"]
+        )
+        yield GaugeMetricFamily("post_cache_size", "Число записей в кэше постов", value=stats["size"])
+
+# Слушает LISTEN post_changed на отдельном соединении и сбрасывает записи кэша,
+# изменённые любой репликой сервиса. Пока соединение потеряно, уведомления
+# пропадают, поэтому после переподключения кэш очищается целиком.
+class PostChangeListener:
+    def __init__(self, dsn: str, cache: PostCache, reconnect_delay: float = 1.0):
+        self.dsn = dsn
+        self.cache = cache
+        self.reconnect_delay = reconnect_delay
+        self._conn = None
+        self._task = None
+        self._closed = False
+
+    def _on_notify(self, conn, pid, channel, payload):
+        if payload == "*":
+            self.cache.clear()
+            return
+        try:
+            self.cache.invalidate(int(payload))
+        except ValueError:
+            self.cache.clear()
+
+    def _on_terminate(self, conn):
+        self._conn = None
+        self.cache.clear()
+        if not self._closed:
+            self._task = asyncio.ensure_future(self._reconnect())
+
+    async def _connect(self):
+        conn = await asyncpg.connect(self.dsn)
+        await conn.add_listener(POST_CHANGED_CHANNEL, self._on_notify)
+        conn.add_termination_listener(self._on_terminate)
+        self._conn = conn
+        self.cache.clear()
+
+    async def _reconnect(self):
+        while not self._closed and self._conn is None:
+            try:
+                await self._connect()
+            except (OSError, asyncpg.PostgresError):
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self):
+        if self.cache.maxsize > 0:
+            await self._connect()
+
+    async def close(self):
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
@@ -59,6 +59,36 @@ class PostServiceStub(object):
                 request_serializer=post__pb2.ListPostsRequest.SerializeToString,
                 response_deserializer=post__pb2.ListPostsResponse.FromString,
                 _registered_method=True)
+        self.GetPostVersion = channel.unary_unary(
+                '/posts.PostService/GetPostVersion',
+                request_serializer=post__pb2.GetPostRequest.SerializeToString,
+                response_deserializer=post__pb2.PostVersionResponse.FromString,
+                _registered_method=True)
+        self.BatchGetPosts = channel.unary_unary(
+                '/posts.PostService/BatchGetPosts',
+                request_serializer=post__pb2.BatchGetPostsRequest.SerializeToString,
+                response_deserializer=post__pb2.BatchPostsResponse.FromString,
+                _registered_method=True)
+        self.BatchCreatePosts = channel.unary_unary(
+                '/posts.PostService/BatchCreatePosts',
+                request_serializer=post__pb2.BatchCreatePostsRequest.SerializeToString,
+                response_deserializer=post__pb2.BatchPostsResponse.FromString,
+                _registered_method=True)
+        self.StreamPosts = channel.unary_stream(
+                '/posts.PostService/StreamPosts',
+                request_serializer=post__pb2.StreamPostsRequest.SerializeToString,
+                response_deserializer=post__pb2.PostChunk.FromString,
+                _registered_method=True)
+        self.ImportPosts = channel.stream_unary(
+                '/posts.PostService/ImportPosts',
+                request_serializer=post__pb2.ImportPostsRequest.SerializeToString,
+                response_deserializer=post__pb2.ImportPostsResponse.FromString,
+                _registered_method=True)
+        self.SearchPosts = channel.unary_unary(
+                '/posts.PostService/SearchPosts',
+                request_serializer=post__pb2.SearchPostsRequest.SerializeToString,
+                response_deserializer=post__pb2.SearchPostsResponse.FromString,
+                _registered_method=True)
 
 
 class PostServiceServicer(object):
@@ -94,6 +124,42 @@ class PostServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetPostVersion(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchGetPosts(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchCreatePosts(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamPosts(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ImportPosts(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchPosts(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_PostServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -122,6 +188,36 @@ def add_PostServiceServicer_to_server(servicer, server):
                     request_deserializer=post__pb2.ListPostsRequest.FromString,
                     response_serializer=post__pb2.ListPostsResponse.SerializeToString,
             ),
+            'GetPostVersion': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetPostVersion,
+                    request_deserializer=post__pb2.GetPostRequest.FromString,
+                    response_serializer=post__pb2.PostVersionResponse.SerializeToString,
+            ),
+            'BatchGetPosts': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetPosts,
+                    request_deserializer=post__pb2.BatchGetPostsRequest.FromString,
+                    response_serializer=post__pb2.BatchPostsResponse.SerializeToString,
+            ),
+            'BatchCreatePosts': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchCreatePosts,
+                    request_deserializer=post__pb2.BatchCreatePostsRequest.FromString,
+                    response_serializer=post__pb2.BatchPostsResponse.SerializeToString,
+            ),
+            'StreamPosts': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamPosts,
+                    request_deserializer=post__pb2.StreamPostsRequest.FromString,
+                    response_serializer=post__pb2.PostChunk.SerializeToString,
+            ),
+            'ImportPosts': grpc.stream_unary_rpc_method_handler(
+                    servicer.ImportPosts,
+                    request_deserializer=post__pb2.ImportPostsRequest.FromString,
+                    response_serializer=post__pb2.ImportPostsResponse.SerializeToString,
+            ),
+            'SearchPosts': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchPosts,
+                    request_deserializer=post__pb2.SearchPostsRequest.FromString,
+                    response_serializer=post__pb2.SearchPostsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'posts.PostService', rpc_method_handlers)
@@ -267,3 +363,165 @@ class PostService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetPostVersion(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/posts.PostService/GetPostVersion',
+            post__pb2.GetPostRequest.SerializeToString,
+            post__pb2.PostVersionResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchGetPosts(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/posts.PostService/BatchGetPosts',
+            post__pb2.BatchGetPostsRequest.SerializeToString,
+            post__pb2.BatchPostsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchCreatePosts(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/posts.PostService/BatchCreatePosts',
+            post__pb2.BatchCreatePostsRequest.SerializeToString,
+            post__pb2.BatchPostsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamPosts(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/posts.PostService/StreamPosts',
+            post__pb2.StreamPostsRequest.SerializeToString,
+            post__pb2.PostChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ImportPosts(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/posts.PostService/ImportPosts',
+            post__pb2.ImportPostsRequest.SerializeToString,
+            post__pb2.ImportPostsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchPosts(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/posts.PostService/SearchPosts',
+            post__pb2.SearchPostsRequest.SerializeToString,
+            post__pb2.SearchPostsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,61 @@
+from datetime import datetime
+from models import Post as PostModel
+from sqlalchemy import false, func, literal_column, select, tuple_
+
+# Конфигурация полнотекстового поиска; должна совпадать с выражением search_vector
+SEARCH_CONFIG = "russian"
+MAX_SEARCH_SIZE = 100
+# Наибольшее max_candidates в запросе. Без ограничения ранжируются все совпадения:
+# для частого слова это большая часть таблицы, и ts_rank_cd по ним занимает секунды,
+# поэтому клиент может явно попросить ранжировать только самые свежие совпадения.
+MAX_SEARCH_CANDIDATES = 10000
+TITLE_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, HighlightAll=true"
+DESCRIPTION_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5"
+
+# Поиск по GIN-индексу search_vector с ранжированием ts_rank_cd и keyset-пагинацией
+# по (rank, id) среди постов с created_at <= bound: граница берётся из курсора, поэтому
+# посты, появившиеся после первой страницы, не сдвигают выдачу и страницы не пропускают
+# и не повторяют результаты.
+# max_candidates = 0 — ранжируются все совпадения. Иначе только max_candidates самых свежих:
+# для редких слов планировщик берёт их из GIN-индекса, для частых идёт по индексу
+# (created_at, id) и отбрасывает несовпавшие строки. Кандидаты сортируются узкими строками
+# (только id), search_vector читается уже для них. ts_headline дорогой, поэтому считается
+# во внешнем запросе только для строк страницы.
+# Возвращает строки (Post, rank, title_hl, description_hl) и признак того, что совпадений
+# больше, чем кандидатов (для этого выбирается на одного кандидата больше).
+async def search_posts(db, text: str, visibility, limit: int, bound: datetime, after=None, max_candidates: int = 0):
+    config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    tsquery = func.websearch_to_tsquery(config, text)
+    matches = (PostModel.search_vector.op("@@")(tsquery), visibility, PostModel.created_at <= bound)
+    rank = func.ts_rank_cd(PostModel.search_vector, tsquery)
+    page = select(PostModel.id, rank.label("rank"))
+    truncated = false()
+    if max_candidates:
+        order = (PostModel.created_at.desc(), PostModel.id.desc())
+        candidates = (
+            select(PostModel.id, func.row_number().over(order_by=order).label("position"))
+            .where(*matches)
+            .order_by(*order)
+            .limit(max_candidates + 1)
+            .cte("candidates")
+        )
+        truncated = select(func.count()).select_from(candidates).scalar_subquery() > max_candidates
+        page = page.join(candidates, candidates.c.id == PostModel.id).where(candidates.c.position <= max_candidates)
+    else:
+        page = page.where(*matches)
+    if after is not None:
+        page = page.where(tuple_(rank, PostModel.id) < tuple_(*after))
+    page = page.order_by(rank.desc(), PostModel.id.desc()).limit(limit).subquery()
+    query = (
+        select(
+            PostModel,
+            page.c.rank,
+            func.ts_headline(config, PostModel.title, tsquery, TITLE_HEADLINE_OPTIONS),
+            func.ts_headline(config, func.coalesce(PostModel.description, ""), tsquery, DESCRIPTION_HEADLINE_OPTIONS),
+            truncated,
+        )
+        .join(page, page.c.id == PostModel.id)
+        .order_by(page.c.rank.desc(), PostModel.id.desc())
+    )
+    rows = (await db.execute(query)).all()
+    return [tuple(row[:4]) for row in rows], bool(rows and rows[0][4])
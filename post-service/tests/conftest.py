@@ -0,0 +1,3 @@
+import sys
+import os
+sys.path.append(os.path.abspath("src"))
\ No newline at end of file
@@ -0,0 +1,141 @@
+import json
+import os
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+import post_pb2
+from src.counting import Explain, count_posts, public_count, PUBLIC_COUNT_TTL
+from src.main import PostModel, tags_filter, visible_to
+from src.migrate import run_migrations
+
+TEST_DATABASE_URL = os.getenv("POST_SERVICE_TEST_DATABASE_URL")
+
+class FakeSession:
+    """Сессия, отвечающая заранее заданными значениями: scalar() — по очереди, execute() — планом EXPLAIN."""
+
+    def __init__(self, scalars=(), plan=None):
+        self.scalars = list(scalars)
+        self.plan = plan
+        self.queries = []
+
+    async def scalar(self, query):
+        self.queries.append(query)
+        return self.scalars.pop(0)
+
+    async def execute(self, query):
+        self.queries.append(query)
+        return SimpleNamespace(scalar=lambda: self.plan)
+
+def plan(rows):
+    return json.dumps([{"Plan": {"Node Type": "Seq Scan", "Plan Rows": rows}}])
+
+@pytest.fixture(autouse=True)
+def fresh_public_count():
+    with patch.dict("src.counting._public_count", {"value": 0, "expires": 0.0}):
+        yield
+
+def test_explain_keeps_bound_parameters():
+    """EXPLAIN оборачивает запрос целиком, значения фильтров остаются связанными параметрами."""
+    conditions = [visible_to(7), tags_filter(["a"], post_pb2.TAG_MATCH_ALL)]
+    compiled = Explain(select(PostModel.id).where(*conditions)).compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT posts.id")
+    assert "posts.creator_id = %(creator_id_1)s" in sql
+    assert sorted(map(str, compiled.params.values())) == ["7", "['a']"]
+
+@pytest.mark.asyncio
+async def test_count_none_does_not_query():
+    db = FakeSession()
+    assert await count_posts(db, post_pb2.COUNT_NONE, [visible_to(1)], 1) == (0, post_pb2.COUNT_NONE)
+    assert db.queries == []
+
+@pytest.mark.asyncio
+async def test_count_exact():
+    db = FakeSession(scalars=[42])
+    assert await count_posts(db, post_pb2.COUNT_EXACT, [visible_to(1)], 1) == (42, post_pb2.COUNT_EXACT)
+    assert "count(*)" in str(db.queries[0].compile(dialect=postgresql.dialect()))
+
+@pytest.mark.parametrize("raw_plan", [plan(1234), json.loads(plan(1234))])
+@pytest.mark.asyncio
+async def test_count_estimated_reads_plan_rows(raw_plan):
+    """Оценка берётся из Plan Rows; план приходит строкой JSON или уже разобранным."""
+    db = FakeSession(plan=raw_plan)
+    assert await count_posts(db, post_pb2.COUNT_ESTIMATED, [visible_to(1)], 1) == (1234, post_pb2.COUNT_ESTIMATED)
+    assert isinstance(db.queries[0], Explain)
+
+@pytest.mark.asyncio
+async def test_count_cached_with_filter_falls_back_to_estimate():
+    """Счётчики не знают о тегах: для отфильтрованной ленты COUNT_CACHED отдаёт оценку и сообщает об этом."""
+    db = FakeSession(plan=plan(17))
+    conditions = [visible_to(1), tags_filter(["a"], post_pb2.TAG_MATCH_ANY)]
+    total, kind = await count_posts(db, post_pb2.COUNT_CACHED, conditions, 1, filtered=True)
+    assert (total, kind) == (17, post_pb2.COUNT_ESTIMATED)
+    assert [type(query) for query in db.queries] == [Explain]
+
+@pytest.mark.asyncio
+async def test_count_cached_adds_own_private_posts():
+    """Публичные посты всех авторов плюс собственные приватные; у автора без приватных — только публичные."""
+    db = FakeSession(scalars=[3, 100])
+    assert await count_posts(db, post_pb2.COUNT_CACHED, [visible_to(1)], 1) == (103, post_pb2.COUNT_CACHED)
+    db = FakeSession(scalars=[None])
+    assert await count_posts(db, post_pb2.COUNT_CACHED, [visible_to(2)], 2) == (100, post_pb2.COUNT_CACHED)
+
+@pytest.mark.asyncio
+async def test_public_count_ttl():
+    """Число публичных постов кэшируется на PUBLIC_COUNT_TTL секунд, затем читается заново."""
+    with patch("src.counting.time.monotonic", return_value=1000.0):
+        assert await public_count(FakeSession(scalars=[10])) == 10
+        # Значение из кэша: сессия без ответов упала бы на scalar()
+        assert await public_count(FakeSession()) == 10
+    with patch("src.counting.time.monotonic", return_value=1000.0 + PUBLIC_COUNT_TTL):
+        assert await public_count(FakeSession(scalars=[12])) == 12
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="POST_SERVICE_TEST_DATABASE_URL не задан")
+@pytest.mark.asyncio
+async def test_count_modes_against_postgres():
+    """ESTIMATED совпадает с оценкой EXPLAIN, CACHED — с post_counters и точным подсчётом."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from src.database import to_async_url
+
+    engine = create_async_engine(to_async_url(TEST_DATABASE_URL))
+    now = datetime(2024, 1, 1)
+    records = [
+        (f"Пост {i}", "", i % 5 + 1, now, now, i % 3 == 0, ["a"] if i % 2 else ["b"])
+        for i in range(300)
+    ]
+    try:
+        await run_migrations(engine)
+        async with engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            await raw.execute("TRUNCATE posts")
+            await raw.copy_records_to_table(
+                "posts", records=records,
+                columns=("title", "description", "creator_id", "created_at", "updated_at", "is_private", "tags")
+            )
+            await raw.execute("ANALYZE posts")
+            # Соединение SQLAlchemy разбирает json само
+            explained = (await raw.fetchval(
+                "EXPLAIN (FORMAT JSON) SELECT id FROM posts WHERE is_private = false OR creator_id = 1"
+            ))[0]["Plan"]["Plan Rows"]
+            counters = await raw.fetchval(
+                "SELECT sum(count) FROM post_counters WHERE is_private = false OR creator_id = 1"
+            )
+
+        visible = sum(1 for record in records if not record[5] or record[2] == 1)
+        async with AsyncSession(engine) as db:
+            assert await count_posts(db, post_pb2.COUNT_ESTIMATED, [visible_to(1)], 1) == (
+                explained, post_pb2.COUNT_ESTIMATED
+            )
+            assert await count_posts(db, post_pb2.COUNT_CACHED, [visible_to(1)], 1) == (
+                counters, post_pb2.COUNT_CACHED
+            )
+            assert await count_posts(db, post_pb2.COUNT_EXACT, [visible_to(1)], 1) == (
+                visible, post_pb2.COUNT_EXACT
+            )
+        assert counters == visible
+    finally:
+        await engine.dispose()
@@ -0,0 +1,124 @@
+import asyncpg
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from sqlalchemy.exc import DBAPIError
+
+import post_pb2
+from src.importer import PostImporter, to_record
+from src.main import PostServiceServicer
+
+class FakeConnection:
+    """Соединение для режима insert: падает на пачке, где есть пост с заголовком "bad" или "unencodable"."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def execute(self, statement, rows):
+        if any(row["title"] == "bad" for row in rows):
+            raise DBAPIError("INSERT", rows, Exception("bad row"))
+        # Так падает кодировщик asyncpg на значении неподходящего типа
+        if any(row["title"] == "unencodable" for row in rows):
+            raise TypeError("can't subtract offset-naive and offset-aware datetimes")
+        self.batches.append(rows)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+def test_to_record_defaults_timestamps():
+    """Пустые created_at/updated_at заменяются текущим временем."""
+    now = datetime(2024, 1, 1)
+    record = to_record(post_pb2.Post(title="t", creator_id=5, tags=["a"]), now)
+    assert record == ("t", "", 5, now, now, False, ["a"])
+
+def test_to_record_converts_offset_timestamps_to_utc():
+    """Время со смещением приводится к UTC без часового пояса."""
+    record = to_record(
+        post_pb2.Post(title="t", created_at="2024-01-01T03:00:00+03:00", updated_at="2024-01-01T00:00:00Z"),
+        datetime.utcnow()
+    )
+    assert record[3] == record[4] == datetime(2024, 1, 1)
+    assert record[3].tzinfo is None
+
+def test_to_record_rejects_invalid_rows():
+    with pytest.raises(ValueError, match="Title is required"):
+        to_record(post_pb2.Post(), datetime.utcnow())
+    with pytest.raises(ValueError, match="Invalid timestamp"):
+        to_record(post_pb2.Post(title="t", created_at="yesterday"), datetime.utcnow())
+
+@pytest.mark.asyncio
+async def test_importer_batches_and_isolates_errors():
+    """Посты пишутся пачками; упавшая пачка повторяется по строкам, ошибки получают только плохие строки."""
+    conn = FakeConnection()
+    importer = PostImporter(conn, method="insert", batch_size=3)
+    titles = ["a", "b", "c", "", "d", "bad", "e"]
+    for title in titles:
+        await importer.add(post_pb2.Post(title=title, creator_id=1))
+    await importer.flush()
+
+    summary = importer.summary()
+    assert summary.imported == 5
+    assert summary.failed == 2
+    assert summary.errors[0].index == 3
+    assert summary.errors[0].error == "Title is required"
+    assert summary.errors[1].index == 5
+    # Первая пачка записана целиком, вторая — построчно после сбоя
+    assert [len(batch) for batch in conn.batches] == [3, 1, 1]
+
+@pytest.mark.asyncio
+async def test_importer_reports_encoding_errors_per_row():
+    """Ошибка кодирования значения драйвером не прерывает импорт, а достаётся одной строке."""
+    conn = FakeConnection()
+    importer = PostImporter(conn, method="insert", batch_size=10)
+    for title in ["a", "unencodable", "b"]:
+        await importer.add(post_pb2.Post(title=title, creator_id=1))
+    await importer.flush()
+
+    summary = importer.summary()
+    assert (summary.imported, summary.failed) == (2, 1)
+    assert summary.errors[0].index == 1
+
+class FakeCopyConnection:
+    """Соединение для режима copy: после fail_after успешных пачек соединение с БД обрывается."""
+
+    def __init__(self, fail_after, error):
+        self.fail_after = fail_after
+        self.error = error
+        self.batches = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get_raw_connection(self):
+        return SimpleNamespace(driver_connection=self)
+
+    def transaction(self):
+        return self
+
+    async def copy_records_to_table(self, table, records, columns):
+        if len(self.batches) >= self.fail_after:
+            raise self.error
+        self.batches.append(records)
+
+async def import_requests(titles):
+    yield post_pb2.ImportPostsRequest(posts=[post_pb2.Post(title=title, creator_id=1) for title in titles])
+
+@pytest.mark.parametrize("error", [
+    asyncpg.ConnectionDoesNotExistError("connection was closed in the middle of operation"),
+    asyncpg.InterfaceError("connection is closed"),
+])
+@pytest.mark.asyncio
+async def test_import_posts_returns_summary_when_connection_is_lost(error):
+    """Обрыв соединения прерывает импорт без построчных повторов, но клиент получает сводку и ошибку."""
+    conn = FakeCopyConnection(fail_after=1, error=error)
+    with patch("src.main.engine", SimpleNamespace(connect=lambda: conn)), patch("importer.IMPORT_BATCH_SIZE", 2):
+        response = await PostServiceServicer().ImportPosts(import_requests(["a", "b", "c", "d", "e"]), None)
+    assert (response.imported, response.failed) == (2, 0)
+    assert response.error == str(error)
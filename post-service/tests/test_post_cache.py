@@ -0,0 +1,134 @@
+import asyncio
+import os
+import pytest
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import post_pb2
+from src.main import PostServiceServicer, read_session
+from src.post_cache import PostCache, PostChangeListener
+from src.migrate import run_migrations
+
+TEST_DATABASE_URL = os.getenv("POST_SERVICE_TEST_DATABASE_URL")
+
+def make_post(post_id, updated_at="v1", is_private=False):
+    return post_pb2.Post(id=str(post_id), title="t", creator_id=7, updated_at=updated_at, is_private=is_private)
+
+def test_post_cache_lru_and_stats():
+    """Кэш ограничен по размеру, вытесняет давно не читанные записи и считает попадания."""
+    cache = PostCache(maxsize=2, ttl=60)
+    for post_id in (1, 2):
+        cache.put(post_id, make_post(post_id), cache.epoch)
+    assert cache.get(1).post().id == "1"
+    cache.put(3, make_post(3), cache.epoch)
+    assert cache.get(2) is None
+    assert cache.get(3).updated_at == "v1"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 1, 2)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+def test_post_cache_skips_put_after_invalidation():
+    """Результат чтения, начатого до инвалидации, в кэш не попадает."""
+    cache = PostCache(maxsize=10, ttl=60)
+    epoch = cache.epoch
+    cache.invalidate(1)
+    entry = cache.put(1, make_post(1), epoch)
+    assert entry.post().id == "1"
+    assert cache.get(1) is None
+
+def test_post_cache_ttl():
+    cache = PostCache(maxsize=10, ttl=0)
+    cache.put(1, make_post(1), cache.epoch)
+    assert cache.get(1) is None
+
+class FakeSession:
+    """Сессия БД, из которой GetPost читает пост с заданным заголовком."""
+
+    def __init__(self, title):
+        self.title = title
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, model, post_id):
+        now = datetime(2024, 1, 1)
+        return SimpleNamespace(
+            id=post_id, title=self.title, description="", creator_id=7,
+            created_at=now, updated_at=now, is_private=False, tags=[]
+        )
+
+@pytest.mark.asyncio
+async def test_get_post_fills_cache_from_primary_only():
+    """Промах кэша читается из основной БД, реплика в кэш не попадает."""
+    servicer = PostServiceServicer(PostCache(maxsize=10, ttl=60))
+    request = post_pb2.GetPostRequest(id="1", user_id=8)
+    with patch("src.main.SessionLocal", return_value=FakeSession("new")), \
+            patch("src.main.read_session", return_value=FakeSession("old")):
+        resp = await servicer.GetPost(request, None)
+    assert resp.post.title == "new"
+    assert servicer.cache.get(1).post().title == "new"
+
+class FakeContext:
+    def __init__(self, metadata=()):
+        self.metadata = metadata
+
+    def invocation_metadata(self):
+        return self.metadata
+
+@pytest.mark.asyncio
+async def test_get_post_bypasses_cache_after_write():
+    """С меткой последней записи в метаданных автор читает мимо кэша (read-your-writes)."""
+    servicer = PostServiceServicer(PostCache(maxsize=10, ttl=60))
+    servicer.cache.put(1, make_post(1), servicer.cache.epoch)
+    request = post_pb2.GetPostRequest(id="1", user_id=7)
+    context = FakeContext([("x-last-write-at", str(time.time()))])
+    with patch("src.main.SessionLocal", return_value=FakeSession("changed")):
+        resp = await servicer.GetPost(request, context)
+    assert resp.post.title == "changed"
+
+    # Метка старше окна и битая метка не мешают читать из кэша
+    for metadata in ([("x-last-write-at", str(time.time() - 60))], [("x-last-write-at", "x")], []):
+        resp = await servicer.GetPost(request, FakeContext(metadata))
+        assert resp.post.title == "changed"
+
+def test_read_session_routes_by_last_write():
+    """Чтения идут на реплики, только если окно после последней записи истекло или метки нет."""
+    assert not read_session(time.time()).info["use_replica"]
+    assert read_session(time.time() - 60).info["use_replica"]
+    assert read_session(None).info["use_replica"]
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="POST_SERVICE_TEST_DATABASE_URL не задан")
+@pytest.mark.asyncio
+async def test_listener_invalidates_on_notify():
+    """Изменение поста через другое соединение сбрасывает запись по LISTEN/NOTIFY."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from src.database import to_async_url, to_asyncpg_dsn
+
+    engine = create_async_engine(to_async_url(TEST_DATABASE_URL))
+    cache = PostCache(maxsize=10, ttl=60)
+    listener = PostChangeListener(to_asyncpg_dsn(TEST_DATABASE_URL), cache)
+    try:
+        await run_migrations(engine)
+        await listener.start()
+        async with engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            post_id = await raw.fetchval(
+                "INSERT INTO posts (title, creator_id, is_private) VALUES ('t', 7, false) RETURNING id"
+            )
+            cache.put(post_id, make_post(post_id), cache.epoch)
+            cache.put(post_id + 1, make_post(post_id + 1), cache.epoch)
+            await raw.execute("UPDATE posts SET title = 'changed' WHERE id = $1", post_id)
+            for _ in range(50):
+                if cache.get(post_id) is None:
+                    break
+                await asyncio.sleep(0.02)
+            assert cache.get(post_id) is None
+            assert cache.get(post_id + 1) is not None
+    finally:
+        await listener.close()
+        await engine.dispose()
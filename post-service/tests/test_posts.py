@@ -0,0 +1,239 @@
+import os
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+
+import post_pb2
+from src.main import PostServiceServicer, tags_filter
+from src.pagination import encode_cursor, decode_cursor, encode_search_cursor, decode_search_cursor
+from src.migrate import run_migrations
+
+TEST_DATABASE_URL = os.getenv("POST_SERVICE_TEST_DATABASE_URL")
+
+class FakeSession:
+    """Сессия read_session(): scalars() возвращает заранее заданные строки и запоминает запросы."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def scalars(self, query):
+        self.queries.append(query)
+        return SimpleNamespace(all=lambda: list(self.rows))
+
+class FakeStreamSession(FakeSession):
+    """Серверный курсор: stream_scalars() отдаёт строки порциями по yield_per из запроса."""
+
+    def __init__(self, rows, error=None):
+        super().__init__(rows)
+        self.error = error
+
+    async def stream_scalars(self, query):
+        self.queries.append(query)
+        if self.error:
+            raise self.error
+        size = query.get_execution_options()["yield_per"]
+
+        async def partitions():
+            for start in range(0, len(self.rows), size):
+                yield self.rows[start:start + size]
+        return SimpleNamespace(partitions=partitions)
+
+def make_post(post_id, creator_id=1, is_private=False, created_at=None):
+    created_at = created_at or datetime(2024, 1, 1) - timedelta(minutes=post_id)
+    return SimpleNamespace(
+        id=post_id, title=f"Post {post_id}", description="", creator_id=creator_id,
+        created_at=created_at, updated_at=created_at, is_private=is_private, tags=[]
+    )
+
+def compiled(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+def test_cursor_round_trip():
+    post = make_post(42, created_at=datetime(2024, 5, 6, 7, 8, 9, 123456))
+    assert decode_cursor(encode_cursor(post)) == (post.created_at, 42)
+    assert decode_search_cursor(encode_search_cursor(0.25, 42, post.created_at, 500)) == (
+        (0.25, 42), post.created_at, 500
+    )
+
+@pytest.mark.parametrize("cursor", ["", "%%%", "e30", "WyJ4IiwxXQ", "W251bGwsMV0", "WzEsMiwzXQ"])
+def test_decode_cursor_rejects_garbage(cursor):
+    """Битый курсор (не base64, не JSON, не пара, неверные типы) даёт ValueError("Invalid cursor")."""
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_search_cursor(cursor)
+
+def test_tags_filter_uses_array_operators():
+    """Фильтр по тегам компилируется в && (any) и @> (all), которые обслуживает GIN-индекс."""
+    assert "posts.tags && " in compiled(tags_filter(["a", "b"], post_pb2.TAG_MATCH_ANY))
+    assert "posts.tags @> " in compiled(tags_filter(["a", "b"], post_pb2.TAG_MATCH_ALL))
+    assert tags_filter(["", ""], post_pb2.TAG_MATCH_ALL) is None
+
+@pytest.mark.asyncio
+async def test_list_posts_cursor_page_boundary():
+    """Лишняя строка означает следующую страницу; курсор указывает на последний пост страницы."""
+    posts = [make_post(post_id) for post_id in range(1, 5)]
+    servicer = PostServiceServicer()
+    request = post_pb2.ListPostsRequest(size=3, user_id=1, count_mode=post_pb2.COUNT_NONE, cursor="")
+
+    session = FakeSession(posts)
+    with patch("src.main.read_session", return_value=session):
+        resp = await servicer.ListPosts(request, None)
+    assert [p.id for p in resp.posts] == ["1", "2", "3"]
+    assert resp.has_next
+    assert decode_cursor(resp.next_cursor) == (posts[2].created_at, 3)
+
+    # Следующая страница продолжается с позиции курсора; постов ровно size — конец ленты
+    request.cursor = resp.next_cursor
+    session = FakeSession(posts[3:])
+    with patch("src.main.read_session", return_value=session):
+        resp = await servicer.ListPosts(request, None)
+    sql = compiled(session.queries[0])
+    assert "(posts.created_at, posts.id) < (" in sql
+    assert "ORDER BY posts.created_at DESC, posts.id DESC" in sql
+    assert [p.id for p in resp.posts] == ["4"]
+    assert not resp.has_next
+    assert resp.next_cursor == ""
+
+@pytest.mark.asyncio
+async def test_list_posts_rejects_bad_cursor():
+    request = post_pb2.ListPostsRequest(size=3, user_id=1, count_mode=post_pb2.COUNT_NONE, cursor="%%%")
+    with patch("src.main.read_session", return_value=FakeSession([])):
+        resp = await PostServiceServicer().ListPosts(request, None)
+    assert resp.error == "Invalid cursor"
+
+@pytest.mark.parametrize("size", [0, -1, 101])
+@pytest.mark.asyncio
+async def test_list_posts_rejects_bad_page_size(size):
+    """Размер страницы вне 1..MAX_PAGE_SIZE отклоняется до запроса к БД."""
+    session = FakeSession([make_post(1)])
+    for request in (
+        post_pb2.ListPostsRequest(size=size, user_id=1, cursor=""),
+        post_pb2.ListPostsRequest(size=size, page=1, user_id=1),
+    ):
+        with patch("src.main.read_session", return_value=session):
+            resp = await PostServiceServicer().ListPosts(request, None)
+        assert resp.error == "Page size must be between 1 and 100"
+    assert session.queries == []
+
+@pytest.mark.asyncio
+async def test_list_posts_rejects_bad_page():
+    request = post_pb2.ListPostsRequest(size=10, page=0, user_id=1)
+    resp = await PostServiceServicer().ListPosts(request, None)
+    assert resp.error == "Page must be at least 1"
+
+@pytest.mark.asyncio
+async def test_search_posts_rejects_bad_max_candidates():
+    request = post_pb2.SearchPostsRequest(query="кошка", user_id=1, max_candidates=10001)
+    resp = await PostServiceServicer().SearchPosts(request, None)
+    assert resp.error == "max_candidates must be between 0 and 10000"
+    request = post_pb2.SearchPostsRequest(query="кошка", user_id=1, cursor=encode_search_cursor(0.5, 1, datetime.utcnow(), -1))
+    resp = await PostServiceServicer().SearchPosts(request, None)
+    assert resp.error == "max_candidates must be between 0 and 10000"
+
+async def stream(request, context=None):
+    return [chunk async for chunk in PostServiceServicer().StreamPosts(request, context)]
+
+@pytest.mark.asyncio
+async def test_stream_posts_chunks_and_filters():
+    """Каждая порция курсора уходит отдельным PostChunk; фильтры и видимость попадают в запрос."""
+    session = FakeStreamSession([make_post(post_id) for post_id in range(1, 6)])
+    request = post_pb2.StreamPostsRequest(
+        user_id=1, creator_id=2, tags=["a", "b"], tag_match=post_pb2.TAG_MATCH_ALL
+    )
+    with patch("src.main.STREAM_BATCH_SIZE", 2), patch("src.main.read_session", return_value=session):
+        chunks = await stream(request)
+    assert [[p.id for p in chunk.posts] for chunk in chunks] == [["1", "2"], ["3", "4"], ["5"]]
+    sql = compiled(session.queries[0])
+    assert "posts.is_private = false OR posts.creator_id = " in sql
+    assert "posts.creator_id = %(creator_id_2)s" in sql
+    assert "posts.tags @> " in sql
+    assert "ORDER BY posts.created_at DESC, posts.id DESC" in sql
+
+@pytest.mark.asyncio
+async def test_stream_posts_aborts_on_db_error():
+    context = SimpleNamespace(abort=AsyncMock(), invocation_metadata=lambda: ())
+    session = FakeStreamSession([], error=SQLAlchemyError("boom"))
+    with patch("src.main.read_session", return_value=session):
+        assert await stream(post_pb2.StreamPostsRequest(user_id=1), context) == []
+    context.abort.assert_awaited_once()
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="POST_SERVICE_TEST_DATABASE_URL не задан")
+@pytest.mark.asyncio
+async def test_stream_posts_against_postgres():
+    """Несколько порций серверного курсора; чужие приватные посты не выгружаются, фильтры применяются."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from src.database import to_async_url
+
+    engine = create_async_engine(to_async_url(TEST_DATABASE_URL))
+    start = datetime(2024, 1, 1)
+    # (автор, приватный, теги)
+    posts = [(1, False, ["a"]), (1, True, ["a", "b"]), (2, False, ["b"]), (2, True, ["a"]), (3, False, [])] * 3
+    try:
+        await run_migrations(engine)
+        async with engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            await raw.execute("TRUNCATE posts RESTART IDENTITY")
+            await raw.copy_records_to_table(
+                "posts",
+                records=[
+                    (f"Пост {i}", "", creator_id, start + timedelta(minutes=i), start + timedelta(minutes=i), is_private, tags)
+                    for i, (creator_id, is_private, tags) in enumerate(posts)
+                ],
+                columns=("title", "description", "creator_id", "created_at", "updated_at", "is_private", "tags")
+            )
+
+        def expected(keep):
+            return [str(i + 1) for i in reversed(range(len(posts))) if keep(*posts[i])]
+
+        with patch("src.main.STREAM_BATCH_SIZE", 2), \
+                patch("src.main.read_session", lambda last_write=None: AsyncSession(engine)):
+            chunks = await stream(post_pb2.StreamPostsRequest(user_id=1))
+            assert len(chunks) > 1 and all(len(chunk.posts) <= 2 for chunk in chunks)
+            assert [p.id for chunk in chunks for p in chunk.posts] == expected(
+                lambda creator_id, is_private, tags: not is_private or creator_id == 1
+            )
+
+            chunks = await stream(post_pb2.StreamPostsRequest(user_id=1, creator_id=2))
+            assert [p.id for chunk in chunks for p in chunk.posts] == expected(
+                lambda creator_id, is_private, tags: creator_id == 2 and not is_private
+            )
+
+            chunks = await stream(post_pb2.StreamPostsRequest(user_id=2, tags=["a"], tag_match=post_pb2.TAG_MATCH_ANY))
+            assert [p.id for chunk in chunks for p in chunk.posts] == expected(
+                lambda creator_id, is_private, tags: "a" in tags and (not is_private or creator_id == 2)
+            )
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_batch_get_posts_order_and_errors():
+    """Результаты идут в порядке запроса; для каждого id — пост или своя ошибка."""
+    posts = [make_post(2, creator_id=9, is_private=True), make_post(3), make_post(1)]
+    request = post_pb2.BatchGetPostsRequest(ids=["3", "x", "1", "2", "404", "3"], user_id=1)
+    with patch("src.main.read_session", return_value=FakeSession(posts)):
+        resp = await PostServiceServicer().BatchGetPosts(request, None)
+    assert [(r.id, r.post.id, r.error) for r in resp.results] == [
+        ("3", "3", ""),
+        ("x", "", "Invalid id"),
+        ("1", "1", ""),
+        ("2", "", "Unauthorized"),
+        ("404", "", "Post not found"),
+        ("3", "3", ""),
+    ]
+
+@pytest.mark.asyncio
+async def test_batch_get_posts_size_limit():
+    request = post_pb2.BatchGetPostsRequest(ids=[str(i) for i in range(101)], user_id=1)
+    resp = await PostServiceServicer().BatchGetPosts(request, None)
+    assert resp.error == "Batch size exceeds 100"
@@ -0,0 +1,54 @@
+import os
+import pytest
+from datetime import datetime, timedelta
+
+from src.migrate import run_migrations
+
+TEST_DATABASE_URL = os.getenv("POST_SERVICE_TEST_DATABASE_URL")
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="POST_SERVICE_TEST_DATABASE_URL не задан")
+@pytest.mark.asyncio
+async def test_search_candidates_are_bounded_and_stable():
+    """С max_candidates ранжируются только самые свежие совпадения до границы; новые посты набор не сдвигают."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from src.database import to_async_url
+    from src.main import visible_to
+    from src.search import search_posts
+
+    engine = create_async_engine(to_async_url(TEST_DATABASE_URL))
+    insert_sql = (
+        "INSERT INTO posts (title, description, creator_id, created_at, updated_at, is_private) "
+        "VALUES ($1, 'кошка', 1, $2, $2, false) RETURNING id"
+    )
+    try:
+        await run_migrations(engine)
+        async with engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            await raw.execute("TRUNCATE posts")
+            start = datetime(2024, 1, 1)
+            ids = [await raw.fetchval(insert_sql, f"Пост {i}", start + timedelta(minutes=i)) for i in range(5)]
+
+        bound = datetime.utcnow()
+        async with AsyncSession(engine) as db:
+            first, truncated = await search_posts(db, "кошка", visible_to(1), 2, bound, max_candidates=3)
+        assert truncated
+        assert len(first) == 2
+
+        async with engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            await raw.fetchval(insert_sql, "Новый пост", datetime.utcnow() + timedelta(seconds=1))
+
+        after = (first[-1][1], first[-1][0].id)
+        async with AsyncSession(engine) as db:
+            second, truncated = await search_posts(db, "кошка", visible_to(1), 2, bound, after, max_candidates=3)
+        assert truncated
+        # Вместе страницы дают ровно трёх самых свежих кандидатов на момент первой страницы
+        assert sorted(row[0].id for row in first + second) == sorted(ids[-3:])
+
+        # Без max_candidates ранжируются все совпадения до границы, новый пост в выдачу не попадает
+        async with AsyncSession(engine) as db:
+            rows, truncated = await search_posts(db, "кошка", visible_to(1), 10, bound)
+        assert not truncated
+        assert sorted(row[0].id for row in rows) == sorted(ids)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,121 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from google.protobuf.field_mask_pb2 import FieldMask
+from sqlalchemy.dialects import postgresql
+
+import post_pb2
+from src.main import PostServiceServicer, update_values
+from src.post_cache import PostCache
+
+def test_update_values_by_mask():
+    """Меняются только поля из маски; пустое значение очищает поле."""
+    post = post_pb2.Post(title="New", is_private=True, tags=["a"])
+    values = update_values(post, FieldMask(paths=["title", "description"]))
+    assert values.pop("updated_at")
+    assert values == {"title": "New", "description": ""}
+
+def test_update_values_without_mask():
+    """Без маски — прежнее поведение: пустые поля не меняются, is_private перезаписывается."""
+    values = update_values(post_pb2.Post(title="New"), FieldMask())
+    values.pop("updated_at")
+    assert values == {"title": "New", "is_private": False}
+
+def test_update_values_rejects_bad_mask():
+    with pytest.raises(ValueError, match="Invalid update mask path"):
+        update_values(post_pb2.Post(), FieldMask(paths=["creator_id"]))
+    with pytest.raises(ValueError, match="Title is required"):
+        update_values(post_pb2.Post(), FieldMask(paths=["title"]))
+
+class FakeConnection:
+    """Соединение autocommit_engine: execute() отдаёт строку RETURNING (или None), scalar() — id из проверки владельца."""
+
+    def __init__(self, row=None, existing_id=None):
+        self.row = row
+        self.existing_id = existing_id
+        self.queries = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query):
+        self.queries.append(query)
+        return SimpleNamespace(first=lambda: self.row)
+
+    async def scalar(self, query):
+        self.queries.append(query)
+        return self.existing_id
+
+def make_row(post_id=5, creator_id=7, title="New"):
+    now = datetime(2024, 1, 1)
+    return SimpleNamespace(
+        id=post_id, title=title, description="old", creator_id=creator_id,
+        created_at=now, updated_at=now, is_private=False, tags=[]
+    )
+
+def compiled(query):
+    return query.compile(dialect=postgresql.dialect())
+
+def servicer_with_cached_post():
+    servicer = PostServiceServicer(PostCache(maxsize=10, ttl=60))
+    servicer.cache.put(5, post_pb2.Post(id="5", creator_id=7), servicer.cache.epoch)
+    return servicer
+
+@pytest.mark.asyncio
+async def test_update_post_by_mask():
+    """UPDATE ... WHERE id AND creator_id меняет только поля из маски и сбрасывает пост в кэше."""
+    servicer = servicer_with_cached_post()
+    request = post_pb2.UpdatePostRequest(
+        post=post_pb2.Post(id="5", creator_id=7, title="New", description="ignored"),
+        update_mask=FieldMask(paths=["title"])
+    )
+    conn = FakeConnection(row=make_row())
+    with patch("src.main.autocommit_engine", SimpleNamespace(connect=lambda: conn)):
+        resp = await servicer.UpdatePost(request, None)
+    assert not resp.error
+    assert (resp.post.id, resp.post.title, resp.post.description) == ("5", "New", "old")
+    query = compiled(conn.queries[0])
+    assert sorted(query.params) == ["creator_id_1", "id_1", "title", "updated_at"]
+    assert (query.params["title"], query.params["id_1"], query.params["creator_id_1"]) == ("New", 5, 7)
+    assert servicer.cache.get(5) is None
+
+@pytest.mark.parametrize("method, request_", [
+    ("UpdatePost", post_pb2.UpdatePostRequest(post=post_pb2.Post(id="5", creator_id=8, title="New"))),
+    ("DeletePost", post_pb2.DeletePostRequest(id="5", user_id=8)),
+])
+@pytest.mark.parametrize("existing_id, error", [(5, "Unauthorized"), (None, "Post not found")])
+@pytest.mark.asyncio
+async def test_change_without_matching_row(method, request_, existing_id, error):
+    """Ни одна строка не изменена: чужой пост — Unauthorized, отсутствующий — Post not found; кэш не трогается."""
+    servicer = servicer_with_cached_post()
+    conn = FakeConnection(row=None, existing_id=existing_id)
+    with patch("src.main.autocommit_engine", SimpleNamespace(connect=lambda: conn)):
+        resp = await getattr(servicer, method)(request_, None)
+    assert resp.error == error
+    assert len(conn.queries) == 2
+    assert servicer.cache.get(5) is not None
+
+@pytest.mark.asyncio
+async def test_delete_post():
+    servicer = servicer_with_cached_post()
+    conn = FakeConnection(row=make_row())
+    with patch("src.main.autocommit_engine", SimpleNamespace(connect=lambda: conn)):
+        resp = await servicer.DeletePost(post_pb2.DeletePostRequest(id="5", user_id=7), None)
+    assert not resp.error and resp.post.id == "5"
+    query = compiled(conn.queries[0])
+    assert str(query).startswith("DELETE FROM posts WHERE posts.id = ")
+    assert (query.params["id_1"], query.params["creator_id_1"]) == (5, 7)
+    assert len(conn.queries) == 1
+    assert servicer.cache.get(5) is None
+
+@pytest.mark.asyncio
+async def test_change_rejects_invalid_id():
+    servicer = PostServiceServicer()
+    resp = await servicer.UpdatePost(post_pb2.UpdatePostRequest(post=post_pb2.Post(id="x", title="New")), None)
+    assert resp.error == "Invalid id"
+    resp = await servicer.DeletePost(post_pb2.DeletePostRequest(id="x", user_id=7), None)
+    assert resp.error == "Invalid id"
@@ -0,0 +1,221 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pydantic import ValidationError
+from . import models
+from .database import engine
+from .hashing import pwd_context
+from .schemas import UserImport
+
+# Массовый импорт пользователей (например, при подключении партнёра):
+#   python -m src.bulk_import users.ndjson [--format csv] [--batch-size 5000] [--workers 8]
+# Строка — объект с полями UserImport: пароль в открытом виде (password)
+# или готовый bcrypt-хэш (hashed_password), тогда bcrypt не нужен вовсе.
+
+# Сколько пользователей пишется в БД одной транзакцией
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 5000))
+# Потоков для bcrypt: библиотека отпускает GIL, поэтому хэширование идёт на всех ядрах
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", os.cpu_count() or 1))
+# Сколько ошибок по строкам сохранить в отчёте
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 10000))
+
+COLUMNS = (
+    "login", "email", "hashed_password", "first_name", "last_name",
+    "date_of_birth", "phone", "created_at", "updated_at",
+)
+
+# Пачка сначала копируется (COPY) во временную таблицу, затем переносится в users
+# одним INSERT ... ON CONFLICT DO NOTHING. RETURNING показывает, какие строки вставлены,
+# остальные конфликтуют с уже существующими логином или email.
+STAGING_TABLE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS users_import (
+    login varchar, email varchar, hashed_password varchar, first_name varchar, last_name varchar,
+    date_of_birth date, phone varchar, created_at timestamp, updated_at timestamp
+) ON COMMIT DELETE ROWS
+"""
+INSERT_SQL = (
+    f"INSERT INTO users ({', '.join(COLUMNS)}) SELECT {', '.join(COLUMNS)} FROM users_import "
+    "ON CONFLICT DO NOTHING RETURNING login"
+)
+
+# Строки файла с номерами. Битая строка NDJSON не прерывает импорт, а попадает в отчёт.
+def read_records(path: str, fmt: str = None):
+    fmt = fmt or ("csv" if path.endswith(".csv") else "ndjson")
+    stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if fmt == "csv":
+            # Пустые ячейки CSV — отсутствующие значения; строка 1 — заголовок
+            for line, row in enumerate(csv.DictReader(stream), start=2):
+                yield line, {key: value for key, value in row.items() if value not in ("", None)}
+            return
+        for line, text in enumerate(stream, start=1):
+            if not text.strip():
+                continue
+            try:
+                yield line, json.loads(text)
+            except json.JSONDecodeError:
+                yield line, ValueError("Invalid JSON")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in e.errors()
+    )
+
+def hash_password(user: UserImport) -> str:
+    if user.password is None:
+        return user.hashed_password
+    return pwd_context.hash(user.password)
+
+# Буферизует пользователей и пишет их пачками по batch_size; каждая пачка — своя
+# транзакция. Пароли пачки хэшируются параллельно в пуле из workers потоков;
+# ошибка хэширования попадает в отчёт по своей строке.
+# conn — соединение asyncpg.
+class UserImporter:
+    def __init__(self, conn, batch_size: int = None, workers: int = None):
+        self.conn = conn
+        self.batch_size = max(1, batch_size or IMPORT_BATCH_SIZE)
+        self.imported = 0
+        self.conflicts = 0
+        self.invalid = 0
+        self.errors = []
+        self._batch = []
+        self._staging_ready = False
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers or IMPORT_HASH_WORKERS))
+
+    def _fail(self, line: int, error: str):
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    async def add(self, line: int, data):
+        try:
+            if isinstance(data, Exception):
+                raise data
+            user = UserImport.model_validate(data)
+            if user.hashed_password is not None and pwd_context.identify(user.hashed_password, required=False) is None:
+                raise ValueError("Unsupported password hash")
+        except ValidationError as e:
+            self.invalid += 1
+            self._fail(line, validation_message(e))
+            return
+        except ValueError as e:
+            self.invalid += 1
+            self._fail(line, str(e))
+            return
+        self._batch.append((line, user))
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    # Повторы логина или email внутри пачки отсекаются заранее: тогда логин
+    # однозначно указывает на строку, и RETURNING login хватает для отчёта
+    def _dedupe(self, batch):
+        logins, emails, unique = set(), set(), []
+        for line, user in batch:
+            if user.login in logins:
+                self.conflicts += 1
+                self._fail(line, "Duplicate login in input")
+            elif user.email in emails:
+                self.conflicts += 1
+                self._fail(line, "Duplicate email in input")
+            else:
+                logins.add(user.login)
+                emails.add(user.email)
+                unique.append((line, user))
+        return unique
+
+    async def flush(self):
+        batch, self._batch = self._dedupe(self._batch), []
+        if not batch:
+            return
+        # Каждая строка хэшируется отдельной задачей: пароль, который bcrypt не принимает
+        # (например, длиннее 72 байт), исключает из пачки только свою строку
+        loop = asyncio.get_running_loop()
+        hashes = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, hash_password, user) for _, user in batch),
+            return_exceptions=True
+        )
+        hashed_batch = []
+        for (line, user), hashed in zip(batch, hashes):
+            if isinstance(hashed, ValueError):
+                self.invalid += 1
+                self._fail(line, str(hashed) or "Invalid password")
+            elif isinstance(hashed, BaseException):
+                raise hashed
+            else:
+                hashed_batch.append((line, user, hashed))
+        batch = [(line, user) for line, user, _ in hashed_batch]
+        if not batch:
+            return
+        now = datetime.utcnow()
+        records = [
+            (u.login, u.email, hashed, u.first_name, u.last_name, u.date_of_birth, u.phone, now, now)
+            for _, u, hashed in hashed_batch
+        ]
+        async with self.conn.transaction():
+            if not self._staging_ready:
+                await self.conn.execute(STAGING_TABLE_SQL)
+                self._staging_ready = True
+            await self.conn.copy_records_to_table("users_import", records=records, columns=COLUMNS)
+            inserted = {row["login"] for row in await self.conn.fetch(INSERT_SQL)}
+        for line, user in batch:
+            if user.login in inserted:
+                self.imported += 1
+            else:
+                self.conflicts += 1
+                self._fail(line, "Login or email already exists")
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def summary(self) -> dict:
+        return {
+            "imported": self.imported,
+            "conflicts": self.conflicts,
+            "invalid": self.invalid,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+        }
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Массовый импорт пользователей из NDJSON или CSV")
+    parser.add_argument("path", help="файл NDJSON или CSV; - — NDJSON из stdin")
+    parser.add_argument("--format", choices=("ndjson", "csv"), help="по умолчанию — по расширению файла")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=IMPORT_HASH_WORKERS, help="потоков bcrypt")
+    parser.add_argument("--errors", help="файл для ошибок по строкам (NDJSON); по умолчанию stderr")
+    args = parser.parse_args(argv)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    try:
+        async with engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            importer = UserImporter(raw, args.batch_size, args.workers)
+            try:
+                for line, data in read_records(args.path, args.format):
+                    await importer.add(line, data)
+                await importer.flush()
+            finally:
+                importer.close()
+    finally:
+        await engine.dispose()
+
+    summary = importer.summary()
+    errors = open(args.errors, "w", encoding="utf-8") if args.errors else sys.stderr
+    try:
+        for error in summary.pop("errors"):
+            errors.write(json.dumps(error, ensure_ascii=False) + "\n")
+    finally:
+        if errors is not sys.stderr:
+            errors.close()
+    print(json.dumps(summary))
+    return summary
+
+if __name__ == "__main__":
+    asyncio.run(main())
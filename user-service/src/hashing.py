@@ -0,0 +1,52 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+
+# Стоимость bcrypt (2^rounds итераций); уже сохранённые хэши с другой стоимостью проверяются как раньше
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Потоков для bcrypt: библиотека отпускает GIL, поэтому потоки занимают ядра параллельно
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+# Сколько операций может ждать свободного потока; сверх этого — 503
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", 32))
+# Значение Retry-After (секунды) в ответе 503
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", 1))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+class HasherBusy(Exception):
+    pass
+
+# Отдельный пул для bcrypt. /login и /register не занимают общий пул потоков AnyIO,
+# в котором выполняются синхронные эндпоинты и зависимости (например, /profile).
+# Число операций в работе и в очереди ограничено: при переполнении
+# новые запросы сразу отклоняются, а не копят задержку.
+class PasswordHasher:
+    def __init__(self, workers: int = HASH_WORKERS, queue_limit: int = HASH_QUEUE_LIMIT):
+        self.workers = max(1, workers)
+        self.limit = self.workers + max(0, queue_limit)
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, func, *args):
+        # Счётчик меняется только в потоке event loop, блокировка не нужна
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise HasherBusy()
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, password, hashed_password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher()
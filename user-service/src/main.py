@@ -1,22 +1,37 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Query
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from sqlalchemy import Integer, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 from .database import SessionLocal, engine, Base
 from . import models, schemas
-from passlib.context import CryptContext
+from .hashing import HASH_RETRY_AFTER, HasherBusy, password_hasher
+from .user_cache import UserCacheCollector, user_cache, user_version
 from datetime import datetime, timedelta
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 import jwt
+import os
 
-# Конфигурация JWT
-SECRET_KEY = "your_secret_key"
-ALGORITHM = "HS256"
+# Конфигурация JWT (те же значения использует API-сервис для локальной проверки токенов)
+SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your_secret_key")
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Максимум id в одном запросе /users:batch
+MAX_BATCH_SIZE = 100
 
-# Создаем таблицы, если их нет
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Создаем таблицы, если их нет
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield
+    password_hasher.shutdown()
+    await engine.dispose()
 
-app = FastAPI(title="User Service with JWT")
+app = FastAPI(title="User Service with JWT", lifespan=lifespan)
 
 # Добавляем CORS middleware для разрешения запросов из других источников (например, Swagger UI API-сервиса)
 app.add_middleware(
@@ -27,33 +42,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Статистика кэша профилей; у каждого воркера gunicorn свой кэш и свои счётчики
+REGISTRY.register(UserCacheCollector(user_cache))
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
 
 # Обновляем OAuth2PasswordBearer, чтобы tokenUrl был внешним URL, доступным из браузера
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="http://localhost:8001/login")
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
 
-def get_user_by_login(db: Session, login: str):
-    return db.query(models.User).filter(models.User.login == login).first()
-
-def get_user_by_email(db: Session, email: str):
-    return db.query(models.User).filter(models.User.email == email).first()
+# Пул bcrypt переполнен: клиенту предлагается повторить запрос позже
+@app.exception_handler(HasherBusy)
+async def hasher_busy_handler(request: Request, exc: HasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many authentication requests, try again later"},
+        headers={"Retry-After": str(HASH_RETRY_AFTER)},
+    )
 
-def authenticate_user(db: Session, login: str, password: str):
-    user = get_user_by_login(db, login)
-    if not user or not verify_password(password, user.hashed_password):
+# bcrypt выполняется в отдельном пуле (hashing.PasswordHasher)
+async def verify_password(plain_password, hashed_password):
+    return await password_hasher.verify(plain_password, hashed_password)
+
+async def get_password_hash(password):
+    return await password_hasher.hash(password)
+
+async def get_user_by_login(db: AsyncSession, login: str):
+    return await db.scalar(select(models.User).where(models.User.login == login))
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(models.User).where(models.User.email == email))
+
+# Только публичные поля, одним запросом WHERE id = ANY(:ids)
+async def get_public_users(db: AsyncSession, ids: list):
+    query = select(
+        models.User.id, models.User.login, models.User.first_name, models.User.last_name
+    ).where(models.User.id == any_(bindparam("ids", value=ids, type_=ARRAY(Integer))))
+    return (await db.execute(query)).all()
+
+# Перед bcrypt сессия закрывается: иначе соединение из пула было бы занято
+# всё время хэширования, и при шторме логинов /profile ждал бы свободного соединения.
+# Загруженные атрибуты пользователя после закрытия остаются доступны.
+async def authenticate_user(db: AsyncSession, login: str, password: str):
+    user = await get_user_by_login(db, login)
+    await db.close()
+    if not user or not await verify_password(password, user.hashed_password):
         return None
     return user
 
@@ -69,15 +107,16 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 
 # Регистрация нового пользователя
 @app.post("/register", response_model=schemas.UserOut)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    if get_user_by_login(db, user.login):
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    if await get_user_by_login(db, user.login):
         raise HTTPException(status_code=400, detail="User with this login already exists")
-    if get_user_by_email(db, user.email):
+    if await get_user_by_email(db, user.email):
         raise HTTPException(status_code=400, detail="Email already in use")
+    await db.close()
     db_user = models.User(
         login=user.login,
         email=user.email,
-        hashed_password=get_password_hash(user.password),
+        hashed_password=await get_password_hash(user.password),
         first_name=user.first_name,
         last_name=user.last_name,
         date_of_birth=user.date_of_birth,
@@ -86,24 +125,26 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
         updated_at=datetime.utcnow()
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 # Логин и генерация JWT токена
 @app.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect login or password")
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.login}, expires_delta=access_token_expires
+        data={"sub": user.login, "uid": user.id, "ver": user_version(user)}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-# Функция для получения текущего пользователя из JWT
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# Функция для получения текущего пользователя из JWT.
+# Для токенов с uid профиль берётся из кэша без запроса к БД; сессия get_db
+# соединение при этом не занимает. Старые токены без uid ищутся по логину.
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> schemas.UserOut:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -116,34 +157,62 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
-    user = get_user_by_login(db, login)
+    user_id = payload.get("uid")
+    if user_id is not None:
+        cached = user_cache.get(user_id, min_version=payload.get("ver", 0))
+        if cached is not None:
+            return cached
+        user = await db.get(models.User, user_id)
+    else:
+        user = await get_user_by_login(db, login)
     if user is None:
         raise credentials_exception
-    return user
+    return user_cache.put(user)
 
 # Получение профиля пользователя (защищенный эндпоинт)
 @app.get("/profile", response_model=schemas.UserOut)
-def get_profile(current_user: models.User = Depends(get_current_user)):
+async def get_profile(current_user: schemas.UserOut = Depends(get_current_user)):
     return current_user
 
 # Обновление профиля пользователя
 @app.put("/profile", response_model=schemas.UserOut)
-def update_profile(update: schemas.UserUpdate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def update_profile(update: schemas.UserUpdate, current_user: schemas.UserOut = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    # Изменение всегда идёт по свежей строке из БД, а не по кэшу
+    user = await db.get(models.User, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
     if update.first_name is not None:
-        current_user.first_name = update.first_name
+        user.first_name = update.first_name
     if update.last_name is not None:
-        current_user.last_name = update.last_name
+        user.last_name = update.last_name
     if update.date_of_birth is not None:
-        current_user.date_of_birth = update.date_of_birth
+        user.date_of_birth = update.date_of_birth
     if update.email is not None:
-        existing_user_by_email = get_user_by_email(db, update.email)
-        if existing_user_by_email and existing_user_by_email.id != current_user.id:
+        existing_user_by_email = await get_user_by_email(db, update.email)
+        if existing_user_by_email and existing_user_by_email.id != user.id:
             raise HTTPException(status_code=400, detail="Email already in use")
-        current_user.email = update.email
+        user.email = update.email
     if update.phone is not None:
-        current_user.phone = update.phone
+        user.phone = update.phone
 
-    current_user.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    user.updated_at = datetime.utcnow()
+    await db.commit()
+    user_cache.invalidate(user.id)
+    return user
+
+# Публичные профили нескольких пользователей (например, авторов постов на странице).
+# Несуществующие id пропускаются, порядок ответа — по возрастанию id.
+@app.get("/users:batch", response_model=schemas.UserBatch)
+async def batch_get_users(
+    ids: str = Query(..., description="Идентификаторы пользователей через запятую"),
+    current_user: schemas.UserOut = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_ids = sorted({int(value) for value in ids.split(",") if value.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid id")
+    if len(user_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Too many ids (max {MAX_BATCH_SIZE})")
+    users = await get_public_users(db, user_ids) if user_ids else []
+    return {"users": [schemas.UserPublic.model_validate(user) for user in users]}
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, model_validator
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 
 class UserBase(BaseModel):
     login: str
@@ -28,3 +28,27 @@ class UserUpdate(BaseModel):
     date_of_birth: Optional[date] = None
     email: Optional[EmailStr] = None
     phone: Optional[str] = None
+
+# Публичная часть профиля (без email, телефона и даты рождения)
+class UserPublic(BaseModel):
+    id: int
+    login: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class UserBatch(BaseModel):
+    users: List[UserPublic]
+
+# Строка массового импорта (bulk_import): пароль в открытом виде или готовый bcrypt-хэш
+class UserImport(UserBase):
+    password: Optional[str] = None
+    hashed_password: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_password(self):
+        if (self.password is None) == (self.hashed_password is None):
+            raise ValueError("Exactly one of password and hashed_password is required")
+        return self
@@ -0,0 +1,83 @@
+import os
+import time
+from collections import OrderedDict
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from . import schemas
+
+# Размер LRU-кэша профилей для get_current_user (0 — кэш выключен)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+# Сколько секунд профиль живёт в кэше: ограничивает устаревание,
+# если профиль изменили через другой экземпляр сервиса
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 30))
+
+# Версия профиля — время последнего изменения в микросекундах.
+# Попадает в claim "ver" токена при логине.
+def user_version(user) -> int:
+    return int(user.updated_at.timestamp() * 1_000_000)
+
+# Ограниченный по размеру (LRU) кэш UserOut по id пользователя.
+# Запись не отдаётся, если она старше версии из токена: профиль заведомо менялся
+# после её загрузки (например, через другой экземпляр сервиса).
+class UserCache:
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+
+    def get(self, user_id: int, min_version: int = 0):
+        entry = self._data.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, version, expires_at = entry
+        if expires_at <= time.monotonic() or version < min_version:
+            del self._data[user_id]
+            self.misses += 1
+            return None
+        self._data.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def put(self, user) -> schemas.UserOut:
+        user_out = schemas.UserOut.model_validate(user)
+        if self.maxsize <= 0:
+            return user_out
+        self._data[user_out.id] = (user_out, user_version(user), time.monotonic() + self.ttl)
+        self._data.move_to_end(user_out.id)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return user_out
+
+    def invalidate(self, user_id: int):
+        self.invalidations += 1
+        self._data.pop(user_id, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+# Экспорт статистики кэша в Prometheus (снимается в момент запроса /metrics)
+class UserCacheCollector:
+    def __init__(self, cache: UserCache):
+        self.cache = cache
+
+    def collect(self):
+        stats = self.cache.stats()
+        yield CounterMetricFamily("user_cache_hits", "Попадания в кэш профилей", value=stats["hits"])
+        yield CounterMetricFamily("user_cache_misses", "Промахи кэша профилей", value=stats["misses"])
+        yield CounterMetricFamily(
+            "user_cache_invalidations", "Инвалидации записей кэша профилей", value=stats["invalidations"]
+        )
+        yield GaugeMetricFamily("user_cache_size", "Число записей в кэше профилей", value=stats["size"])
+
+user_cache = UserCache()
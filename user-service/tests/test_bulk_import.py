@@ -0,0 +1,102 @@
+import json
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+from src.bulk_import import UserImporter, hash_password, read_records
+from src.hashing import pwd_context
+
+# Соединение asyncpg без БД: логины из existing уже заняты
+class FakeConnection:
+    def __init__(self, existing=()):
+        self.existing = set(existing)
+        self.copied = []
+        self.staging = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+        self.staging = []
+
+    async def execute(self, sql):
+        pass
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.staging = [dict(zip(columns, record)) for record in records]
+        self.copied.extend(self.staging)
+
+    async def fetch(self, sql):
+        rows = [row for row in self.staging if row["login"] not in self.existing]
+        self.existing.update(row["login"] for row in rows)
+        return [{"login": row["login"]} for row in rows]
+
+def test_read_records_ndjson_and_csv(tmp_path):
+    """NDJSON и CSV читаются построчно с номерами строк; битый JSON не прерывает чтение."""
+    ndjson = tmp_path / "users.ndjson"
+    ndjson.write_text('{"login": "a"}\n\nnot json\n{"login": "b"}\n', encoding="utf-8")
+    records = list(read_records(str(ndjson)))
+    assert [line for line, _ in records] == [1, 3, 4]
+    assert records[0][1] == {"login": "a"}
+    assert isinstance(records[1][1], ValueError)
+
+    table = tmp_path / "users.csv"
+    table.write_text("login,email,phone\na,a@example.com,\n", encoding="utf-8")
+    assert list(read_records(str(table))) == [(2, {"login": "a", "email": "a@example.com"})]
+
+@pytest.mark.asyncio
+async def test_user_importer_reports_rows():
+    """Пароли хэшируются, готовые хэши сохраняются как есть, ошибки и конфликты — по строкам."""
+    prehashed = pwd_context.hash("secret")
+    conn = FakeConnection(existing={"taken"})
+    rows = [
+        {"login": "alice", "email": "alice@example.com", "password": "pw"},
+        {"login": "bob", "email": "bob@example.com", "hashed_password": prehashed},
+        {"login": "taken", "email": "taken@example.com", "password": "pw"},
+        {"login": "alice", "email": "alice2@example.com", "password": "pw"},
+        {"login": "carol", "email": "not-an-email", "password": "pw"},
+        {"login": "dave", "email": "dave@example.com"},
+        {"login": "erin", "email": "erin@example.com", "hashed_password": "plain"},
+    ]
+
+    importer = UserImporter(conn, batch_size=100, workers=2)
+    for line, row in enumerate(rows, start=1):
+        await importer.add(line, row)
+    await importer.flush()
+    importer.close()
+
+    summary = importer.summary()
+    assert (summary["imported"], summary["conflicts"], summary["invalid"]) == (2, 2, 3)
+    assert [error["line"] for error in summary["errors"]] == [3, 4, 5, 6, 7]
+    assert summary["errors"][0]["error"] == "Login or email already exists"
+    assert summary["errors"][1]["error"] == "Duplicate login in input"
+    copied = {row["login"]: row for row in conn.copied}
+    assert pwd_context.verify("pw", copied["alice"]["hashed_password"])
+    assert copied["bob"]["hashed_password"] == prehashed
+    json.dumps(summary)
+
+@pytest.mark.asyncio
+async def test_user_importer_reports_hash_errors_per_row():
+    """Пароль, который bcrypt отклоняет, попадает в отчёт своей строкой и не прерывает импорт пачки."""
+    def strict_hash(user):
+        # Поведение bcrypt >= 4.1: длинный пароль не обрезается, а отклоняется
+        if user.password is not None and len(user.password.encode()) > 72:
+            raise ValueError("password cannot be longer than 72 bytes")
+        return hash_password(user)
+
+    conn = FakeConnection()
+    rows = [
+        {"login": "alice", "email": "alice@example.com", "password": "pw"},
+        {"login": "bob", "email": "bob@example.com", "password": "ж" * 40},
+        {"login": "carol", "email": "carol@example.com", "password": "pw"},
+    ]
+    importer = UserImporter(conn, batch_size=100, workers=2)
+    with patch("src.bulk_import.hash_password", strict_hash):
+        for line, row in enumerate(rows, start=1):
+            await importer.add(line, row)
+        await importer.flush()
+    importer.close()
+
+    summary = importer.summary()
+    assert (summary["imported"], summary["conflicts"], summary["invalid"]) == (2, 0, 1)
+    assert summary["errors"] == [{"line": 2, "error": "password cannot be longer than 72 bytes"}]
+    assert [row["login"] for row in conn.copied] == ["alice", "carol"]
@@ -1,13 +1,25 @@
+import asyncio
 import os
+import time
 import jwt
+import pytest
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock, patch
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Устанавливаем переменную окружения для тестовой базы, чтобы не пытаться подключаться к "db"
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 
-from src.main import app, SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, get_db, get_current_user
+from src.main import (
+    app, SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, get_db, get_current_user,
+    get_user_by_login, get_user_by_email, create_access_token
+)
+from src.database import Base, make_engine
+from src.models import User
+from src.user_cache import user_cache, user_version
+from src.hashing import HasherBusy, PasswordHasher
 
 client = TestClient(app)
 
@@ -27,15 +39,17 @@ class DummyUser:
 
 dummy_user = DummyUser()
 
-# Переопределим зависимость get_db, чтобы возвращалась фейковая сессия
-def fake_get_db():
+# Переопределим зависимость get_db, чтобы возвращалась фейковая асинхронная сессия
+async def fake_get_db():
     fake_db = MagicMock()
     fake_db.add = MagicMock()
-    fake_db.commit = MagicMock()
+    fake_db.commit = AsyncMock()
+    fake_db.close = AsyncMock()
     # Определяем функцию refresh, которая устанавливает id в 1
-    def fake_refresh(user):
+    async def fake_refresh(user):
         user.id = 1
-    fake_db.refresh.side_effect = fake_refresh
+    fake_db.refresh = AsyncMock(side_effect=fake_refresh)
+    fake_db.get = AsyncMock(return_value=dummy_user)
     yield fake_db
 
 app.dependency_overrides[get_db] = fake_get_db
@@ -76,6 +90,8 @@ def test_login_success():
         token = data["access_token"]
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         assert payload.get("sub") == "testuser"
+        assert payload.get("uid") == dummy_user.id
+        assert payload.get("ver") == int(dummy_user.updated_at.timestamp() * 1_000_000)
 
 def test_get_profile():
     # Переопределяем get_current_user, чтобы возвращался dummy_user
@@ -102,3 +118,89 @@ def test_update_profile():
         assert data["first_name"] == "Updated"
         assert data["email"] == "updated@example.com"
     app.dependency_overrides.pop(get_current_user, None)
+
+def test_login_hasher_busy():
+    """Переполненный пул bcrypt даёт 503 с Retry-After, а не очередь без предела."""
+    with patch("src.main.authenticate_user", side_effect=HasherBusy()):
+        response = client.post("/login", data={"username": "testuser", "password": "pass"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+@pytest.mark.asyncio
+async def test_password_hasher_admission_limit():
+    """Сверх workers + queue_limit операции сразу отклоняются; хэш проверяется в пуле."""
+    hasher = PasswordHasher(workers=1, queue_limit=1)
+    slow = [asyncio.ensure_future(hasher._run(time.sleep, 0.2)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    with pytest.raises(HasherBusy):
+        await hasher._run(time.sleep, 0)
+    await asyncio.gather(*slow)
+    hashed = await hasher.hash("secret")
+    assert await hasher.verify("secret", hashed)
+    assert not await hasher.verify("wrong", hashed)
+    assert hasher.in_flight == 0 and hasher.rejected == 1
+    hasher.shutdown()
+
+@pytest.mark.asyncio
+async def test_async_user_queries():
+    """Асинхронные запросы пользователя по логину и email на настоящей (sqlite) БД."""
+    engine = make_engine("sqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        db.add(User(
+            login="alice", email="alice@example.com", hashed_password="x",
+            created_at=datetime(2025, 1, 1), updated_at=datetime(2025, 1, 1)
+        ))
+        await db.commit()
+        assert (await get_user_by_login(db, "alice")).email == "alice@example.com"
+        assert (await get_user_by_email(db, "alice@example.com")).login == "alice"
+        assert await get_user_by_login(db, "bob") is None
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_get_current_user_cache():
+    """Профиль по uid берётся из кэша; инвалидация и более новая версия в токене идут в БД."""
+    user_cache.invalidate(dummy_user.id)
+    db = MagicMock()
+    db.get = AsyncMock(return_value=dummy_user)
+    version = user_version(dummy_user)
+    token = create_access_token({"sub": dummy_user.login, "uid": dummy_user.id, "ver": version})
+
+    first = await get_current_user(token, db)
+    second = await get_current_user(token, db)
+    assert first.login == second.login == dummy_user.login
+    assert db.get.await_count == 1
+
+    user_cache.invalidate(dummy_user.id)
+    await get_current_user(token, db)
+    assert db.get.await_count == 2
+
+    # Профиль изменён после загрузки записи в кэш — токен с новой версией её не принимает
+    newer = create_access_token({"sub": dummy_user.login, "uid": dummy_user.id, "ver": version + 1})
+    await get_current_user(newer, db)
+    assert db.get.await_count == 3
+    assert user_cache.stats()["hits"] >= 1
+
+def test_metrics_expose_cache_stats():
+    """Статистика кэша профилей доступна в /metrics."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "user_cache_hits_total" in response.text
+
+def test_batch_get_users():
+    """Публичные профили по списку id: дубликаты схлопываются, лишние поля не отдаются."""
+    app.dependency_overrides[get_current_user] = lambda: dummy_user
+    rows = [SimpleNamespace(id=1, login="alice", first_name="Alice", last_name=None)]
+    with patch("src.main.get_public_users", return_value=rows) as get_public_users:
+        response = client.get("/users:batch?ids=1,2,1", headers={"Authorization": "Bearer faketoken"})
+        assert response.status_code == 200
+        assert response.json() == {"users": [{"id": 1, "login": "alice", "first_name": "Alice", "last_name": None}]}
+        assert get_public_users.call_args.args[1] == [1, 2]
+
+        response = client.get("/users:batch?ids=1,x", headers={"Authorization": "Bearer faketoken"})
+        assert response.status_code == 400
+        too_many = ",".join(str(i) for i in range(101))
+        response = client.get(f"/users:batch?ids={too_many}", headers={"Authorization": "Bearer faketoken"})
+        assert response.status_code == 400
+    app.dependency_overrides.pop(get_current_user, None)